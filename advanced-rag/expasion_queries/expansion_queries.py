@@ -1,4 +1,14 @@
-from helper_utils import project_embeddings, word_wrap
+from helper_utils import (
+    LLMResponseCache,
+    cached_chat_completion,
+    load_or_fit_projector,
+    plot_dataset_embeddings,
+    project_embeddings,
+    speculative_expansion_search,
+    unique_documents,
+    word_wrap,
+)
+import asyncio
 from pypdf import PdfReader
 import os
 from openai import OpenAI
@@ -7,7 +17,6 @@ from dotenv import load_dotenv
 
 from pypdf import PdfReader
 import numpy as np
-import umap
 
 
 # Load environment variables from .env file
@@ -17,6 +26,9 @@ openai_key = os.getenv("OPENAI_API_KEY")
 client = OpenAI(api_key=openai_key)
 
 root_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Repeated questions reuse the stored expansion instead of calling the API again
+llm_cache = LLMResponseCache(os.path.join(root_dir, "cache", "llm"))
 pdf_path = os.path.join(root_dir, "data", "microsoft-annual-report.pdf")
 reader = PdfReader(pdf_path)
 pdf_texts = [p.extract_text().strip() for p in reader.pages]
@@ -93,11 +105,7 @@ def generate_multi_query(query, model="gpt-3.5-turbo"):
         {"role": "user", "content": query},
     ]
 
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-    )
-    content = response.choices[0].message.content
+    content = cached_chat_completion(client, llm_cache, model, messages)
     content = content.split("\n")
     return content
 
@@ -105,44 +113,67 @@ def generate_multi_query(query, model="gpt-3.5-turbo"):
 original_query = (
     "What details can you provide about the factors that led to revenue growth?"
 )
-aug_queries = generate_multi_query(original_query)
 
-# 1. First step show the augmented queries
-for query in aug_queries:
-    print("\n", query)
+# Seconds to wait for the LLM before showing results for the plain query alone
+EXPANSION_DEADLINE = 2.0
 
-# 2. concatenate the original query with the augmented queries
-joint_query = [
-    original_query
-] + aug_queries  # original query is in a list because chroma can actually handle multiple queries, so we add it in a list
 
-# print("======> \n\n", joint_query)
+def print_results(results):
+    """Prints the retrieved documents grouped by the query that retrieved them."""
+    for query_text, documents in zip(results["query_texts"], results["documents"]):
+        print(f"Query: {query_text}")
+        print("")
+        print("Results:")
+        for doc in documents:
+            print(word_wrap(doc))
+            print("")
+        print("-" * 100)
+
+
+async def retrieve_with_expansion():
+    """
+    Searches the original query while generate_multi_query runs in parallel.
+
+    Returns:
+    dict: The final (merged, or baseline if the expansion failed) query results.
+    """
+    results = None
+    async for stage, results in speculative_expansion_search(
+        chroma_collection,
+        original_query,
+        generate_multi_query,
+        n_results=5,
+        deadline=EXPANSION_DEADLINE,
+    ):
+        print(f"==== {stage} results ====")
+        print_results(results)
+    return results
+
+
+# 1. results["query_texts"] holds the original query first, then each generated question
+results = asyncio.run(retrieve_with_expansion())
+joint_query = results["query_texts"]
+aug_queries = joint_query[1:]
 
-results = chroma_collection.query(
-    query_texts=joint_query, n_results=5, include=["documents", "embeddings"]
-)
-retrieved_documents = results["documents"]
+for query in aug_queries:
+    print("\n", query)
 
 # Deduplicate the retrieved documents
-unique_documents = set()
-for documents in retrieved_documents:
-    for document in documents:
-        unique_documents.add(document)
-
-
-# output the results documents
-for i, documents in enumerate(retrieved_documents):
-    print(f"Query: {joint_query[i]}")
-    print("")
-    print("Results:")
-    for doc in documents:
-        print(word_wrap(doc))
-        print("")
-    print("-" * 100)
-
-embeddings = chroma_collection.get(include=["embeddings"])["embeddings"]
-umap_transform = umap.UMAP(random_state=0, transform_seed=0).fit(embeddings)
-projected_dataset_embeddings = project_embeddings(embeddings, umap_transform)
+retrieved_documents = results["documents"]
+deduplicated_documents = unique_documents(results)
+print(f"Unique documents retrieved: {len(deduplicated_documents)}")
+
+# The projector fit over the whole collection is cached by collection fingerprint;
+# only the query and result points below are projected on every run.
+# For very large collections use PROJECTION_METHOD=pca (randomized PCA) and/or
+# PROJECTION_SAMPLE_SIZE to fit on a random subsample.
+sample_size = os.getenv("PROJECTION_SAMPLE_SIZE")
+umap_transform, projected_dataset_embeddings = load_or_fit_projector(
+    chroma_collection,
+    os.path.join(root_dir, "cache", "projection"),
+    method=os.getenv("PROJECTION_METHOD", "umap"),
+    sample_size=int(sample_size) if sample_size else None,
+)
 
 # 4. We can also visualize the results in the embedding space
 original_query_embedding = embedding_function([original_query])
@@ -164,11 +195,9 @@ import matplotlib.pyplot as plt
 
 # Plot the projected query and retrieved documents in the embedding space
 plt.figure()
-plt.scatter(
-    projected_dataset_embeddings[:, 0],
-    projected_dataset_embeddings[:, 1],
-    s=10,
-    color="gray",
+# "auto" switches from a point scatter to a binned density image past 100k points
+plot_dataset_embeddings(
+    projected_dataset_embeddings, mode=os.getenv("VISUALIZATION_MODE", "auto")
 )
 plt.scatter(
     project_augmented_queries[:, 0],
@@ -1,12 +1,19 @@
-from helper_utils import project_embeddings, word_wrap
+from helper_utils import (
+    LLMResponseCache,
+    cached_chat_completion,
+    load_or_fit_projector,
+    plot_dataset_embeddings,
+    project_embeddings,
+    speculative_expansion_search,
+    word_wrap,
+)
+import asyncio
 from pypdf import PdfReader
 import os
 from openai import OpenAI
 from dotenv import load_dotenv
 
 from pypdf import PdfReader
-# Fix the UMAP import - import the UMAP class specifically
-from umap import UMAP
 
 
 # Load environment variables from .env file
@@ -17,6 +24,10 @@ client = OpenAI(api_key=openai_key)
 
 absolute_path = os.path.abspath(__file__)
 parent_dir = os.path.dirname(absolute_path)
+
+# Repeated questions reuse the stored hypothetical answer instead of calling the API again
+llm_cache = LLMResponseCache(os.path.join(parent_dir, "cache", "llm"))
+
 reader = PdfReader(os.path.join(parent_dir, "data", "microsoft-annual-report.pdf"))
 pdf_texts = [p.extract_text().strip() for p in reader.pages]
 
@@ -94,42 +105,64 @@ def augment_query_generated(query, model="gpt-3.5-turbo"):
         {"role": "user", "content": query},
     ]
 
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-    )
-    content = response.choices[0].message.content
-    return content
+    return cached_chat_completion(client, llm_cache, model, messages)
 
 
 original_query = "What was the total profit for the year, and how does it compare to the previous year?"
-hypothetical_answer = augment_query_generated(original_query)
 
-joint_query = f"{original_query} {hypothetical_answer}"
+# Seconds to wait for the hypothetical answer before showing plain-query results
+EXPANSION_DEADLINE = 2.0
+
+
+def hyde_queries(query):
+    """Builds the HyDE query: the question followed by a generated example answer."""
+    hypothetical_answer = augment_query_generated(query)
+    return [f"{query} {hypothetical_answer}"]
+
+
+async def retrieve_with_hyde():
+    """
+    Searches the original query (r results) while the hypothetical answer is generated,
+    then searches the joint query (e results) as soon as it is available.
+
+    Returns:
+    dict: The final query results; the last result list belongs to the joint query,
+    or to the original query if the expansion failed.
+    """
+    results = None
+    async for stage, results in speculative_expansion_search(
+        chroma_collection,
+        original_query,
+        hyde_queries,
+        n_results=5,
+        deadline=EXPANSION_DEADLINE,
+    ):
+        print(f"==== {stage} results ====")
+        for doc in results["documents"][-1]:
+            print(word_wrap(doc))
+            print("")
+    return results
+
+
+results = asyncio.run(retrieve_with_hyde())
+joint_query = results["query_texts"][-1]
 print(word_wrap(joint_query))
-
-# e results
-results = chroma_collection.query(
-    query_texts=joint_query, n_results=5, include=["documents", "embeddings"]
+retrieved_documents = results["documents"][-1]
+
+# The projector fit over the whole collection is cached by collection fingerprint;
+# only the query and result points below are projected on every run.
+# For very large collections use PROJECTION_METHOD=pca (randomized PCA) and/or
+# PROJECTION_SAMPLE_SIZE to fit on a random subsample.
+sample_size = os.getenv("PROJECTION_SAMPLE_SIZE")
+umap_transform, projected_dataset_embeddings = load_or_fit_projector(
+    chroma_collection,
+    os.path.join(parent_dir, "cache", "projection"),
+    method=os.getenv("PROJECTION_METHOD", "umap"),
+    sample_size=int(sample_size) if sample_size else None,
 )
-retrieved_documents = results["documents"][0]
-
-# r results
-# results = chroma_collection.query(
-#     query_texts=original_query, n_results=5, include=["documents", "embeddings"]
-# )
-
-for doc in retrieved_documents:
-    print(word_wrap(doc))
-    print("")
 
-embeddings = chroma_collection.get(include=["embeddings"])["embeddings"]
-# Fix the UMAP usage - use the imported UMAP class directly
-umap_transform = UMAP(random_state=0, transform_seed=0).fit(embeddings)
-projected_dataset_embeddings = project_embeddings(embeddings, umap_transform)
 
-
-retrieved_embeddings = results["embeddings"][0]
+retrieved_embeddings = results["embeddings"][-1]
 original_query_embedding = embedding_function([original_query])
 augmented_query_embedding = embedding_function([joint_query])
 
@@ -148,11 +181,9 @@ import matplotlib.pyplot as plt
 # Plot the projected query and retrieved documents in the embedding space
 plt.figure()
 
-plt.scatter(
-    projected_dataset_embeddings[:, 0],
-    projected_dataset_embeddings[:, 1],
-    s=10,
-    color="gray",
+# "auto" switches from a point scatter to a binned density image past 100k points
+plot_dataset_embeddings(
+    projected_dataset_embeddings, mode=os.getenv("VISUALIZATION_MODE", "auto")
 )
 plt.scatter(
     projected_retrieved_embeddings[:, 0],
@@ -1,4 +1,4 @@
-from helper_utils import project_embeddings, word_wrap
+from helper_utils import LLMResponseCache, cached_chat_completion, project_embeddings, word_wrap
 from pypdf import PdfReader
 import os
 from openai import OpenAI
@@ -17,6 +17,10 @@ client = OpenAI(api_key=openai_key)
 
 absolute_path = os.path.abspath(__file__)
 parent_dir = os.path.dirname(absolute_path)
+
+# Repeated questions reuse the stored hypothetical answer instead of calling the API again
+llm_cache = LLMResponseCache(os.path.join(parent_dir, "cache", "llm"))
+
 reader = PdfReader(os.path.join(parent_dir, "data", "microsoft-annual-report.pdf"))
 pdf_texts = [p.extract_text().strip() for p in reader.pages]
 
@@ -86,12 +90,7 @@ def augment_query_generated(query, model="gpt-3.5-turbo"):
         {"role": "user", "content": query},
     ]
 
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-    )
-    content = response.choices[0].message.content
-    return content
+    return cached_chat_completion(client, llm_cache, model, messages)
 
 
 original_query = "What was the total profit for the year, and how does it compare to the previous year?"
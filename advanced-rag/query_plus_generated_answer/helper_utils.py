@@ -1,4 +1,11 @@
 # helper_utils.py
+import asyncio
+import hashlib
+import json
+import os
+import pickle
+import time
+
 import numpy as np
 import chromadb
 import pandas as pd
@@ -90,3 +97,336 @@ def load_chroma(filename, collection_name, embedding_function):
         # collection.add(text=row["text"], embedding=row["embeddings"])
 
     return collection
+
+
+class LLMResponseCache:
+    """
+    Disk-backed cache of chat completion responses with a time-to-live.
+
+    Each entry is a small JSON file named after the hash of
+    (model, full message list, sampling parameters).
+    """
+
+    def __init__(self, cache_dir, ttl_seconds=7 * 24 * 3600):
+        """
+        Args:
+        cache_dir (str): Directory where cache entries are stored.
+        ttl_seconds (float): Seconds an entry stays valid. None keeps entries forever.
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(model, messages, params):
+        """
+        Builds the cache key for a chat completion request.
+
+        Args:
+        model (str): The chat model name.
+        messages (list): The full list of chat messages.
+        params (dict): Sampling parameters such as temperature or top_p.
+
+        Returns:
+        str: The hex SHA-256 digest identifying the request.
+        """
+        payload = json.dumps(
+            {"model": model, "messages": messages, "params": params},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """
+        Returns the cached response content, or None if missing or expired.
+
+        Args:
+        key (str): The cache key from make_key.
+
+        Returns:
+        str: The cached message content, or None.
+        """
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if self.ttl_seconds is not None and time.time() - entry["created_at"] > self.ttl_seconds:
+            os.remove(self._path(key))
+            return None
+        return entry["content"]
+
+    def put(self, key, content):
+        """
+        Stores a response content in the cache.
+
+        Args:
+        key (str): The cache key from make_key.
+        content (str): The message content returned by the model.
+        """
+        # Write to a temporary file first so readers never see a partial entry
+        tmp_path = f"{self._path(key)}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"created_at": time.time(), "content": content}, f)
+        os.replace(tmp_path, self._path(key))
+
+
+def cached_chat_completion(client, cache, model, messages, **params):
+    """
+    Calls the chat completions API unless an identical request is already cached.
+
+    Args:
+    client (openai.OpenAI): The OpenAI client.
+    cache (LLMResponseCache): The response cache. None disables caching.
+    model (str): The chat model name.
+    messages (list): The full list of chat messages.
+    **params: Sampling parameters forwarded to the API and included in the key.
+
+    Returns:
+    str: The content of the first choice's message.
+    """
+    key = LLMResponseCache.make_key(model, messages, params) if cache else None
+    if cache:
+        content = cache.get(key)
+        if content is not None:
+            return content
+
+    response = client.chat.completions.create(model=model, messages=messages, **params)
+    content = response.choices[0].message.content
+    if cache:
+        cache.put(key, content)
+    return content
+
+
+def merge_query_results(baseline, expanded):
+    """
+    Merges two Chroma query results, keeping one result list per query text.
+
+    Args:
+    baseline (dict): Results of the plain query, with a "query_texts" entry.
+    expanded (dict): Results of the expanded queries, with a "query_texts" entry.
+
+    Returns:
+    dict: Results whose lists hold the baseline queries followed by the expanded ones.
+    """
+    merged = {"included": baseline.get("included")}
+    for key, value in baseline.items():
+        # Only per-query result lists are merged; fields that were not requested are None
+        if key != "included" and isinstance(value, list):
+            merged[key] = list(value) + list(expanded.get(key) or [])
+    return merged
+
+
+def unique_documents(results):
+    """
+    Flattens the documents of a Chroma query result, dropping duplicates.
+
+    Args:
+    results (dict): A Chroma query result with one document list per query.
+
+    Returns:
+    list: The unique documents in first-seen order.
+    """
+    return list(dict.fromkeys(doc for documents in results["documents"] for doc in documents))
+
+
+async def speculative_expansion_search(
+    collection, query, expand, n_results=5, deadline=2.0, include=("documents", "embeddings")
+):
+    """
+    Runs the LLM query expansion and the plain-query search concurrently.
+
+    The plain query is searched right away while the expansion (multi-query or
+    HyDE) runs in a worker thread. If the expansion has not finished when the
+    deadline passes, the baseline results are yielded first; the merged
+    results follow as soon as the expanded queries have been searched.
+
+    Args:
+    collection (chromadb.Collection): The collection to search.
+    query (str): The user's original query.
+    expand (callable): Blocking function mapping the query to a list of expanded query texts.
+    n_results (int): Number of results per query.
+    deadline (float): Seconds to wait for the expansion before yielding the baseline.
+    include (tuple): Fields requested from Chroma.
+
+    Yields:
+    tuple: ("baseline", results) when the deadline is missed, then ("merged", results).
+    Every results dict carries a "query_texts" list aligned with its result lists.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    expansion_task = asyncio.create_task(asyncio.to_thread(expand, query))
+    baseline = await asyncio.to_thread(
+        collection.query, query_texts=[query], n_results=n_results, include=list(include)
+    )
+    baseline = {**baseline, "query_texts": [query]}
+
+    remaining = max(0.0, deadline - (loop.time() - started))
+    done, _ = await asyncio.wait({expansion_task}, timeout=remaining)
+    baseline_sent = not done
+    if baseline_sent:
+        yield "baseline", baseline
+
+    try:
+        expanded_queries = [q for q in await expansion_task if q.strip()]
+    except Exception as e:
+        print(f"Query expansion failed, keeping baseline results: {e}")
+        if not baseline_sent:
+            yield "baseline", baseline
+        return
+
+    if not expanded_queries:
+        yield "merged", baseline
+        return
+
+    expanded = await asyncio.to_thread(
+        collection.query, query_texts=expanded_queries, n_results=n_results, include=list(include)
+    )
+    expanded = {**expanded, "query_texts": expanded_queries}
+    yield "merged", merge_query_results(baseline, expanded)
+
+
+def collection_fingerprint(ids, embeddings, params=None):
+    """
+    Computes a fingerprint identifying the content of a collection.
+
+    Args:
+    ids (list): The ids of every record in the collection.
+    embeddings (numpy.ndarray): The embeddings of every record, in the same order.
+    params (dict): Extra settings that should invalidate the fingerprint when changed.
+
+    Returns:
+    str: A short hex digest.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(params or {}, sort_keys=True).encode("utf-8"))
+    digest.update("\x00".join(ids).encode("utf-8"))
+    digest.update(np.ascontiguousarray(embeddings, dtype=np.float32).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def fit_projector(embeddings, method="umap", sample_size=None, random_state=0, transform_seed=0):
+    """
+    Fits a 2D projector, optionally on a random subsample of the embeddings.
+
+    Args:
+    embeddings (numpy.ndarray): The embeddings to fit on.
+    method (str): "umap", or "pca" for a randomized PCA that scales to millions of points.
+    sample_size (int): Fit on at most this many randomly chosen embeddings. None uses all.
+    random_state (int): Seed for the subsample and the projector.
+    transform_seed (int): UMAP transform_seed.
+
+    Returns:
+    object: The fitted projector, exposing transform(embeddings).
+    """
+    if sample_size and len(embeddings) > sample_size:
+        rng = np.random.default_rng(random_state)
+        embeddings = embeddings[rng.choice(len(embeddings), sample_size, replace=False)]
+
+    if method == "pca":
+        from sklearn.decomposition import PCA
+
+        return PCA(n_components=2, svd_solver="randomized", random_state=random_state).fit(
+            embeddings
+        )
+    if method == "umap":
+        import umap
+
+        return umap.UMAP(random_state=random_state, transform_seed=transform_seed).fit(embeddings)
+    raise ValueError(f"Unknown projection method: {method}")
+
+
+def load_or_fit_projector(collection, cache_dir, method="umap", sample_size=None,
+                          random_state=0, transform_seed=0):
+    """
+    Returns a fitted 2D projector and the projected collection embeddings, reusing a cached fit.
+
+    The projector and the projected coordinates are stored under cache_dir keyed
+    by the collection fingerprint, so the projector is only fitted again when
+    the collection content (or the projection settings) change. Query and
+    result points still have to be projected with project_embeddings on each run.
+
+    Args:
+    collection (chromadb.Collection): The collection to project.
+    cache_dir (str): Directory where fitted projectors are stored.
+    method (str): "umap" or "pca" (see fit_projector).
+    sample_size (int): Fit on at most this many embeddings. None uses all.
+    random_state (int): Seed for the subsample and the projector.
+    transform_seed (int): UMAP transform_seed.
+
+    Returns:
+    tuple: (fitted projector, numpy.ndarray of projected dataset embeddings).
+    """
+    data = collection.get(include=["embeddings"])
+    embeddings = np.asarray(data["embeddings"], dtype=np.float32)
+    params = {
+        "method": method,
+        "sample_size": sample_size,
+        "random_state": random_state,
+        "transform_seed": transform_seed,
+    }
+    fingerprint = collection_fingerprint(data["ids"], embeddings, params)
+
+    model_path = os.path.join(cache_dir, f"{method}_{fingerprint}.pkl")
+    projected_path = os.path.join(cache_dir, f"{method}_{fingerprint}_projected.npy")
+    if os.path.exists(model_path) and os.path.exists(projected_path):
+        with open(model_path, "rb") as f:
+            projector = pickle.load(f)
+        return projector, np.load(projected_path)
+
+    projector = fit_projector(embeddings, method, sample_size, random_state, transform_seed)
+    projected_dataset_embeddings = project_embeddings(embeddings, projector)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(model_path, "wb") as f:
+        pickle.dump(projector, f)
+    np.save(projected_path, projected_dataset_embeddings)
+    return projector, projected_dataset_embeddings
+
+
+def plot_dataset_embeddings(projected_embeddings, mode="auto", density_threshold=100_000, bins=512):
+    """
+    Draws the projected collection on the current matplotlib axes.
+
+    Small collections are drawn as a gray scatter. Large ones are aggregated
+    into a 2D histogram rendered as a single log-scaled image, which stays
+    fast and readable for millions of points; query points can be scattered
+    on top as usual.
+
+    Args:
+    projected_embeddings (numpy.ndarray): The 2D projected embeddings.
+    mode (str): "scatter", "density", or "auto" to pick by size.
+    density_threshold (int): Point count above which "auto" switches to density.
+    bins (int): Number of histogram bins per axis in density mode.
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm
+
+    if mode == "auto":
+        mode = "density" if len(projected_embeddings) > density_threshold else "scatter"
+
+    if mode == "scatter":
+        plt.scatter(
+            projected_embeddings[:, 0],
+            projected_embeddings[:, 1],
+            s=10,
+            color="gray",
+        )
+        return
+
+    counts, x_edges, y_edges = np.histogram2d(
+        projected_embeddings[:, 0], projected_embeddings[:, 1], bins=bins
+    )
+    plt.imshow(
+        np.ma.masked_equal(counts.T, 0),
+        origin="lower",
+        extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]),
+        cmap="Greys",
+        norm=LogNorm(),
+        interpolation="nearest",
+        aspect="auto",
+    )
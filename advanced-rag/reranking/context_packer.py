@@ -0,0 +1,132 @@
+# context_packer.py
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # fall back to a character-based estimate
+    tiktoken = None
+
+
+@lru_cache(maxsize=None)
+def _encoding(model):
+    """Returns the tiktoken encoding for a model, defaulting to cl100k_base."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text, model="gpt-3.5-turbo"):
+    """
+    Counts the tokens of a text for the given chat model.
+
+    Results are cached, so each chunk is only tokenized once per process.
+    Without tiktoken installed, roughly 4 characters per token are assumed.
+
+    Args:
+    text (str): The text to count.
+    model (str): The chat model whose tokenizer is used.
+
+    Returns:
+    int: The number of tokens.
+    """
+    if tiktoken is None:
+        return (len(text) + 3) // 4
+    return len(_encoding(model).encode(text))
+
+
+def count_prompt_tokens(messages, model="gpt-3.5-turbo"):
+    """
+    Counts the tokens of a chat message list, including per-message overhead.
+
+    Args:
+    messages (list): Chat messages with "role" and "content" keys.
+    model (str): The chat model whose tokenizer is used.
+
+    Returns:
+    int: The approximate number of prompt tokens billed for the request.
+    """
+    # Every message carries ~4 framing tokens and the reply is primed with 3 more
+    total = 3
+    for message in messages:
+        total += 4 + count_tokens(message["role"], model) + count_tokens(message["content"], model)
+    return total
+
+
+def trim_overlap(previous, current, min_overlap=20):
+    """
+    Removes the beginning of current that repeats the end of previous.
+
+    Args:
+    previous (str): The chunk placed just before current in the context.
+    current (str): The chunk to trim.
+    min_overlap (int): Shortest overlap, in characters, that is worth trimming.
+
+    Returns:
+    str: current without the overlapping prefix.
+    """
+    longest = min(len(previous), len(current))
+    for size in range(longest, min_overlap - 1, -1):
+        if previous.endswith(current[:size]):
+            return current[size:].lstrip()
+    return current
+
+
+@dataclass
+class PackedContext:
+    """
+    Result of packing ranked chunks into a token budget.
+
+    Attributes:
+        text: The context string to place in the prompt
+        indices: Positions (in the input order) of the chunks that were included
+        token_counts: Tokens used by each included chunk, after overlap trimming
+        total_tokens: Tokens used by the whole context, separators included
+        dropped: Positions of the chunks that did not fit the budget
+    """
+    text: str
+    indices: list = field(default_factory=list)
+    token_counts: list = field(default_factory=list)
+    total_tokens: int = 0
+    dropped: list = field(default_factory=list)
+
+
+def pack_context(documents, token_budget=1500, model="gpt-3.5-turbo", separator="\n\n"):
+    """
+    Greedily fills a token budget with chunks in rerank order.
+
+    Chunks that do not fit are skipped so that a later, shorter chunk can
+    still use the remaining budget. Text repeated between a chunk and the
+    chunk placed before it is trimmed.
+
+    Args:
+    documents (list): Chunks sorted from most to least relevant.
+    token_budget (int): Maximum number of context tokens.
+    model (str): The chat model whose tokenizer is used.
+    separator (str): Text placed between chunks.
+
+    Returns:
+    PackedContext: The packed context and its token accounting.
+    """
+    separator_tokens = count_tokens(separator, model)
+    packed = PackedContext(text="")
+    pieces = []
+
+    for index, document in enumerate(documents):
+        text = trim_overlap(pieces[-1], document) if pieces else document
+        if not text:
+            continue
+        tokens = count_tokens(text, model)
+        cost = tokens + (separator_tokens if pieces else 0)
+        if packed.total_tokens + cost > token_budget:
+            packed.dropped.append(index)
+            continue
+        pieces.append(text)
+        packed.indices.append(index)
+        packed.token_counts.append(tokens)
+        packed.total_tokens += cost
+
+    packed.text = separator.join(pieces)
+    return packed
@@ -1,4 +1,9 @@
 # helper_utils.py
+import json
+import os
+import random
+import time
+
 import numpy as np
 import chromadb
 import pandas as pd
@@ -90,3 +95,195 @@ def load_chroma(filename, collection_name, embedding_function):
         # collection.add(text=row["text"], embedding=row["embeddings"])
 
     return collection
+
+
+class SemanticAnswerCache:
+    """
+    Answer cache that matches paraphrased questions by query embedding similarity.
+
+    An entry stores (query embedding, retrieved ids, answer). A new query hits
+    the cache when its embedding is within the cosine threshold of a stored one
+    AND retrieval returned the same ids, so the cached answer was built from
+    the same context. A sample of hits can be audited by regenerating the
+    answer and comparing it with the cached one.
+    """
+
+    def __init__(self, path=None, threshold=0.95, audit_rate=0.0, audit_log_path=None,
+                 answer_embedding_function=None, audit_threshold=0.9, max_entries=1000):
+        """
+        Args:
+        path (str): JSON file where entries are persisted. None keeps them in memory.
+        threshold (float): Minimum cosine similarity between query embeddings for a hit.
+        audit_rate (float): Fraction of hits that are regenerated and compared (0 to 1).
+        audit_log_path (str): JSONL file receiving one record per audited hit.
+        answer_embedding_function (callable): Embeds answers for the audit comparison.
+            Without it, answers are compared by word overlap.
+        audit_threshold (float): Minimum answer similarity for an audited hit to count as correct.
+        max_entries (int): Oldest entries are evicted beyond this size.
+        """
+        self.path = path
+        self.threshold = threshold
+        self.audit_rate = audit_rate
+        self.audit_log_path = audit_log_path
+        self.answer_embedding_function = answer_embedding_function
+        self.audit_threshold = audit_threshold
+        self.max_entries = max_entries
+        self.entries = []
+        self.embeddings = np.empty((0, 0), dtype=np.float32)
+        self.lookups = 0
+        self.hits = 0
+        self.audited = 0
+        self.false_hits = 0
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+            self._rebuild_matrix()
+
+    @staticmethod
+    def _normalize(vectors):
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _rebuild_matrix(self):
+        if self.entries:
+            self.embeddings = self._normalize([entry["embedding"] for entry in self.entries])
+        else:
+            self.embeddings = np.empty((0, 0), dtype=np.float32)
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+    def lookup(self, query_embedding, retrieved_ids):
+        """
+        Finds the most similar cached query that retrieved the same ids.
+
+        Args:
+        query_embedding (list): Embedding of the new query.
+        retrieved_ids (list): Ids returned by retrieval for the new query.
+
+        Returns:
+        dict: The matching entry with an added "similarity" key, or None.
+        """
+        self.lookups += 1
+        if not self.entries:
+            return None
+        similarities = self.embeddings @ self._normalize(query_embedding)[0]
+        wanted_ids = sorted(retrieved_ids)
+        for index in np.argsort(-similarities):
+            if similarities[index] < self.threshold:
+                break
+            entry = self.entries[index]
+            if entry["retrieved_ids"] == wanted_ids:
+                self.hits += 1
+                return {**entry, "index": int(index), "similarity": float(similarities[index])}
+        return None
+
+    def store(self, query, query_embedding, retrieved_ids, answer):
+        """
+        Adds an answer to the cache and persists it.
+
+        Args:
+        query (str): The query text, kept for auditing.
+        query_embedding (list): Embedding of the query.
+        retrieved_ids (list): Ids returned by retrieval for the query.
+        answer: The generated answer (any JSON-serializable value).
+        """
+        self.entries.append(
+            {
+                "query": query,
+                "embedding": [float(x) for x in np.asarray(query_embedding).ravel()],
+                "retrieved_ids": sorted(retrieved_ids),
+                "answer": answer,
+            }
+        )
+        self.entries = self.entries[-self.max_entries :]
+        self._rebuild_matrix()
+        self._save()
+
+    def answers_agree(self, cached_answer, fresh_answer):
+        """
+        Decides whether a cached answer still matches a freshly generated one.
+
+        Args:
+        cached_answer: The answer served from the cache.
+        fresh_answer: The answer generated for the new query.
+
+        Returns:
+        tuple: (agree, similarity).
+        """
+        cached_text = cached_answer if isinstance(cached_answer, str) else "\n".join(cached_answer)
+        fresh_text = fresh_answer if isinstance(fresh_answer, str) else "\n".join(fresh_answer)
+        if self.answer_embedding_function is not None:
+            vectors = self._normalize(self.answer_embedding_function([cached_text, fresh_text]))
+            similarity = float(vectors[0] @ vectors[1])
+        else:
+            cached_words = set(cached_text.lower().split())
+            fresh_words = set(fresh_text.lower().split())
+            union = cached_words | fresh_words
+            similarity = len(cached_words & fresh_words) / len(union) if union else 1.0
+        return similarity >= self.audit_threshold, similarity
+
+    def get_or_generate(self, query, query_embedding, retrieved_ids, generate):
+        """
+        Returns a cached answer for a paraphrased query, or generates and stores a new one.
+
+        Args:
+        query (str): The query text.
+        query_embedding (list): Embedding of the query.
+        retrieved_ids (list): Ids returned by retrieval for the query.
+        generate (callable): Builds the answer (reranking + LLM call) when there is no hit.
+
+        Returns:
+        tuple: (answer, from_cache).
+        """
+        match = self.lookup(query_embedding, retrieved_ids)
+        if match is None:
+            answer = generate()
+            self.store(query, query_embedding, retrieved_ids, answer)
+            return answer, False
+
+        if random.random() < self.audit_rate:
+            fresh_answer = generate()
+            agree, answer_similarity = self.answers_agree(match["answer"], fresh_answer)
+            self.audited += 1
+            if not agree:
+                self.false_hits += 1
+                # Replace the wrong entry so the next paraphrase gets the fresh answer
+                self.entries[match["index"]]["answer"] = fresh_answer
+                self._save()
+            if self.audit_log_path:
+                os.makedirs(os.path.dirname(os.path.abspath(self.audit_log_path)), exist_ok=True)
+                with open(self.audit_log_path, "a", encoding="utf-8") as f:
+                    record = {
+                        "timestamp": time.time(),
+                        "query": query,
+                        "cached_query": match["query"],
+                        "query_similarity": match["similarity"],
+                        "answer_similarity": answer_similarity,
+                        "false_hit": not agree,
+                    }
+                    f.write(json.dumps(record) + "\n")
+            if not agree:
+                return fresh_answer, False
+        return match["answer"], True
+
+    def report(self):
+        """
+        Summarizes cache effectiveness.
+
+        Returns:
+        str: Hit rate and audited false-hit rate.
+        """
+        hit_rate = self.hits / self.lookups if self.lookups else 0.0
+        false_hit_rate = self.false_hits / self.audited if self.audited else 0.0
+        return (
+            f"semantic cache: {self.hits}/{self.lookups} hits ({hit_rate:.0%}), "
+            f"{self.false_hits}/{self.audited} audited hits were false ({false_hit_rate:.0%})"
+        )
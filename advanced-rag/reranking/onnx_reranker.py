@@ -0,0 +1,313 @@
+# onnx_reranker.py
+import inspect
+import os
+import time
+
+import numpy as np
+import onnxruntime as ort
+from transformers import AutoTokenizer
+
+# Pairs scored by both the PyTorch model and every freshly exported ONNX model
+PARITY_PAIRS = [
+    ["What has been the investment in research and development?",
+     "Research and development expenses increased $2.5 billion or 9% driven by investments in cloud engineering."],
+    ["What has been the investment in research and development?",
+     "The Board of Directors declared a quarterly dividend of $0.68 per share."],
+    ["What were the main drivers of revenue growth?",
+     "Revenue increased 7% driven by growth in Intelligent Cloud and Productivity and Business Processes."],
+    ["What were the main drivers of revenue growth?",
+     "Our headquarters are located in Redmond, Washington."],
+]
+# Largest allowed logit difference from PyTorch; int8 weights shift scores slightly
+PARITY_ATOL_FP32 = 1e-3
+PARITY_ATOL_INT8 = 0.5
+# Bumped whenever the export changes, so models exported by older code are not reused
+EXPORT_VERSION = 2
+
+
+def export_to_onnx(model_name, output_dir, quantize=False):
+    """
+    Exports a Hugging Face cross-encoder to ONNX, optionally with dynamic int8 quantization.
+
+    The export is skipped when the ONNX file already exists in output_dir.
+
+    Args:
+    model_name (str): The Hugging Face model id, e.g. "cross-encoder/ms-marco-MiniLM-L-6-v2".
+    output_dir (str): Directory where the tokenizer and ONNX files are written.
+    quantize (bool): Whether to also produce an int8 dynamically quantized model.
+
+    Returns:
+    str: Path to the ONNX model to load (the quantized one if quantize is True).
+    """
+    fp32_path = os.path.join(output_dir, "model.onnx")
+    int8_path = os.path.join(output_dir, "model.int8.onnx")
+
+    if not os.path.exists(fp32_path):
+        # torch and the model class are only needed for the one-off export
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        os.makedirs(output_dir, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+        tokenizer.save_pretrained(output_dir)
+
+        sample = tokenizer(
+            ["query"], ["document"], padding=True, truncation=True, return_tensors="pt"
+        )
+        # The tokenizer returns input_ids, token_type_ids, attention_mask while BERT's
+        # forward takes input_ids, attention_mask, token_type_ids: pass the inputs by
+        # keyword and name the graph inputs in forward's order, which the export uses
+        forward_parameters = inspect.signature(model.forward).parameters
+        input_names = [name for name in forward_parameters if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["logits"] = {0: "batch"}
+        torch.onnx.export(
+            model,
+            ({name: sample[name] for name in input_names},),
+            fp32_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+        check_parity(model_name, fp32_path, output_dir, atol=PARITY_ATOL_FP32)
+
+    if not quantize:
+        return fp32_path
+
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        check_parity(model_name, int8_path, output_dir, atol=PARITY_ATOL_INT8)
+    return int8_path
+
+
+def check_parity(model_name, model_path, tokenizer_dir, pairs=PARITY_PAIRS, atol=PARITY_ATOL_FP32):
+    """
+    Checks that an exported ONNX model scores pairs like the PyTorch model it came from.
+
+    A mismatch deletes the ONNX file, so a broken export is never cached and
+    reused by later runs.
+
+    Args:
+    model_name (str): The Hugging Face model id the ONNX model was exported from.
+    model_path (str): Path to the ONNX model.
+    tokenizer_dir (str): Directory holding the saved tokenizer.
+    pairs (list): List of [query, document] pairs to compare on.
+    atol (float): Largest allowed absolute difference between the two logits.
+
+    Returns:
+    float: The largest absolute difference found.
+
+    Raises:
+    AssertionError: If any score differs by more than atol.
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification
+
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+    features = tokenizer(
+        [query for query, _ in pairs],
+        [document for _, document in pairs],
+        padding=True,
+        truncation=True,
+        return_tensors="pt",
+    )
+    with torch.no_grad():
+        reference = model(**features).logits[:, 0].numpy()
+    scores = OnnxCrossEncoder(model_path, tokenizer_dir).predict(pairs, batch_size=len(pairs))
+
+    max_difference = float(np.max(np.abs(reference - scores)))
+    if max_difference > atol:
+        os.remove(model_path)
+        raise AssertionError(
+            f"{os.path.basename(model_path)} disagrees with {model_name}: max logit difference "
+            f"{max_difference:.4f} > {atol} (PyTorch {reference}, ONNX {scores})"
+        )
+    print(f"Parity check passed for {os.path.basename(model_path)}: max difference {max_difference:.5f}")
+    return max_difference
+
+
+class OnnxCrossEncoder:
+    """
+    onnxruntime-backed cross-encoder with the same predict(pairs) interface as
+    sentence_transformers.CrossEncoder.
+    """
+
+    def __init__(self, model_path, tokenizer_dir, num_threads=None, max_length=512):
+        """
+        Args:
+        model_path (str): Path to the ONNX model.
+        tokenizer_dir (str): Directory holding the saved tokenizer.
+        num_threads (int): Intra-op threads for onnxruntime. Defaults to all cores.
+        max_length (int): Maximum number of tokens per (query, document) pair.
+        """
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.model_path = model_path
+        self.tokenizer_dir = tokenizer_dir
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_dir)
+        self.max_length = max_length
+
+    @classmethod
+    def from_pretrained(cls, model_name, cache_dir, quantize=True, num_threads=None):
+        """
+        Exports (once) and loads a cross-encoder as an ONNX model.
+
+        Args:
+        model_name (str): The Hugging Face model id.
+        cache_dir (str): Directory where exported models are kept between runs.
+        quantize (bool): Whether to load the int8 dynamically quantized model.
+        num_threads (int): Intra-op threads for onnxruntime.
+
+        Returns:
+        OnnxCrossEncoder: The loaded reranker.
+        """
+        output_dir = os.path.join(cache_dir, f"{model_name.replace('/', '__')}.v{EXPORT_VERSION}")
+        model_path = export_to_onnx(model_name, output_dir, quantize=quantize)
+        return cls(model_path, output_dir, num_threads=num_threads)
+
+    def predict(self, pairs, batch_size=32):
+        """
+        Scores (query, document) pairs.
+
+        Args:
+        pairs (list): List of [query, document] pairs.
+        batch_size (int): Number of pairs per inference call.
+
+        Returns:
+        numpy.ndarray: One relevance logit per pair.
+        """
+        scores = []
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start : start + batch_size]
+            features = self.tokenizer(
+                [query for query, _ in batch],
+                [document for _, document in batch],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            inputs = {
+                name: value.astype(np.int64)
+                for name, value in features.items()
+                if name in self.input_names
+            }
+            logits = self.session.run(["logits"], inputs)[0]
+            scores.append(logits[:, 0])
+        if not scores:
+            return np.empty(0, dtype=np.float32)
+        return np.concatenate(scores)
+
+
+def ranking_agreement(reference_scores, candidate_scores, k=5):
+    """
+    Compares two score arrays for the same pairs by the rankings they induce.
+
+    Args:
+    reference_scores (numpy.ndarray): Scores from the reference model.
+    candidate_scores (numpy.ndarray): Scores from the model being checked.
+    k (int): Cut-off for the top-k overlap.
+
+    Returns:
+    dict: "spearman" rank correlation, "top_k_overlap" fraction and "same_top_1" flag.
+    """
+    reference_scores = np.asarray(reference_scores, dtype=np.float64)
+    candidate_scores = np.asarray(candidate_scores, dtype=np.float64)
+    reference_ranks = np.argsort(np.argsort(-reference_scores))
+    candidate_ranks = np.argsort(np.argsort(-candidate_scores))
+    if len(reference_scores) > 1:
+        spearman = float(np.corrcoef(reference_ranks, candidate_ranks)[0, 1])
+    else:
+        spearman = 1.0
+
+    k = min(k, len(reference_scores))
+    reference_top = set(np.argsort(-reference_scores)[:k])
+    candidate_top = set(np.argsort(-candidate_scores)[:k])
+    return {
+        "spearman": spearman,
+        "top_k_overlap": len(reference_top & candidate_top) / k if k else 1.0,
+        "same_top_1": bool(np.argmax(reference_scores) == np.argmax(candidate_scores)),
+    }
+
+
+def benchmark(models, pairs, batch_size=32, repeats=3):
+    """
+    Measures scoring latency of several rerankers on the same pairs.
+
+    Args:
+    models (dict): Mapping of label to a model exposing predict(pairs, batch_size=...).
+    pairs (list): List of [query, document] pairs.
+    batch_size (int): Batch size passed to every model.
+    repeats (int): Number of timed runs; the best one is reported.
+
+    Returns:
+    dict: Mapping of label to (scores, best latency in milliseconds).
+    """
+    results = {}
+    for label, model in models.items():
+        # Warm-up run so one-off initialization is not timed
+        scores = np.asarray(model.predict(pairs[:batch_size], batch_size=batch_size))
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            scores = np.asarray(model.predict(pairs, batch_size=batch_size))
+            timings.append((time.perf_counter() - start) * 1000)
+        results[label] = (scores, min(timings))
+    return results
+
+
+if __name__ == "__main__":
+    from pypdf import PdfReader
+    from sentence_transformers import CrossEncoder
+
+    model_name = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    parent_dir = os.path.dirname(os.path.abspath(__file__))
+    cache_dir = os.path.join(parent_dir, "cache", "onnx")
+
+    reader = PdfReader(os.path.join(parent_dir, "data", "microsoft-annual-report.pdf"))
+    pdf_texts = [p.extract_text().strip() for p in reader.pages]
+    chunks = [
+        text[i : i + 1000]
+        for text in pdf_texts
+        if text
+        for i in range(0, len(text), 1000)
+    ]
+    query = "What has been the investment in research and development?"
+    pairs = [[query, chunk] for chunk in chunks[:256]]
+
+    models = {
+        "pytorch-fp32": CrossEncoder(model_name),
+        "onnx-fp32": OnnxCrossEncoder.from_pretrained(model_name, cache_dir, quantize=False),
+        "onnx-int8": OnnxCrossEncoder.from_pretrained(model_name, cache_dir, quantize=True),
+    }
+    for label, model in models.items():
+        if label.startswith("onnx"):
+            atol = PARITY_ATOL_INT8 if label.endswith("int8") else PARITY_ATOL_FP32
+            check_parity(model_name, model.model_path, model.tokenizer_dir, atol=atol)
+    results = benchmark(models, pairs)
+
+    reference_scores, reference_latency = results["pytorch-fp32"]
+    print(f"Scored {len(pairs)} pairs")
+    for label, (scores, latency) in results.items():
+        agreement = ranking_agreement(reference_scores, scores, k=10)
+        print(
+            f"{label:<14} latency={latency:8.1f} ms  "
+            f"speedup={reference_latency / latency:5.2f}x  "
+            f"spearman={agreement['spearman']:.4f}  "
+            f"top10_overlap={agreement['top_k_overlap']:.2f}  "
+            f"same_top1={agreement['same_top_1']}"
+        )
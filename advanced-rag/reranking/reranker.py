@@ -0,0 +1,288 @@
+# reranker.py
+import hashlib
+import math
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+
+def text_hash(text):
+    """
+    Computes a stable hash for a piece of text.
+
+    Args:
+    text (str): The text to hash.
+
+    Returns:
+    str: The hex SHA-256 digest of the UTF-8 encoded text.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ScoreCache:
+    """
+    Persistent cache of cross-encoder scores stored in a SQLite file.
+
+    Scores are keyed by (model name, query hash, document hash), so the same
+    (query, document) pair is only scored once per model across runs.
+    """
+
+    def __init__(self, path):
+        """
+        Opens (or creates) the cache database.
+
+        Args:
+        path (str): Path to the SQLite file. Use ":memory:" for a non-persistent cache.
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "model TEXT NOT NULL, query_hash TEXT NOT NULL, doc_hash TEXT NOT NULL, "
+            "score REAL NOT NULL, PRIMARY KEY (model, query_hash, doc_hash))"
+        )
+        self.connection.commit()
+
+    def get_many(self, model, keys):
+        """
+        Looks up cached scores for a list of (query hash, document hash) keys.
+
+        Args:
+        model (str): The model name the scores were computed with.
+        keys (list): List of (query_hash, doc_hash) tuples.
+
+        Returns:
+        dict: Mapping of (query_hash, doc_hash) to score for the keys found.
+        """
+        found = {}
+        query_hashes = {query_hash for query_hash, _ in keys}
+        for query_hash in query_hashes:
+            rows = self.connection.execute(
+                "SELECT doc_hash, score FROM scores WHERE model = ? AND query_hash = ?",
+                (model, query_hash),
+            )
+            for doc_hash, score in rows:
+                found[(query_hash, doc_hash)] = score
+        return {key: found[key] for key in keys if key in found}
+
+    def put_many(self, model, items):
+        """
+        Stores scores in the cache.
+
+        Args:
+        model (str): The model name the scores were computed with.
+        items (list): List of ((query_hash, doc_hash), score) tuples.
+        """
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO scores (model, query_hash, doc_hash, score) "
+            "VALUES (?, ?, ?, ?)",
+            [(model, query_hash, doc_hash, float(score)) for (query_hash, doc_hash), score in items],
+        )
+        self.connection.commit()
+
+    def close(self):
+        """Closes the underlying database connection."""
+        self.connection.close()
+
+
+def dynamic_batch_size(num_pairs, min_batch_size=8, max_batch_size=128, num_workers=None):
+    """
+    Picks a batch size that spreads the pairs evenly over the available CPU cores.
+
+    Small workloads use small batches so every core gets work; large workloads
+    use bigger batches to amortize per-batch overhead, capped at max_batch_size.
+
+    Args:
+    num_pairs (int): The number of pairs that need scoring.
+    min_batch_size (int): The smallest batch size to use.
+    max_batch_size (int): The largest batch size to use.
+    num_workers (int): Number of CPU cores to target. Defaults to os.cpu_count().
+
+    Returns:
+    int: The batch size to pass to the cross-encoder.
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    per_worker = math.ceil(num_pairs / num_workers) if num_pairs else min_batch_size
+    return max(min_batch_size, min(max_batch_size, per_worker))
+
+
+class CachedReranker:
+    """
+    Cross-encoder reranker with a persistent score cache and dynamic batching.
+
+    Wraps any model exposing predict(pairs, batch_size=...) such as
+    sentence_transformers.CrossEncoder.
+    """
+
+    def __init__(self, cross_encoder, model_name, cache_path=":memory:",
+                 min_batch_size=8, max_batch_size=128):
+        """
+        Args:
+        cross_encoder: The model used to score (query, document) pairs.
+        model_name (str): Name used in the cache key, e.g. "cross-encoder/ms-marco-MiniLM-L-6-v2".
+        cache_path (str): Path to the SQLite score cache.
+        min_batch_size (int): Lower bound for the dynamic batch size.
+        max_batch_size (int): Upper bound for the dynamic batch size.
+        """
+        self.cross_encoder = cross_encoder
+        self.model_name = model_name
+        self.cache = ScoreCache(cache_path)
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.hits = 0
+        self.misses = 0
+
+    def score(self, query, documents, use_cache=True):
+        """
+        Scores each document against the query, reusing cached scores when possible.
+
+        Args:
+        query (str): The query text.
+        documents (list): The candidate documents.
+        use_cache (bool): Whether to read and write the score cache.
+
+        Returns:
+        numpy.ndarray: One score per document, in input order.
+        """
+        scores = np.empty(len(documents), dtype=np.float32)
+        if not documents:
+            return scores
+
+        query_hash = text_hash(query)
+        keys = [(query_hash, text_hash(doc)) for doc in documents]
+        cached = self.cache.get_many(self.model_name, keys) if use_cache else {}
+
+        missing = []
+        for i, key in enumerate(keys):
+            if key in cached:
+                scores[i] = cached[key]
+            else:
+                missing.append(i)
+        self.hits += len(documents) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            pairs = [[query, documents[i]] for i in missing]
+            batch_size = dynamic_batch_size(
+                len(pairs), self.min_batch_size, self.max_batch_size
+            )
+            new_scores = self.cross_encoder.predict(pairs, batch_size=batch_size)
+            scores[missing] = new_scores
+            if use_cache:
+                self.cache.put_many(
+                    self.model_name,
+                    [(keys[i], score) for i, score in zip(missing, new_scores)],
+                )
+        return scores
+
+    def top_k(self, query, documents, k=5, use_cache=True):
+        """
+        Returns the k best documents for the query without sorting the full score array.
+
+        Args:
+        query (str): The query text.
+        documents (list): The candidate documents.
+        k (int): The number of documents to return.
+        use_cache (bool): Whether to read and write the score cache.
+
+        Returns:
+        list: (index, document, score) tuples sorted by descending score.
+        """
+        scores = self.score(query, documents, use_cache=use_cache)
+        k = min(k, len(documents))
+        if k == 0:
+            return []
+        # argpartition selects the top k in linear time; only those k get sorted
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        ordered = candidates[np.argsort(-scores[candidates])]
+        return [(int(i), documents[i], float(scores[i])) for i in ordered]
+
+
+def dedupe_with_distances(documents_per_query, distances_per_query):
+    """
+    Deduplicates documents retrieved by several queries, keeping each document's best distance.
+
+    Args:
+    documents_per_query (list): Chroma "documents" result, one list per query.
+    distances_per_query (list): Chroma "distances" result, one list per query.
+
+    Returns:
+    tuple: (documents, distances) with unique documents in first-seen order.
+    """
+    best = {}
+    for documents, distances in zip(documents_per_query, distances_per_query):
+        for document, distance in zip(documents, distances):
+            if document not in best or distance < best[document]:
+                best[document] = distance
+    return list(best), np.array(list(best.values()), dtype=np.float32)
+
+
+def cascade_rerank(reranker, query, documents, distances, top_m=10, k=5, use_cache=True):
+    """
+    Two-stage reranking: filters by bi-encoder distance, then cross-encodes the survivors.
+
+    The first stage reuses the distances Chroma already returned, so it costs
+    nothing; only the top_m closest candidates reach the cross-encoder.
+
+    Args:
+    reranker (CachedReranker): The second-stage cross-encoder reranker.
+    query (str): The query text.
+    documents (list): The deduplicated candidate documents.
+    distances (numpy.ndarray): The bi-encoder distance of each candidate (lower is better).
+    top_m (int): How many candidates to pass to the cross-encoder.
+    k (int): The number of documents to return.
+    use_cache (bool): Whether the cross-encoder may use its score cache.
+
+    Returns:
+    list: (index, document, score) tuples sorted by descending cross-encoder score,
+    where index refers to the position in documents.
+    """
+    distances = np.asarray(distances)
+    top_m = min(top_m, len(documents))
+    if top_m == 0:
+        return []
+    survivors = np.argpartition(distances, top_m - 1)[:top_m]
+    ranked = reranker.top_k(
+        query, [documents[i] for i in survivors], k=k, use_cache=use_cache
+    )
+    return [(int(survivors[i]), document, score) for i, document, score in ranked]
+
+
+def cascade_report(reranker, query, documents, distances, m_values, k=5):
+    """
+    Measures recall and latency of cascade reranking for several first-stage cut-offs.
+
+    Recall is the fraction of the full cross-encoder top k that the cascade
+    also returns. The score cache is bypassed so latencies reflect real scoring.
+
+    Args:
+    reranker (CachedReranker): The second-stage cross-encoder reranker.
+    query (str): The query text.
+    documents (list): The deduplicated candidate documents.
+    distances (numpy.ndarray): The bi-encoder distance of each candidate.
+    m_values (list): The first-stage cut-offs to evaluate.
+    k (int): The number of documents returned per ranking.
+
+    Returns:
+    list: One dict per cut-off with keys "top_m", "recall" and "latency_ms";
+    the first entry is the full rerank over every candidate.
+    """
+    start = time.perf_counter()
+    full = reranker.top_k(query, documents, k=k, use_cache=False)
+    full_latency = (time.perf_counter() - start) * 1000
+    reference = {index for index, _, _ in full}
+
+    report = [{"top_m": len(documents), "recall": 1.0, "latency_ms": full_latency}]
+    for top_m in m_values:
+        start = time.perf_counter()
+        ranked = cascade_rerank(
+            reranker, query, documents, distances, top_m=top_m, k=k, use_cache=False
+        )
+        latency = (time.perf_counter() - start) * 1000
+        found = {index for index, _, _ in ranked}
+        recall = len(found & reference) / len(reference) if reference else 1.0
+        report.append({"top_m": top_m, "recall": recall, "latency_ms": latency})
+    return report
@@ -1,4 +1,4 @@
-from helper_utils import word_wrap, load_chroma
+from helper_utils import SemanticAnswerCache, word_wrap, load_chroma
 from pypdf import PdfReader
 import os
 from openai import OpenAI
@@ -74,11 +74,35 @@ for document in results["documents"][0]:
     print("")
 
 from sentence_transformers import CrossEncoder
+from reranker import CachedReranker, cascade_rerank, cascade_report, dedupe_with_distances
+from context_packer import count_prompt_tokens, pack_context
+
+cross_encoder_name = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+# "pytorch" runs the sentence-transformers model; "onnx" and "onnx-int8" run an
+# exported copy on onnxruntime (see onnx_reranker.py for the parity benchmark)
+reranker_backend = os.getenv("RERANKER_BACKEND", "pytorch")
+if reranker_backend.startswith("onnx"):
+    from onnx_reranker import OnnxCrossEncoder
+
+    cross_encoder = OnnxCrossEncoder.from_pretrained(
+        cross_encoder_name,
+        cache_dir=os.path.join(parent_dir, "cache", "onnx"),
+        quantize=reranker_backend == "onnx-int8",
+        num_threads=int(os.getenv("RERANKER_THREADS", "0")) or None,
+    )
+else:
+    cross_encoder = CrossEncoder(cross_encoder_name)
+
+# Scores are cached on disk by (model, query hash, doc hash), so repeated runs
+# and overlapping expanded queries never score the same pair twice
+reranker = CachedReranker(
+    cross_encoder,
+    model_name=f"{cross_encoder_name}:{reranker_backend}",
+    cache_path=os.path.join(parent_dir, "cache", "rerank_scores.sqlite"),
+)
 
-cross_encoder = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
-
-pairs = [[query, doc] for doc in retrieved_documents]
-scores = cross_encoder.predict(pairs)
+scores = reranker.score(query, retrieved_documents)
 
 print("Scores:")
 for score in scores:
@@ -105,37 +129,36 @@ queries = [original_query] + generated_queries
 
 
 results = chroma_collection.query(
-    query_texts=queries, n_results=10, include=["documents", "embeddings"]
+    query_texts=queries, n_results=10, include=["documents", "embeddings", "distances"]
 )
 retrieved_documents = results["documents"]
 
-# Deduplicate the retrieved documents
-unique_documents = set()
-for documents in retrieved_documents:
-    for document in documents:
-        unique_documents.add(document)
-
-unique_documents = list(unique_documents)
-
-pairs = []
-for doc in unique_documents:
-    pairs.append([original_query, doc])
+# Deduplicate the retrieved documents, keeping the best bi-encoder distance of each
+unique_documents, unique_distances = dedupe_with_distances(
+    retrieved_documents, results["distances"]
+)
 
-scores = cross_encoder.predict(pairs)
+# Cascade: only the CASCADE_TOP_M closest candidates by bi-encoder distance
+# are sent to the cross-encoder; the rest are dropped without being scored
+CASCADE_TOP_M = 15
 
-print("Scores:")
-for score in scores:
-    print(score)
+# Fill the context in rerank order up to a fixed token budget, so the prompt
+# size (and the answer latency and cost) stays bounded
+CONTEXT_TOKEN_BUDGET = 1500
 
-print("New Ordering:")
-for o in np.argsort(scores)[::-1]:
-    print(o)
-# ====
-top_indices = np.argsort(scores)[::-1][:5]
-top_documents = [unique_documents[i] for i in top_indices]
 
-# Concatenate the top documents into a single context
-context = "\n\n".join(top_documents)
+# Tuning CASCADE_TOP_M: CASCADE_REPORT=1 compares recall and latency of several
+# cut-offs against a full rerank. Every row rescores with the cache bypassed, so
+# it is off by default and runs once, never as part of answering.
+if os.getenv("CASCADE_REPORT") == "1":
+    print("Cascade recall vs latency (cache bypassed):")
+    for row in cascade_report(
+        reranker, original_query, unique_documents, unique_distances, m_values=[5, 10, 15, 20]
+    ):
+        print(
+            f"top_m={row['top_m']:>3}  recall@5={row['recall']:.2f}  "
+            f"latency={row['latency_ms']:.1f} ms"
+        )
 
 
 # Generate the final answer using the OpenAI model
@@ -157,6 +180,8 @@ def generate_multi_query(query, context, model="gpt-3.5-turbo"):
         },
     ]
 
+    print(f"Prompt tokens: {count_prompt_tokens(messages, model)}")
+
     response = client.chat.completions.create(
         model=model,
         messages=messages,
@@ -166,6 +191,53 @@ def generate_multi_query(query, context, model="gpt-3.5-turbo"):
     return content
 
 
-res = generate_multi_query(query=original_query, context=context)
-print("Final Answer:")
+def rerank_and_answer():
+    """
+    Reranks the deduplicated candidates and asks the LLM for the final answer.
+
+    Returns:
+    list: The answer lines.
+    """
+    # Only the best few are needed for the answer, so select them without sorting everything
+    top_ranked = cascade_rerank(
+        reranker,
+        original_query,
+        unique_documents,
+        unique_distances,
+        top_m=CASCADE_TOP_M,
+        k=8,
+    )
+
+    print("New Ordering:")
+    for index, _, score in top_ranked:
+        print(index, score)
+    print(f"Score cache hits: {reranker.hits}, misses: {reranker.misses}")
+    # ====
+    top_documents = [document for _, document, _ in top_ranked]
+
+    packed = pack_context(top_documents, token_budget=CONTEXT_TOKEN_BUDGET)
+    print(
+        f"Context: {len(packed.indices)} chunks, {packed.total_tokens}/{CONTEXT_TOKEN_BUDGET} tokens "
+        f"(per chunk: {packed.token_counts}, dropped: {packed.dropped})"
+    )
+    return generate_multi_query(query=original_query, context=packed.text)
+
+
+# Paraphrases of an earlier question that retrieve the same chunks reuse its
+# answer, skipping both the reranking and the LLM call; 10% of hits are audited
+semantic_cache = SemanticAnswerCache(
+    path=os.path.join(parent_dir, "cache", "semantic_answers.json"),
+    threshold=0.92,
+    audit_rate=0.1,
+    audit_log_path=os.path.join(parent_dir, "cache", "semantic_audit.jsonl"),
+    answer_embedding_function=embedding_function,
+)
+query_embedding = embedding_function([original_query])[0]
+retrieved_ids = {doc_id for ids in results["ids"] for doc_id in ids}
+
+res, from_cache = semantic_cache.get_or_generate(
+    original_query, query_embedding, retrieved_ids, rerank_and_answer
+)
+print("Final Answer:" + (" (semantic cache hit)" if from_cache else ""))
 print(res)
+print(semantic_cache.report())
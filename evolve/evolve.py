@@ -155,13 +155,35 @@ else:
 # SECCIÓN 5: VISUALIZACIÓN DE EMBEDDINGS EN 2D (C)
 # =====================
 print("\n=== VISUALIZACIÓN DE EMBEDDINGS EN 2D (PCA) ===")
-pca = PCA(n_components=2)
-embeddings_2d = pca.fit_transform(np.array(embeddings))
+# A partir de este número de puntos se dibuja un mapa de densidad en lugar de puntos etiquetados
+DENSITY_THRESHOLD = 100_000
+# Tamaño máximo de la muestra usada para ajustar el PCA en colecciones grandes
+PCA_SAMPLE_SIZE = 50_000
+
+embeddings_array = np.asarray(embeddings, dtype=np.float32)
+# PCA aleatorizado: mismo resultado práctico, pero escala a millones de vectores
+pca = PCA(n_components=2, svd_solver="randomized", random_state=0)
+if len(embeddings_array) > PCA_SAMPLE_SIZE:
+    # Ajustamos sobre una muestra aleatoria y proyectamos todos los puntos
+    rng = np.random.default_rng(0)
+    pca.fit(embeddings_array[rng.choice(len(embeddings_array), PCA_SAMPLE_SIZE, replace=False)])
+else:
+    pca.fit(embeddings_array)
+embeddings_2d = pca.transform(embeddings_array)
+query_2d = pca.transform(np.asarray([query_emb], dtype=np.float32))
 
 plt.figure(figsize=(8, 6))
-for i, (x, y) in enumerate(embeddings_2d):
-    plt.scatter(x, y, label=programmers[i]["name"])
-    plt.text(x+0.01, y+0.01, programmers[i]["name"])
+if len(embeddings_2d) > DENSITY_THRESHOLD:
+    # Histograma 2D: una sola imagen en vez de un punto por vector
+    from matplotlib.colors import LogNorm
+    plt.hist2d(embeddings_2d[:, 0], embeddings_2d[:, 1], bins=512, cmap="Greys", norm=LogNorm())
+    plt.colorbar(label="Vectores por celda")
+else:
+    for i, (x, y) in enumerate(embeddings_2d):
+        plt.scatter(x, y, label=programmers[i]["name"])
+        plt.text(x+0.01, y+0.01, programmers[i]["name"])
+# La consulta se superpone en ambos modos
+plt.scatter(query_2d[:, 0], query_2d[:, 1], s=150, marker="X", color="r", label="Consulta")
 plt.title("Embeddings de programadores (PCA 2D)")
 plt.xlabel("PC1")
 plt.ylabel("PC2")
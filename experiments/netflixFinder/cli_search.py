@@ -14,7 +14,7 @@ from pathlib import Path
 # Add the services directory to the path to import NetflixFinderService
 sys.path.append(str(Path(__file__).parent / "services"))
 
-from services.netflixFinder import NetflixFinderService
+from services.netflixFinder import SORT_FIELDS, NetflixFinderService
 
 # Configure logging
 logging.basicConfig(
@@ -23,6 +23,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Fields shown for each result
+DISPLAY_FIELDS = [
+    "title",
+    "original_title",
+    "release_date",
+    "vote_average",
+    "vote_count",
+    "popularity",
+    "genres",
+    "original_language",
+    "overview",
+    "poster_url",
+]
+
 class NetflixFinderCLI:
     """
     Command Line Interface for NetflixFinder service.
@@ -134,10 +148,13 @@ class NetflixFinderCLI:
         print("❌ Invalid date format. Please use YYYY-MM-DD format (e.g., 2020-01-15)")
         return self.get_optional_date(prompt)
     
-    def collect_search_filters(self) -> dict:
+    def collect_search_filters(self, browse: bool = False) -> dict:
         """
         Collect search filters from user through interactive prompts.
         
+        Args:
+            browse: Ask for a sort order instead of result diversification
+        
         Returns:
             Dictionary with search parameters
         """
@@ -190,18 +207,31 @@ class NetflixFinderCLI:
             print("⚠️  Invalid number. Using 5 as default.")
             filters['n_results'] = 5
         
+        if browse:
+            filters['sort_by'] = self.get_user_input(f"Sort by ({'/'.join(SORT_FIELDS)})", "popularity")
+            if filters['sort_by'] not in SORT_FIELDS:
+                print("⚠️  Invalid sort field. Using 'popularity' as default.")
+                filters['sort_by'] = "popularity"
+            filters['mmr_lambda'] = None
+            return filters
+        
+        filters['mmr_lambda'] = self.get_optional_float("Diversify results (0 = most diverse, 1 = most relevant)")
+        if filters['mmr_lambda'] is not None and not 0.0 <= filters['mmr_lambda'] <= 1.0:
+            print("⚠️  Diversity must be between 0 and 1. Not diversifying.")
+            filters['mmr_lambda'] = None
+        
         return filters
     
-    def display_search_results(self, results: dict, query: str) -> None:
+    def display_search_results(self, results: dict, title: str) -> None:
         """
         Display search results in a formatted way.
         
         Args:
-            results: Search results from NetflixFinder service
-            query: Original search query
+            results: Search or browse results from NetflixFinder service
+            title: Heading, e.g. the original search query
         """
         print("\n" + "="*60)
-        print(f"🎬 SEARCH RESULTS FOR: '{query}'")
+        print(f"🎬 {title}")
         print("="*60)
         
         if not results['ids']:
@@ -210,13 +240,19 @@ class NetflixFinderCLI:
         
         print(f"✅ Found {len(results['ids'])} results\n")
         
+        # Browse results are not ranked by similarity and have no distances
+        distances = results['distances'] or [None] * len(results['ids'])
         for i, (doc_id, doc, metadata, distance) in enumerate(zip(
             results['ids'], 
             results['documents'], 
             results['metadatas'], 
-            results['distances']
+            distances
         ), 1):
-            print(f"🎯 RESULT {i} (Similarity: {(1-distance)*100:.1f}%)")
+            metadata = metadata or {}  # the record may have been deleted since the search
+            if distance is None:
+                print(f"🎯 RESULT {i}")
+            else:
+                print(f"🎯 RESULT {i} (Similarity: {(1-distance)*100:.1f}%)")
             print(f"   ID: {doc_id}")
             print(f"   Title: {metadata.get('title', 'N/A')}")
             print(f"   Original Title: {metadata.get('original_title', 'N/A')}")
@@ -230,6 +266,20 @@ class NetflixFinderCLI:
                 print(f"   Poster: {metadata.get('poster_url', 'N/A')}")
             print()
     
+    def display_facets(self, facets: dict) -> None:
+        """
+        Display facet counts over all content matching the filters.
+        
+        Args:
+            facets: "facets" entry of the search results
+        """
+        print(f"📊 {facets['total']} titles match your filters")
+        print(f"   Genres: {dict(list(facets['genres'].items())[:8])}")
+        recent_years = dict(list(facets['years'].items())[-10:])
+        print(f"   Years (latest 10): {recent_years}")
+        ratings = {bucket: count for bucket, count in facets['rating_histogram'].items() if count}
+        print(f"   Ratings: {ratings}")
+    
     def show_collection_stats(self) -> None:
         """Display collection statistics."""
         try:
@@ -256,36 +306,48 @@ class NetflixFinderCLI:
             try:
                 # Get search query
                 print("\n" + "="*60)
-                query = self.get_user_input("What do you want to see ?")
-                
-                if not query:
-                    print("❌ Please enter a search query.")
-                    continue
+                query = self.get_user_input("What do you want to see ? (Enter to browse by filters only)")
                 
                 # Collect filters
-                filters = self.collect_search_filters()
-                
-                # Perform search
-                print(f"\n🔍 Searching for: '{query}'")
-                print("Please wait...")
+                filters = self.collect_search_filters(browse=not query)
+                search_filters = {
+                    key: filters[key] for key in (
+                        'release_date_start', 'release_date_end', 'vote_average_min', 'vote_average_max',
+                        'vote_count_min', 'vote_count_max', 'popularity_min', 'popularity_max',
+                        'genres', 'content_type'
+                    )
+                }
                 
-                results = self.finder.search_content(
-                    query=query,
-                    n_results=filters['n_results'],
-                    release_date_start=filters['release_date_start'],
-                    release_date_end=filters['release_date_end'],
-                    vote_average_min=filters['vote_average_min'],
-                    vote_average_max=filters['vote_average_max'],
-                    vote_count_min=filters['vote_count_min'],
-                    vote_count_max=filters['vote_count_max'],
-                    popularity_min=filters['popularity_min'],
-                    popularity_max=filters['popularity_max'],
-                    genres=filters['genres'],
-                    content_type=filters['content_type']
-                )
+                if query:
+                    # Perform search
+                    print(f"\n🔍 Searching for: '{query}'")
+                    print("Please wait...")
+                    
+                    results = self.finder.search_content(
+                        query=query,
+                        n_results=filters['n_results'],
+                        lazy=True,
+                        facets=True,
+                        mmr_lambda=filters['mmr_lambda'],
+                        **search_filters
+                    )
+                    title = f"SEARCH RESULTS FOR: '{query}'"
+                else:
+                    # No text to embed: filter and sort the local metadata index
+                    results = self.finder.browse_content(
+                        n_results=filters['n_results'],
+                        sort_by=filters['sort_by'],
+                        lazy=True,
+                        facets=True,
+                        **search_filters
+                    )
+                    title = f"TOP TITLES BY {filters['sort_by'].upper()}"
+                # Rank first, then fetch only the displayed fields of the hits
+                results.update(self.finder.hydrate(results['ids'], fields=DISPLAY_FIELDS))
                 
                 # Display results
-                self.display_search_results(results, query)
+                self.display_search_results(results, title)
+                self.display_facets(results['facets'])
                 
                 # Ask if user wants to continue
                 print("\n" + "="*60)
@@ -0,0 +1,285 @@
+"""
+Exact facet counters for the "content" collection.
+
+Counts of genres, content types, languages, release years and vote_average
+buckets are updated on every upsert and delete and persisted as JSON next to
+the ChromaDB directory, so reading collection statistics never scans the
+collection. Upserts read the previous metadata of the affected IDs first, so
+updated rows are moved between buckets instead of being counted twice.
+
+Run this file with --rebuild to recount from the collection, e.g. after the
+collection was changed by a tool that does not maintain the counters.
+"""
+import json
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FACETS_FILE_NAME = "content_facets.json"
+# vote_average buckets: [0, 1), [1, 2), ... [9, 10]
+RATING_BUCKETS = 10
+FACETS = ("content_types", "genres", "languages", "years", "ratings")
+
+
+def facets_path_for(chroma_path: str | Path) -> Path:
+    """
+    Location of the facet file for a ChromaDB directory.
+
+    Args:
+        chroma_path: ChromaDB persist directory
+
+    Returns:
+        Path of the JSON file stored next to it
+    """
+    return Path(chroma_path).parent / FACETS_FILE_NAME
+
+
+def _release_year(value: Any) -> Optional[str]:
+    # Full metadata stores "YYYY-MM-DD", compact metadata a timestamp
+    if isinstance(value, (int, float)):
+        return str(datetime.fromtimestamp(value).year)
+    if isinstance(value, str) and len(value) >= 4 and value[:4].isdigit():
+        return value[:4]
+    return None
+
+
+def _rating_bucket(value: Any) -> Optional[str]:
+    try:
+        rating = float(value)
+    except (TypeError, ValueError):
+        return None
+    bucket = min(max(int(rating), 0), RATING_BUCKETS - 1)
+    return f"{bucket}-{bucket + 1}"
+
+
+class FacetStats:
+    """
+    Facet counters with JSON persistence.
+
+    Attributes:
+        path: JSON file location
+        total: Number of counted records
+        counters: Facet name to Counter of values
+    """
+
+    def __init__(self, path: str | Path):
+        """
+        Args:
+            path: JSON file location (see facets_path_for)
+        """
+        self.path = Path(path)
+        self.total = 0
+        self.counters: Dict[str, Counter] = {facet: Counter() for facet in FACETS}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str | Path) -> "FacetStats":
+        """
+        Load counters from disk, or start empty if the file does not exist.
+
+        Args:
+            path: JSON file location
+
+        Returns:
+            FacetStats instance
+        """
+        stats = cls(path)
+        if stats.path.exists():
+            with open(stats.path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+            stats.total = state.get("total", 0)
+            for facet in FACETS:
+                stats.counters[facet] = Counter(state.get(facet, {}))
+        return stats
+
+    def exists(self) -> bool:
+        """Whether the counters have been persisted before."""
+        return self.path.exists()
+
+    @staticmethod
+    def _facet_values(metadata: Dict[str, Any]) -> Dict[str, List[str]]:
+        """Facet values contributed by one record."""
+        genres = metadata.get("genres", "")
+        if isinstance(genres, str):
+            genres = [genre for genre in genres.split(", ") if genre]
+        values = {
+            "content_types": [metadata.get("content_type", "unknown")],
+            "genres": list(genres),
+            "languages": [metadata.get("original_language", "unknown")],
+            "years": [_release_year(metadata.get("release_date"))],
+            "ratings": [_rating_bucket(metadata.get("vote_average"))],
+        }
+        return {facet: [value for value in facet_values if value is not None] for facet, facet_values in values.items()}
+
+    def apply(self,
+              added: Iterable[Optional[Dict[str, Any]]] = (),
+              removed: Iterable[Optional[Dict[str, Any]]] = ()) -> None:
+        """
+        Update the counters for written and deleted records.
+
+        Args:
+            added: Metadata of records now stored
+            removed: Previous metadata of records replaced or deleted
+        """
+        with self._lock:
+            for metadata in removed:
+                if not metadata:
+                    continue
+                self.total -= 1
+                for facet, values in self._facet_values(metadata).items():
+                    self.counters[facet].subtract(values)
+            for metadata in added:
+                if not metadata:
+                    continue
+                self.total += 1
+                for facet, values in self._facet_values(metadata).items():
+                    self.counters[facet].update(values)
+            for counter in self.counters.values():
+                for value in [value for value, count in counter.items() if count <= 0]:
+                    del counter[value]
+
+    def save(self) -> None:
+        """Persist the counters atomically."""
+        with self._lock:
+            state = {"total": self.total, "updated_at": datetime.now().isoformat(timespec="seconds")}
+            state.update((facet, dict(counter)) for facet, counter in self.counters.items())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(state, file)
+        tmp_path.replace(self.path)
+
+    def rebuild(self, collection: Any, page_size: int = 5000) -> None:
+        """
+        Recount every record of a collection and save the result.
+
+        Args:
+            collection: ChromaDB collection
+            page_size: Records read per get call
+        """
+        with self._lock:
+            self.total = 0
+            self.counters = {facet: Counter() for facet in FACETS}
+        offset = 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            metadatas = page.get("metadatas") or []
+            if not metadatas:
+                break
+            self.apply(added=metadatas)
+            offset += len(metadatas)
+        self.save()
+        logger.info(f"Rebuilt facet counters from {self.total} records")
+
+    def to_stats(self, top_n: int = 10) -> Dict[str, Any]:
+        """
+        Format the counters for get_collection_stats.
+
+        Args:
+            top_n: Number of genres reported in top_genres
+
+        Returns:
+            Dictionary of facet counts
+        """
+        with self._lock:
+            return {
+                "counted_documents": self.total,
+                "content_types": dict(self.counters["content_types"]),
+                "top_genres": dict(self.counters["genres"].most_common(top_n)),
+                "genres": dict(self.counters["genres"]),
+                "languages": dict(self.counters["languages"]),
+                "release_years": dict(sorted(self.counters["years"].items())),
+                "rating_histogram": {
+                    f"{bucket}-{bucket + 1}": self.counters["ratings"].get(f"{bucket}-{bucket + 1}", 0)
+                    for bucket in range(RATING_BUCKETS)
+                },
+            }
+
+
+def upsert_with_facets(collection: Any,
+                       facets: Optional[FacetStats],
+                       ids: List[str],
+                       documents: List[str],
+                       metadatas: List[Dict[str, Any]],
+                       embeddings: Optional[List[Any]] = None) -> None:
+    """
+    Upsert records and move their facet counts from the old to the new metadata.
+
+    Args:
+        collection: ChromaDB collection
+        facets: Counters to update, or None to just upsert
+        ids: Record IDs
+        documents: Record documents
+        metadatas: Record metadatas
+        embeddings: Precomputed embeddings (computed by the collection if None)
+    """
+    previous = []
+    if facets is not None:
+        previous = collection.get(ids=ids, include=["metadatas"]).get("metadatas") or []
+    kwargs = {"embeddings": embeddings} if embeddings is not None else {}
+    collection.upsert(ids=ids, documents=documents, metadatas=metadatas, **kwargs)
+    if facets is not None:
+        facets.apply(added=metadatas, removed=previous)
+        facets.save()
+
+
+def update_metadata_with_facets(collection: Any,
+                                facets: Optional[FacetStats],
+                                ids: List[str],
+                                metadatas: List[Dict[str, Any]]) -> None:
+    """
+    Update only the metadata of existing records, keeping documents and embeddings.
+
+    Args:
+        collection: ChromaDB collection
+        facets: Counters to update, or None to just update
+        ids: Record IDs
+        metadatas: New record metadatas
+    """
+    previous: Dict[str, Dict[str, Any]] = {}
+    if facets is not None:
+        stored = collection.get(ids=ids, include=["metadatas"])
+        previous = dict(zip(stored.get("ids") or [], stored.get("metadatas") or []))
+    collection.update(ids=ids, metadatas=metadatas)
+    if facets is not None:
+        # ChromaDB merges updated metadata into the stored one
+        merged = [{**(previous.get(record_id) or {}), **metadata} for record_id, metadata in zip(ids, metadatas)]
+        facets.apply(added=merged, removed=previous.values())
+        facets.save()
+
+
+def delete_with_facets(collection: Any, facets: Optional[FacetStats], ids: List[str]) -> None:
+    """
+    Delete records and remove them from the facet counts.
+
+    Args:
+        collection: ChromaDB collection
+        facets: Counters to update, or None to just delete
+        ids: Record IDs
+    """
+    previous = []
+    if facets is not None:
+        previous = collection.get(ids=ids, include=["metadatas"]).get("metadatas") or []
+    collection.delete(ids=ids)
+    if facets is not None:
+        facets.apply(removed=previous)
+        facets.save()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show or rebuild the content facet counters")
+    parser.add_argument("--rebuild", action="store_true", help="recount from the ChromaDB collection")
+    args = parser.parse_args()
+
+    from load_data_to_chroma import collection, facet_stats
+
+    if args.rebuild or not facet_stats.exists():
+        facet_stats.rebuild(collection)
+    print(json.dumps(facet_stats.to_stats(), indent=2))
@@ -0,0 +1,317 @@
+"""
+Three-stage ingest pipeline: reader → embedding workers → ChromaDB writer.
+
+The reader thread turns input batches into upsert payloads, a pool of
+embedding workers calls the embedding API, and a single writer upserts the
+precomputed embeddings. Stages are connected by bounded queues, so a slow
+stage applies backpressure instead of letting work pile up in memory, and
+parsing, embedding requests and Chroma writes overlap.
+
+Each stage records how long it was busy, starved for input and blocked on
+output, which shows where the bottleneck is.
+"""
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from facet_stats import FacetStats, upsert_with_facets
+from movie_batch import MovieBatch
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stream on a queue
+_DONE = object()
+# How often blocked queue operations check whether another stage failed
+_POLL_SECONDS = 0.1
+
+Payload = Tuple[List[str], List[str], List[Dict[str, Any]]]
+
+
+class PipelineAborted(Exception):
+    """Raised inside a stage when another stage has failed."""
+
+
+@dataclass
+class StageStats:
+    """
+    Time accounting for one pipeline stage.
+
+    Attributes:
+        name: Stage name
+        workers: Number of threads running the stage
+        items: Chunks processed
+        busy: Seconds spent doing work, summed over threads
+        waiting_input: Seconds spent waiting for the upstream queue
+        blocked_output: Seconds spent waiting for room in the downstream queue
+    """
+    name: str
+    workers: int = 1
+    items: int = 0
+    busy: float = 0.0
+    waiting_input: float = 0.0
+    blocked_output: float = 0.0
+
+    def utilization(self, wall_time: float) -> float:
+        """
+        Fraction of the available thread time spent doing work.
+
+        Args:
+            wall_time: Duration of the whole pipeline run
+
+        Returns:
+            Busy time divided by wall_time * workers
+        """
+        capacity = wall_time * self.workers
+        return self.busy / capacity if capacity else 0.0
+
+    def summary(self, wall_time: float) -> str:
+        """
+        Format the stage utilization as a log line.
+
+        Args:
+            wall_time: Duration of the whole pipeline run
+
+        Returns:
+            Human readable summary
+        """
+        capacity = wall_time * self.workers or 1.0
+        return (f"{self.name:<8} x{self.workers}: busy {self.utilization(wall_time):6.1%}, "
+                f"starved {self.waiting_input / capacity:6.1%}, "
+                f"blocked {self.blocked_output / capacity:6.1%}, {self.items} chunks")
+
+
+class IngestPipeline:
+    """
+    Pipelined upsert of MovieBatch chunks into a ChromaDB collection.
+    """
+
+    def __init__(self,
+                 collection: Any,
+                 embedding_function: Callable[[List[str]], List[Any]],
+                 build_payload: Callable[[MovieBatch], Payload],
+                 batch_size: int = 500,
+                 embed_workers: int = 4,
+                 queue_size: int = 8,
+                 facets: Optional[FacetStats] = None):
+        """
+        Args:
+            collection: ChromaDB collection to upsert into
+            embedding_function: Embeds a list of documents (e.g. the collection's OpenAI function)
+            build_payload: Turns a MovieBatch into (ids, documents, metadatas)
+            batch_size: Rows per chunk, i.e. per embedding request and upsert
+            embed_workers: Number of concurrent embedding threads
+            queue_size: Capacity of each queue between stages, in chunks
+            facets: Facet counters updated by the writer, if any
+        """
+        self.collection = collection
+        self.embedding_function = embedding_function
+        self.build_payload = build_payload
+        self.batch_size = batch_size
+        self.embed_workers = embed_workers
+        self.queue_size = queue_size
+        self.facets = facets
+        self.inserted = 0
+        self._failed = threading.Event()
+        self._errors: List[BaseException] = []
+
+    def _put(self, target: "queue.Queue", item: Any, stats: StageStats) -> None:
+        # Blocking put that gives up if another stage failed
+        started = time.perf_counter()
+        try:
+            while True:
+                if self._failed.is_set():
+                    raise PipelineAborted()
+                try:
+                    target.put(item, timeout=_POLL_SECONDS)
+                    return
+                except queue.Full:
+                    continue
+        finally:
+            stats.blocked_output += time.perf_counter() - started
+
+    def _get(self, source: "queue.Queue", stats: StageStats) -> Any:
+        # Blocking get that gives up if another stage failed
+        started = time.perf_counter()
+        try:
+            while True:
+                if self._failed.is_set():
+                    raise PipelineAborted()
+                try:
+                    return source.get(timeout=_POLL_SECONDS)
+                except queue.Empty:
+                    continue
+        finally:
+            stats.waiting_input += time.perf_counter() - started
+
+    def _fail(self, error: BaseException) -> None:
+        if not isinstance(error, PipelineAborted):
+            self._errors.append(error)
+        self._failed.set()
+
+    def _read(self, batches: Iterable[MovieBatch], skip_rows: int,
+              out_queue: "queue.Queue", stats: StageStats) -> None:
+        # Reader stage: slice input into chunks and build the upsert payloads
+        try:
+            row_offset = 0
+            sequence = 0
+            iterator = iter(batches)
+            while True:
+                started = time.perf_counter()
+                batch = next(iterator, None)
+                if batch is None:
+                    stats.busy += time.perf_counter() - started
+                    break
+                batch_start = max(0, skip_rows - row_offset)
+                row_offset += len(batch)
+                chunks = batch.slice(batch_start, len(batch)).iter_slices(self.batch_size) if batch_start < len(batch) else []
+                stats.busy += time.perf_counter() - started
+
+                for chunk in chunks:
+                    started = time.perf_counter()
+                    payload = self.build_payload(chunk)
+                    stats.busy += time.perf_counter() - started
+                    self._put(out_queue, (sequence, payload), stats)
+                    stats.items += 1
+                    sequence += 1
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            # One end marker per embedding worker
+            for _ in range(self.embed_workers):
+                try:
+                    self._put(out_queue, _DONE, stats)
+                except PipelineAborted:
+                    break
+
+    def _embed(self, in_queue: "queue.Queue", out_queue: "queue.Queue", stats: StageStats) -> None:
+        # Embedding stage: one API call per chunk
+        try:
+            while True:
+                item = self._get(in_queue, stats)
+                if item is _DONE:
+                    break
+                sequence, (ids, documents, metadatas) = item
+                started = time.perf_counter()
+                embeddings = self.embedding_function(documents)
+                stats.busy += time.perf_counter() - started
+                self._put(out_queue, (sequence, (ids, documents, metadatas, embeddings)), stats)
+                stats.items += 1
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            try:
+                self._put(out_queue, _DONE, stats)
+            except PipelineAborted:
+                pass
+
+    def _write(self, in_queue: "queue.Queue", stats: StageStats, checkpoint: Any,
+               committed: int, total_rows: Optional[int], started_at: float) -> None:
+        # Writer stage: upsert precomputed embeddings and advance the checkpoint
+        finished_workers = 0
+        next_sequence = 0
+        done_sizes: Dict[int, int] = {}
+        while finished_workers < self.embed_workers:
+            item = self._get(in_queue, stats)
+            if item is _DONE:
+                finished_workers += 1
+                continue
+            sequence, (ids, documents, metadatas, embeddings) = item
+            started = time.perf_counter()
+            upsert_with_facets(self.collection, self.facets, ids, documents, metadatas, embeddings)
+            self.inserted += len(ids)
+
+            # Chunks can finish out of order; the checkpoint only covers the contiguous prefix
+            done_sizes[sequence] = len(ids)
+            advanced = False
+            while next_sequence in done_sizes:
+                committed += done_sizes.pop(next_sequence)
+                next_sequence += 1
+                advanced = True
+            if advanced and checkpoint is not None:
+                checkpoint.save(committed, total_rows)
+            stats.busy += time.perf_counter() - started
+            stats.items += 1
+
+            elapsed = time.perf_counter() - started_at
+            rate = self.inserted / elapsed if elapsed else 0.0
+            progress = f"{committed}/{total_rows}" if total_rows else str(committed)
+            eta = f", ETA {(total_rows - committed) / rate:.0f}s" if total_rows and rate else ""
+            logger.info(f"Committed {progress} rows ({rate:.1f} rows/s overall{eta})")
+
+    def run(self,
+            batches: Iterable[MovieBatch],
+            checkpoint: Any = None,
+            total_rows: Optional[int] = None,
+            resume: bool = True) -> Dict[str, StageStats]:
+        """
+        Run the pipeline until the input is exhausted.
+
+        Args:
+            batches: Content rows in a stable order
+            checkpoint: Object with load()/save(committed, total)/clear(), e.g. IngestCheckpoint
+            total_rows: Total rows in the input, used for the ETA
+            resume: Whether to skip rows committed by a previous run
+
+        Returns:
+            Stage name to StageStats (also logged)
+
+        Raises:
+            Exception: The first error raised by any stage
+        """
+        committed = checkpoint.load() if checkpoint is not None and resume else 0
+        if committed:
+            logger.info(f"Resuming from checkpoint: {committed} rows already committed")
+
+        self._failed.clear()
+        self._errors = []
+        self.inserted = 0
+        stats = {
+            "reader": StageStats("reader"),
+            "embed": StageStats("embed", workers=self.embed_workers),
+            "writer": StageStats("writer"),
+        }
+        embed_stats = [StageStats("embed") for _ in range(self.embed_workers)]
+        to_embed: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        to_write: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+
+        started_at = time.perf_counter()
+        threads = [threading.Thread(target=self._read, args=(batches, committed, to_embed, stats["reader"]),
+                                    name="ingest-reader", daemon=True)]
+        threads += [
+            threading.Thread(target=self._embed, args=(to_embed, to_write, worker_stats),
+                             name=f"ingest-embed-{index}", daemon=True)
+            for index, worker_stats in enumerate(embed_stats)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            self._write(to_write, stats["writer"], checkpoint, committed, total_rows, started_at)
+        except BaseException as e:
+            self._fail(e)
+        for thread in threads:
+            thread.join()
+        wall_time = time.perf_counter() - started_at
+
+        # Per-thread counters are only merged after the threads stop, so no locking is needed
+        for worker_stats in embed_stats:
+            stats["embed"].items += worker_stats.items
+            stats["embed"].busy += worker_stats.busy
+            stats["embed"].waiting_input += worker_stats.waiting_input
+            stats["embed"].blocked_output += worker_stats.blocked_output
+
+        logger.info(f"Pipeline ran for {wall_time:.1f}s, inserted {self.inserted} rows")
+        for stage in stats.values():
+            logger.info(stage.summary(wall_time))
+        bottleneck = max(stats.values(), key=lambda stage: stage.utilization(wall_time))
+        logger.info(f"Bottleneck: {bottleneck.name}")
+
+        if self._errors:
+            logger.error(f"Pipeline failed: {self._errors[0]}")
+            raise self._errors[0]
+        if checkpoint is not None:
+            checkpoint.clear()
+        return stats
@@ -1,13 +1,28 @@
+import argparse
 import csv
+import hashlib
+import json
 import logging
 import os
+import time
+from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple
 
 import chromadb
 from chromadb.utils import embedding_functions
 from dotenv import load_dotenv
 
+from facet_stats import FacetStats, facets_path_for, upsert_with_facets
+from ingest_pipeline import IngestPipeline
+from movie_batch import MovieBatch, MovieBatchBuilder
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet input is optional, the loader falls back to CSV
+    pq = None
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -27,8 +42,19 @@ openai_ef = embedding_functions.OpenAIEmbeddingFunction(
     model_name="text-embedding-3-small"  # Specify embedding model to use
 )
 
+# Rows embedded and upserted per ChromaDB call
+INGEST_BATCH_SIZE = 500
+# Concurrent embedding requests in the ingest pipeline
+EMBED_WORKERS = 4
+# Progress of the last interrupted ingest, removed once a source is fully loaded
+CHECKPOINT_FILE = Path(__file__).parent / "ingest_checkpoint.json"
+# "full" copies every field into metadata; "compact" stores the overview once, in the document
+METADATA_SCHEMA = os.getenv("METADATA_SCHEMA", "full")
+
+CHROMA_PERSIST_PATH = "./db/chroma_persist"
+
 # Create persistent ChromaDB client that saves data to disk
-chroma_client = chromadb.PersistentClient(path="./db/chroma_persist")
+chroma_client = chromadb.PersistentClient(path=CHROMA_PERSIST_PATH)
 
 # Create or get existing collection called "content" with OpenAI embedding function
 collection = chroma_client.get_or_create_collection(
@@ -36,120 +62,418 @@ collection = chroma_client.get_or_create_collection(
     embedding_function=openai_ef,  # Specify to use OpenAI embedding function
 )
 
-def load_content_from_csv(csv_file_path: str) -> List[Dict[str, Any]]:
+# Exact facet counts kept next to the Chroma directory, read by get_collection_stats
+facet_stats = FacetStats.load(facets_path_for(CHROMA_PERSIST_PATH))
+
+def release_date_timestamp(release_date: str) -> Optional[int]:
     """
-    Load content data from CSV file and prepare for ChromaDB insertion.
+    Convert a YYYY-MM-DD release date to the timestamp used by the service filters.
     
     Args:
-        csv_file_path: Path to the CSV file containing content data
+        release_date: Release date string
         
     Returns:
-        List of dictionaries with content data prepared for ChromaDB
+        Seconds since the epoch (local midnight, as in NetflixFinderService), or None if unknown
+    """
+    try:
+        return int(datetime.strptime(release_date, "%Y-%m-%d").timestamp())
+    except (TypeError, ValueError):
+        return None
+
+def build_content_item(row: Dict[str, Any], schema: Optional[str] = None) -> Dict[str, Any]:
     """
-    content_data = []
+    Build the ChromaDB record (id, document, metadata) for one content row.
     
+    The "full" schema copies every field into the metadata. The "compact"
+    schema keeps the overview only in the document and stores just the
+    fields used for filtering and display, with release_date as an integer
+    timestamp so range filters work on it.
+    
+    Args:
+        row: Content fields by name, e.g. a CSV row or a MovieBatch row (see search_data.Movie)
+        schema: "full" or "compact" (defaults to METADATA_SCHEMA)
+        
+    Returns:
+        Dictionary with "id", "document" and "metadata" keys
+    """
+    schema = schema or METADATA_SCHEMA
+    
+    # Create document text with relevant searchable information
+    document_text = f"Title: {row['title']}\n"
+    document_text += f"Original Title: {row['original_title']}\n"
+    document_text += f"Overview: {row['overview']}\n"
+    document_text += f"Genres: {row['genres']}\n"
+    document_text += f"Language: {row['original_language']}\n"
+    document_text += f"Release Date: {row['release_date']}"
+    
+    if schema == "compact":
+        metadata = {
+            "title": row['title'],
+            "original_title": row['original_title'],
+            "vote_average": float(row['vote_average']),
+            "vote_count": int(row['vote_count']),
+            "popularity": float(row['popularity']),
+            "original_language": row['original_language'],
+            "genres": row['genres'],
+            "poster_url": row['poster_url'],
+            "content_type": "movie"
+        }
+        release_timestamp = release_date_timestamp(row['release_date'])
+        if release_timestamp is not None:
+            metadata["release_date"] = release_timestamp
+        
+        return {"id": str(row['id']), "document": document_text, "metadata": metadata}
+    
+    if schema != "full":
+        raise ValueError(f"Unknown metadata schema: {schema}. Expected 'full' or 'compact'")
+    
+    # Create metadata with all content information plus Netflix and type indicators
+    metadata = {
+        "id": str(row['id']),
+        "title": row['title'],
+        "original_title": row['original_title'],
+        "overview": row['overview'],
+        "release_date": row['release_date'],
+        "vote_average": float(row['vote_average']),
+        "vote_count": int(row['vote_count']),
+        "popularity": float(row['popularity']),
+        "original_language": row['original_language'],
+        "genres": row['genres'],
+        "poster_url": row['poster_url'],
+        "source": "netflix",  # Indicate data comes from Netflix
+        "content_type": "movie"  # Default to movie, can be updated for series
+    }
+    
+    return {
+        "id": str(row['id']),  # Simple ID - works for your case
+        "document": document_text,  # Searchable text content
+        "metadata": metadata  # All content information as metadata
+    }
+
+def build_content_payload(batch: MovieBatch, schema: Optional[str] = None) -> Tuple[List[str], List[str], List[Dict[str, Any]]]:
+    """
+    Build the upsert arguments for a batch of content rows.
+    
+    Args:
+        batch: Content rows to convert
+        schema: "full" or "compact" metadata (defaults to METADATA_SCHEMA)
+        
+    Returns:
+        Tuple of (ids, documents, metadatas)
+    """
+    ids, documents, metadatas = [], [], []
+    for row in batch:
+        item = build_content_item(row, schema)
+        ids.append(item["id"])
+        documents.append(item["document"])
+        metadatas.append(item["metadata"])
+    return ids, documents, metadatas
+
+def load_content_from_csv(csv_file_path: str) -> MovieBatch:
+    """
+    Load content data from CSV file into a columnar batch.
+    
+    Rows are appended to typed columns as they are read, so no per-row
+    dictionaries are kept.
+    
+    Args:
+        csv_file_path: Path to the CSV file containing content data
+        
+    Returns:
+        MovieBatch with the content rows (empty if the file cannot be read)
+    """
     try:
         with open(csv_file_path, 'r', encoding='utf-8') as file:
             # Create CSV reader with dictionary format
             reader = csv.DictReader(file)
-            
-            for row in reader:
-                # Create document text with relevant searchable information
-                document_text = f"Title: {row['title']}\n"
-                document_text += f"Original Title: {row['original_title']}\n"
-                document_text += f"Overview: {row['overview']}\n"
-                document_text += f"Genres: {row['genres']}\n"
-                document_text += f"Language: {row['original_language']}\n"
-                document_text += f"Release Date: {row['release_date']}"
-                
-                # Create metadata with all content information plus Netflix and type indicators
-                metadata = {
-                    "id": row['id'],
-                    "title": row['title'],
-                    "original_title": row['original_title'],
-                    "overview": row['overview'],
-                    "release_date": row['release_date'],
-                    "vote_average": float(row['vote_average']),
-                    "vote_count": int(row['vote_count']),
-                    "popularity": float(row['popularity']),
-                    "original_language": row['original_language'],
-                    "genres": row['genres'],
-                    "poster_url": row['poster_url'],
-                    "source": "netflix",  # Indicate data comes from Netflix
-                    "content_type": "movie"  # Default to movie, can be updated for series
-                }
-                
-                content_data.append({
-                    "id": row['id'],  # Simple ID - works for your case
-                    "document": document_text,  # Searchable text content
-                    "metadata": metadata  # All content information as metadata
-                })
+            return MovieBatch.from_rows(reader)
                 
     except FileNotFoundError:
         logger.error(f"CSV file not found: {csv_file_path}")
-        return []
     except Exception as e:
         logger.error(f"Error reading CSV file: {e}")
-        return []
     
-    return content_data
+    return MovieBatchBuilder().build()
 
-def insert_content_to_chroma(content_data: List[Dict[str, Any]]) -> None:
+def iter_content_from_csv(csv_file_path: str, batch_size: int = INGEST_BATCH_SIZE) -> Iterator[MovieBatch]:
     """
-    Insert content data into ChromaDB collection.
+    Stream content data from a CSV file in batches.
+    
+    Unlike load_content_from_csv, the file is not read up front, so the
+    first batches can be embedded while the rest is still being parsed.
     
     Args:
-        content_data: List of content data dictionaries
+        csv_file_path: Path to the CSV file containing content data
+        batch_size: Number of rows per batch
+        
+    Yields:
+        MovieBatch per batch_size rows
     """
-    if not content_data:
-        logger.warning("No content to insert")
-        return
+    builder = MovieBatchBuilder()
+    with open(csv_file_path, 'r', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            builder.append(row)
+            if len(builder) >= batch_size:
+                yield builder.build()
+    if len(builder):
+        yield builder.build()
+
+def count_csv_rows(csv_file_path: str) -> int:
+    """
+    Count the data rows of a CSV file without building row dictionaries.
     
-    try:
-        # Prepare data for batch insertion
-        ids = [content["id"] for content in content_data]
-        documents = [content["document"] for content in content_data]
-        metadatas = [content["metadata"] for content in content_data]
+    Overviews may contain quoted newlines, so rows are counted with the CSV
+    parser rather than by lines.
+    
+    Args:
+        csv_file_path: Path to the CSV file containing content data
         
-        # Insert content into collection
-        collection.upsert(
-            ids=ids,
-            documents=documents,
-            metadatas=metadatas
-        )
+    Returns:
+        Number of rows, excluding the header
+    """
+    with open(csv_file_path, 'r', encoding='utf-8', newline='') as file:
+        return max(sum(1 for _ in csv.reader(file)) - 1, 0)
+
+def load_content_from_parquet(parquet_file_path: str, batch_size: int = 1000) -> Iterator[MovieBatch]:
+    """
+    Stream content data from a Parquet export in batches.
+    
+    The file is memory-mapped and read one record batch at a time.
+    
+    Args:
+        parquet_file_path: Path to the Parquet file written by search_data.py
+        batch_size: Number of rows per batch
         
-        logger.info(f"Successfully inserted {len(content_data)} content items into ChromaDB")
+    Yields:
+        MovieBatch per record batch
+    """
+    parquet_file = pq.ParquetFile(parquet_file_path, memory_map=True)
+    for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+        yield MovieBatch.from_arrow(record_batch)
+
+class IngestCheckpoint:
+    """
+    Records how many rows of a source have been committed to ChromaDB.
+    
+    The checkpoint is tied to a source key (file identity or content hash), so
+    a changed input file starts from the beginning instead of resuming.
+    """
+    
+    def __init__(self, path: Path, source_key: str):
+        """
+        Args:
+            path: Checkpoint file location
+            source_key: Identity of the input being loaded
+        """
+        self.path = Path(path)
+        self.source_key = source_key
+    
+    def load(self) -> int:
+        """
+        Get the number of rows already committed for this source.
         
-    except Exception as e:
-        logger.error(f"Error inserting content to ChromaDB: {e}")
-        raise
+        Returns:
+            Committed row count, 0 if there is no checkpoint for this source
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+        if state.get("source_key") != self.source_key:
+            logger.info("Checkpoint belongs to a different input, starting from the beginning")
+            return 0
+        return int(state.get("committed_rows", 0))
+    
+    def save(self, committed_rows: int, total_rows: Optional[int]) -> None:
+        """
+        Persist the committed row count atomically.
+        
+        Args:
+            committed_rows: Rows upserted so far
+            total_rows: Total rows in the source, if known
+        """
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({
+                "source_key": self.source_key,
+                "committed_rows": committed_rows,
+                "total_rows": total_rows,
+                "updated_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }, file)
+        tmp_path.replace(self.path)
+    
+    def clear(self) -> None:
+        """Remove the checkpoint once the source is fully loaded."""
+        self.path.unlink(missing_ok=True)
+
+def file_source_key(path: Path) -> str:
+    """
+    Identify an input file by path, size and modification time.
+    
+    Args:
+        path: Input file
+        
+    Returns:
+        Source key for IngestCheckpoint
+    """
+    stat = path.stat()
+    return f"{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+def ingest_batches(batches: Iterable[MovieBatch],
+                   source_key: str,
+                   total_rows: Optional[int] = None,
+                   batch_size: int = INGEST_BATCH_SIZE,
+                   checkpoint_path: Path = CHECKPOINT_FILE,
+                   resume: bool = True,
+                   schema: Optional[str] = None) -> int:
+    """
+    Upsert content in fixed-size chunks, checkpointing after every chunk.
+    
+    If a previous run for the same source stopped partway (e.g. an embedding
+    error), rows it already committed are skipped. Upserts are idempotent, so
+    a chunk interrupted before its checkpoint is simply written again.
+    
+    Args:
+        batches: Content rows in a stable order (one or more MovieBatch)
+        source_key: Identity of the input, see file_source_key
+        total_rows: Total rows in the input, used for the ETA
+        batch_size: Rows embedded and upserted per ChromaDB call
+        checkpoint_path: Checkpoint file location
+        resume: Whether to continue from an existing checkpoint
+        schema: "full" or "compact" metadata (defaults to METADATA_SCHEMA)
+        
+    Returns:
+        Number of rows upserted by this run
+        
+    Raises:
+        Exception: Any ChromaDB or embedding error, after the checkpoint is saved
+    """
+    checkpoint = IngestCheckpoint(checkpoint_path, source_key)
+    committed = checkpoint.load() if resume else 0
+    if committed:
+        logger.info(f"Resuming from checkpoint: {committed} rows already committed")
+    
+    skipped = committed
+    row_offset = 0
+    inserted = 0
+    started = time.perf_counter()
+    
+    for batch in batches:
+        batch_start = max(0, committed - row_offset)
+        row_offset += len(batch)
+        if batch_start >= len(batch):
+            continue
+        
+        for chunk in batch.slice(batch_start, len(batch)).iter_slices(batch_size):
+            chunk_started = time.perf_counter()
+            try:
+                ids, documents, metadatas = build_content_payload(chunk, schema)
+                upsert_with_facets(collection, facet_stats, ids, documents, metadatas)
+            except Exception as e:
+                logger.error(f"Error inserting rows {committed}-{committed + len(chunk)}: {e}")
+                logger.error(f"Progress saved at {committed} rows, run again to resume")
+                raise
+            
+            committed += len(chunk)
+            inserted += len(chunk)
+            checkpoint.save(committed, total_rows)
+            
+            elapsed = time.perf_counter() - started
+            rate = inserted / elapsed if elapsed else 0.0
+            chunk_rate = len(chunk) / max(time.perf_counter() - chunk_started, 1e-9)
+            progress = f"{committed}/{total_rows}" if total_rows else str(committed)
+            eta = f", ETA {(total_rows - committed) / rate:.0f}s" if total_rows and rate else ""
+            logger.info(f"Committed {progress} rows ({chunk_rate:.1f} rows/s this batch, {rate:.1f} rows/s overall{eta})")
+    
+    checkpoint.clear()
+    logger.info(f"Successfully inserted {inserted} content items into ChromaDB ({skipped} skipped from checkpoint)")
+    return inserted
+
+def insert_content_to_chroma(content_data: MovieBatch,
+                             batch_size: int = INGEST_BATCH_SIZE,
+                             checkpoint_path: Path = CHECKPOINT_FILE,
+                             resume: bool = True,
+                             source_key: Optional[str] = None) -> None:
+    """
+    Insert content data into ChromaDB collection in checkpointed chunks.
+    
+    Args:
+        content_data: Columnar batch of content rows
+        batch_size: Rows embedded and upserted per ChromaDB call
+        checkpoint_path: Checkpoint file location
+        resume: Whether to continue from an existing checkpoint
+        source_key: Identity of the input (defaults to a hash of the content ids)
+    """
+    if not len(content_data):
+        logger.warning("No content to insert")
+        return
+    
+    if source_key is None:
+        source_key = "ids:" + hashlib.sha256(content_data.columns["id"].tobytes()).hexdigest()
+    ingest_batches([content_data], source_key, len(content_data), batch_size, checkpoint_path, resume)
 
 def main() -> None:
     """
-    Main function to load content from CSV and insert into ChromaDB.
+    Main function to load content from the crawl export and insert into ChromaDB.
     """
+    parser = argparse.ArgumentParser(description="Load Netflix content into ChromaDB")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="rows per upsert")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and load everything again")
+    parser.add_argument("--schema", choices=["full", "compact"], default=METADATA_SCHEMA,
+                        help="metadata layout (compact keeps large text only in the document)")
+    parser.add_argument("--workers", type=int, default=EMBED_WORKERS,
+                        help="concurrent embedding workers (0 = sequential load without the pipeline)")
+    args = parser.parse_args()
+    
     try:
-        # Define CSV file path
+        # Prefer the typed Parquet export when pyarrow is available
+        parquet_file_path = Path(__file__).parent / "netflix_movies.parquet"
         csv_file_path = Path(__file__).parent / "netflix_movies.csv"
-        
-        # Check if CSV file exists
-        if not csv_file_path.exists():
+        if pq is not None and parquet_file_path.exists():
+            source_path = parquet_file_path
+            total_rows = pq.ParquetFile(parquet_file_path).metadata.num_rows
+            batches = load_content_from_parquet(str(parquet_file_path), batch_size=args.batch_size)
+        elif csv_file_path.exists():
+            source_path = csv_file_path
+            total_rows = count_csv_rows(str(csv_file_path))
+            batches = iter_content_from_csv(str(csv_file_path), batch_size=args.batch_size)
+        else:
             logger.error(f"CSV file not found: {csv_file_path}")
             return
         
-        logger.info(f"Loading content from: {csv_file_path}")
-        
-        # Load content from CSV
-        content_data = load_content_from_csv(str(csv_file_path))
-        
-        if not content_data:
-            logger.error("No content loaded from CSV")
-            return
-        
-        logger.info(f"Loaded {len(content_data)} content items from CSV")
+        logger.info(f"Loading content from: {source_path}")
+        if not facet_stats.exists() and collection.count():
+            # Counters are incremental, so they must start from the current contents
+            facet_stats.rebuild(collection)
+        # Switching schema must not resume a checkpoint written with the other one
+        source_key = f"{file_source_key(source_path)}:{args.schema}"
         
-        # Insert content into ChromaDB
-        insert_content_to_chroma(content_data)
+        if args.workers > 0:
+            # Reading, embedding and writing overlap; embeddings are computed by the pipeline
+            pipeline = IngestPipeline(
+                collection,
+                openai_ef,
+                partial(build_content_payload, schema=args.schema),
+                batch_size=args.batch_size,
+                embed_workers=args.workers,
+                facets=facet_stats
+            )
+            pipeline.run(
+                batches,
+                checkpoint=IngestCheckpoint(CHECKPOINT_FILE, source_key),
+                total_rows=total_rows,
+                resume=not args.restart
+            )
+        else:
+            ingest_batches(
+                batches,
+                source_key,
+                total_rows=total_rows,
+                batch_size=args.batch_size,
+                resume=not args.restart,
+                schema=args.schema
+            )
         
         # Verify insertion by checking collection count
         collection_count = collection.count()
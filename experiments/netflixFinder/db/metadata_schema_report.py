@@ -0,0 +1,158 @@
+"""
+Compare the "full" and "compact" metadata schemas of the content collection.
+
+Loads the same rows into two throwaway ChromaDB directories, one per schema,
+with identical random embeddings (so no embedding API calls are made and only
+the stored text and metadata differ), then reports the on-disk size and the
+query latency and payload size for the include sets NetflixFinderService uses.
+
+Usage:
+    python metadata_schema_report.py --rows 5000 --queries 50
+"""
+import argparse
+import json
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import chromadb
+import numpy as np
+
+from load_data_to_chroma import build_content_payload, load_content_from_csv
+
+logger = logging.getLogger(__name__)
+
+CSV_FILE = Path(__file__).parent / "netflix_movies.csv"
+EMBEDDING_DIMENSIONS = 1536  # text-embedding-3-small
+
+# include sets used by search_content: the CLI projection reads documents (for the
+# overview), metadatas and distances; ranking-only callers read ids and distances
+INCLUDE_SETS = {
+    "display fields": ["documents", "metadatas", "distances"],
+    "ids + distances": ["distances"],
+}
+
+
+def directory_size(path: Path) -> int:
+    """
+    Total size of the files under a directory.
+
+    Args:
+        path: Directory to measure
+
+    Returns:
+        Size in bytes
+    """
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def build_store(path: Path, schema: str, batch: Any, embeddings: np.ndarray, batch_size: int = 500) -> Any:
+    """
+    Load a batch into a fresh persistent collection using the given schema.
+
+    Args:
+        path: ChromaDB directory
+        schema: "full" or "compact"
+        batch: MovieBatch with the content rows
+        embeddings: Precomputed embedding per row
+        batch_size: Rows per upsert
+
+    Returns:
+        The populated collection
+    """
+    client = chromadb.PersistentClient(path=str(path))
+    collection = client.get_or_create_collection("content")
+    for start, chunk in enumerate(batch.iter_slices(batch_size)):
+        ids, documents, metadatas = build_content_payload(chunk, schema)
+        offset = start * batch_size
+        collection.upsert(
+            ids=ids,
+            documents=documents,
+            metadatas=metadatas,
+            embeddings=embeddings[offset:offset + len(ids)].tolist()
+        )
+    return collection
+
+
+def time_queries(collection: Any, query_embeddings: np.ndarray, include: List[str], n_results: int) -> Dict[str, float]:
+    """
+    Measure query latency and response size for an include set.
+
+    Args:
+        collection: Collection to query
+        query_embeddings: One embedding per query
+        include: ChromaDB include argument
+        n_results: Results per query
+
+    Returns:
+        Median and p95 latency in milliseconds and mean payload size in bytes
+    """
+    latencies, sizes = [], []
+    for embedding in query_embeddings:
+        started = time.perf_counter()
+        results = collection.query(query_embeddings=[embedding.tolist()], n_results=n_results, include=include)
+        latencies.append((time.perf_counter() - started) * 1000)
+        sizes.append(len(json.dumps({key: results.get(key) for key in ["ids", *include]}, default=str)))
+    latencies.sort()
+    return {
+        "median_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+        "payload_bytes": statistics.mean(sizes),
+    }
+
+
+def main() -> None:
+    """
+    Build both stores and print the size and latency comparison.
+    """
+    parser = argparse.ArgumentParser(description="Compare full and compact metadata schemas")
+    parser.add_argument("--rows", type=int, default=None, help="rows to load (default: whole CSV)")
+    parser.add_argument("--queries", type=int, default=50, help="queries per measurement")
+    parser.add_argument("--n-results", type=int, default=10, help="results per query")
+    args = parser.parse_args()
+
+    batch = load_content_from_csv(str(CSV_FILE))
+    if args.rows:
+        batch = batch.slice(0, args.rows)
+    if not len(batch):
+        logger.error(f"No rows loaded from {CSV_FILE}")
+        return
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((len(batch), EMBEDDING_DIMENSIONS)).astype(np.float32)
+    query_embeddings = rng.standard_normal((args.queries, EMBEDDING_DIMENSIONS)).astype(np.float32)
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for schema in ("full", "compact"):
+            path = Path(tmp) / schema
+            collection = build_store(path, schema, batch, embeddings)
+            report[schema] = {
+                "sqlite_bytes": (path / "chroma.sqlite3").stat().st_size,
+                "directory_bytes": directory_size(path),
+                "queries": {
+                    label: time_queries(collection, query_embeddings, include, args.n_results)
+                    for label, include in INCLUDE_SETS.items()
+                },
+            }
+
+    print(f"\n=== METADATA SCHEMA REPORT ({len(batch)} rows) ===")
+    for schema, result in report.items():
+        print(f"{schema:<8} chroma.sqlite3: {result['sqlite_bytes'] / 2**20:8.2f} MiB, "
+              f"directory: {result['directory_bytes'] / 2**20:8.2f} MiB")
+    saved = 1 - report["compact"]["sqlite_bytes"] / report["full"]["sqlite_bytes"]
+    print(f"compact saves {saved:.1%} of chroma.sqlite3")
+
+    for label in INCLUDE_SETS:
+        print(f"\n{label} (n_results={args.n_results}):")
+        for schema, result in report.items():
+            stats = result["queries"][label]
+            print(f"  {schema:<8} median {stats['median_ms']:7.2f} ms, p95 {stats['p95_ms']:7.2f} ms, "
+                  f"payload {stats['payload_bytes'] / 1024:7.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
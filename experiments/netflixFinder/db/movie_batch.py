@@ -0,0 +1,484 @@
+"""
+Column-backed storage for large movie catalogs.
+
+A Movie dataclass plus a document string and metadata dict per title costs
+several hundred bytes of Python object overhead per row before any text is
+stored. MovieBatch keeps each field as one column instead: numeric fields as
+NumPy arrays and text fields as a single UTF-8 buffer with an offsets array.
+Rows are exposed through lightweight MovieRow views that decode values on
+access, so ingest code can keep using row["title"] style access.
+"""
+import logging
+import tracemalloc
+from array import array
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Column layout, in search_data.Movie field order
+NUMERIC_FIELDS = {
+    "id": np.int64,
+    "vote_average": np.float64,
+    "vote_count": np.int64,
+    "popularity": np.float64,
+}
+STRING_FIELDS = (
+    "title",
+    "original_title",
+    "overview",
+    "release_date",
+    "original_language",
+    "genres",
+    "poster_url",
+)
+MOVIE_FIELDS = (
+    "id",
+    "title",
+    "original_title",
+    "overview",
+    "release_date",
+    "vote_average",
+    "vote_count",
+    "popularity",
+    "original_language",
+    "genres",
+    "poster_url",
+)
+
+
+class StringColumn:
+    """
+    Immutable text column stored as one UTF-8 buffer plus row offsets.
+
+    Slicing shares the buffer, so taking a slice never copies text.
+    """
+
+    __slots__ = ("data", "offsets")
+
+    def __init__(self, data: bytes, offsets: np.ndarray):
+        """
+        Args:
+            data: Concatenated UTF-8 encoded values
+            offsets: int64 array of len(column) + 1 positions into data
+        """
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, values: Iterable[Any]) -> "StringColumn":
+        """
+        Build a column from Python values (converted with str()).
+
+        Args:
+            values: Values to store
+
+        Returns:
+            New StringColumn
+        """
+        builder = StringColumnBuilder()
+        for value in values:
+            builder.append(value)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.data[start:end].decode("utf-8")
+
+    def slice(self, start: int, stop: int) -> "StringColumn":
+        """
+        Return rows [start, stop) without copying the text buffer.
+
+        Args:
+            start: First row
+            stop: Row after the last one
+
+        Returns:
+            StringColumn view over the same buffer
+        """
+        return StringColumn(self.data, self.offsets[start:stop + 1])
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the referenced text and the offsets."""
+        return int(self.offsets[-1] - self.offsets[0]) + self.offsets.nbytes
+
+
+class StringColumnBuilder:
+    """Append-only builder for StringColumn."""
+
+    __slots__ = ("_data", "_offsets")
+
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = array("q", [0])
+
+    def append(self, value: Any) -> None:
+        """
+        Append one value (converted with str()).
+
+        Args:
+            value: Value to append
+        """
+        self._data += str(value).encode("utf-8")
+        self._offsets.append(len(self._data))
+
+    def build(self) -> StringColumn:
+        """
+        Freeze the appended values into a column.
+
+        Returns:
+            New StringColumn
+        """
+        column = StringColumn(bytes(self._data), np.frombuffer(self._offsets, dtype=np.int64).copy())
+        # Release the growable buffers right away so only one column is ever held twice
+        self._data = bytearray()
+        self._offsets = array("q", [0])
+        return column
+
+
+class MovieRow:
+    """
+    Read-only view of one row of a MovieBatch.
+
+    Supports both row.title and row["title"] access, so it can be passed
+    anywhere a CSV row dictionary was used before.
+    """
+
+    __slots__ = ("_batch", "_index")
+
+    def __init__(self, batch: "MovieBatch", index: int):
+        self._batch = batch
+        self._index = index
+
+    def __getitem__(self, name: str) -> Any:
+        try:
+            value = self._batch.columns[name][self._index]
+        except KeyError:
+            raise KeyError(name) from None
+        # Hand out plain Python numbers, not NumPy scalars
+        return value.item() if isinstance(value, np.generic) else value
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Materialize the row as a dictionary.
+
+        Returns:
+            Dictionary with one entry per movie field
+        """
+        return {name: self[name] for name in MOVIE_FIELDS}
+
+    def __repr__(self) -> str:
+        return f"MovieRow(id={self['id']}, title={self['title']!r})"
+
+
+class MovieBatch:
+    """
+    Columnar batch of movies.
+
+    Attributes:
+        columns: Field name to column (NumPy array or StringColumn)
+    """
+
+    __slots__ = ("columns",)
+
+    def __init__(self, columns: Dict[str, Any]):
+        """
+        Args:
+            columns: Field name to column, one entry per MOVIE_FIELDS name
+        """
+        self.columns = columns
+
+    @classmethod
+    def from_movies(cls, movies: Iterable[Any]) -> "MovieBatch":
+        """
+        Build a batch from Movie dataclasses.
+
+        Args:
+            movies: Movie objects
+
+        Returns:
+            New MovieBatch
+        """
+        builder = MovieBatchBuilder()
+        builder.extend(asdict(movie) for movie in movies)
+        return builder.build()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "MovieBatch":
+        """
+        Build a batch from row dictionaries such as csv.DictReader rows.
+
+        Rows are consumed one at a time, so a reader can be passed directly.
+
+        Args:
+            rows: Row dictionaries with one entry per movie field
+
+        Returns:
+            New MovieBatch
+        """
+        builder = MovieBatchBuilder()
+        builder.extend(rows)
+        return builder.build()
+
+    @classmethod
+    def from_arrow(cls, record_batch: Any) -> "MovieBatch":
+        """
+        Build a batch from an Arrow record batch written by MovieParquetWriter.
+
+        Numeric columns are taken as NumPy arrays without per-row objects;
+        release_date timestamps and genre lists are converted back to text.
+
+        Args:
+            record_batch: pyarrow.RecordBatch following MovieParquetWriter.SCHEMA
+
+        Returns:
+            New MovieBatch
+        """
+        columns: Dict[str, Any] = {}
+        for name, dtype in NUMERIC_FIELDS.items():
+            column = record_batch.column(name)
+            columns[name] = column.fill_null(0).to_numpy(zero_copy_only=False).astype(dtype, copy=False)
+
+        for name in STRING_FIELDS:
+            values = record_batch.column(name).to_pylist()
+            if name == "release_date":
+                values = (
+                    datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d') if timestamp is not None else "N/A"
+                    for timestamp in values
+                )
+            elif name == "genres":
+                values = (", ".join(genres or []) for genres in values)
+            else:
+                values = ("" if value is None else value for value in values)
+            columns[name] = StringColumn.from_strings(values)
+        return cls(columns)
+
+    @classmethod
+    def concat(cls, batches: List["MovieBatch"]) -> "MovieBatch":
+        """
+        Concatenate several batches into one.
+
+        Args:
+            batches: Batches to join, in order
+
+        Returns:
+            New MovieBatch
+        """
+        builder = MovieBatchBuilder()
+        for batch in batches:
+            builder.extend(row.as_dict() for row in batch)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.columns["id"])
+
+    def __getitem__(self, index: int) -> MovieRow:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return MovieRow(self, index)
+
+    def __iter__(self) -> Iterator[MovieRow]:
+        for index in range(len(self)):
+            yield MovieRow(self, index)
+
+    def slice(self, start: int, stop: int) -> "MovieBatch":
+        """
+        Return rows [start, stop) as a batch sharing this batch's memory.
+
+        Args:
+            start: First row
+            stop: Row after the last one
+
+        Returns:
+            MovieBatch view
+        """
+        stop = min(stop, len(self))
+        return MovieBatch({
+            name: column.slice(start, stop) if isinstance(column, StringColumn) else column[start:stop]
+            for name, column in self.columns.items()
+        })
+
+    def iter_slices(self, size: int) -> Iterator["MovieBatch"]:
+        """
+        Split the batch into consecutive views of at most size rows.
+
+        Args:
+            size: Rows per slice
+
+        Yields:
+            MovieBatch views
+        """
+        for start in range(0, len(self), size):
+            yield self.slice(start, start + size)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by all columns."""
+        return sum(column.nbytes for column in self.columns.values())
+
+
+class MovieBatchBuilder:
+    """
+    Append-only builder for MovieBatch.
+
+    Values go straight into typed arrays and byte buffers, so no per-row
+    objects are kept while a crawl or a file is being read.
+    """
+
+    _TYPECODES = {np.int64: "q", np.float64: "d"}
+
+    def __init__(self):
+        self._numeric = {name: array(self._TYPECODES[dtype]) for name, dtype in NUMERIC_FIELDS.items()}
+        self._strings = {name: StringColumnBuilder() for name in STRING_FIELDS}
+
+    def append(self, row: Dict[str, Any]) -> None:
+        """
+        Append one row.
+
+        Args:
+            row: Row dictionary (values may be text, as read from a CSV)
+        """
+        for name, dtype in NUMERIC_FIELDS.items():
+            value = row[name]
+            self._numeric[name].append(int(value) if dtype is np.int64 else float(value))
+        for name in STRING_FIELDS:
+            self._strings[name].append(row[name])
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Append several rows.
+
+        Args:
+            rows: Row dictionaries
+        """
+        for row in rows:
+            self.append(row)
+
+    def append_movies(self, movies: Iterable[Any]) -> None:
+        """
+        Append Movie dataclasses, e.g. as the on_page callback of a crawl.
+
+        Args:
+            movies: Movie objects
+        """
+        self.extend(asdict(movie) for movie in movies)
+
+    def __len__(self) -> int:
+        return len(self._numeric["id"])
+
+    def build(self) -> MovieBatch:
+        """
+        Freeze the appended rows into a batch and reset the builder.
+
+        Returns:
+            New MovieBatch
+        """
+        columns: Dict[str, Any] = {
+            name: np.frombuffer(values, dtype=NUMERIC_FIELDS[name]).copy()
+            for name, values in self._numeric.items()
+        }
+        columns.update((name, builder.build()) for name, builder in self._strings.items())
+        self._numeric = {name: array(self._TYPECODES[dtype]) for name, dtype in NUMERIC_FIELDS.items()}
+        return MovieBatch(columns)
+
+
+def _synthetic_rows(count: int) -> Iterator[Dict[str, Any]]:
+    """Generate TMDB-like movie rows for the memory comparison."""
+    rng = np.random.default_rng(0)
+    genres = ["Action", "Drama", "Comedy", "Thriller", "Horror", "Romance", "Science Fiction"]
+    for index in range(count):
+        yield {
+            "id": 100000 + index,
+            "title": f"Movie {index}",
+            "original_title": f"Original Movie {index}",
+            "overview": " ".join(["lorem ipsum dolor sit amet"] * int(rng.integers(5, 15))),
+            "release_date": f"20{int(rng.integers(10, 25))}-0{int(rng.integers(1, 10))}-1{int(rng.integers(0, 10))}",
+            "vote_average": float(rng.uniform(0, 10)),
+            "vote_count": int(rng.integers(0, 20000)),
+            "popularity": float(rng.uniform(0, 500)),
+            "original_language": "en",
+            "genres": ", ".join(rng.choice(genres, size=2, replace=False)),
+            "poster_url": f"https://image.tmdb.org/t/p/w500/{index}.jpg",
+        }
+
+
+def _traced_peak(build) -> Tuple[Any, int, int]:
+    """Run build() under tracemalloc and return (result, retained bytes, peak bytes)."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current - baseline, peak - baseline
+
+
+def compare_memory(count: int = 100_000, content_builder: Optional[Any] = None) -> Dict[str, Dict[str, int]]:
+    """
+    Compare ingest memory of per-row objects against a MovieBatch.
+
+    The legacy layout is what the crawl and the CSV loader used to hold at
+    once: a Movie dataclass per title plus a content dict (document string and
+    nested metadata dict) per row.
+
+    Args:
+        count: Number of synthetic movies
+        content_builder: Function turning a row into the loader's content dict
+            (defaults to load_data_to_chroma.build_content_item)
+
+    Returns:
+        {"per_row": {...}, "columnar": {...}} with retained and peak bytes
+    """
+    from search_data import Movie
+
+    if content_builder is None:
+        from load_data_to_chroma import build_content_item as content_builder
+
+    rows = list(_synthetic_rows(count))
+
+    def build_per_row():
+        movies = [Movie(**row) for row in rows]
+        content = [content_builder({name: str(value) for name, value in asdict(movie).items()}) for movie in movies]
+        return movies, content
+
+    _, per_row_retained, per_row_peak = _traced_peak(build_per_row)
+    batch, columnar_retained, columnar_peak = _traced_peak(lambda: MovieBatch.from_rows(iter(rows)))
+
+    report = {
+        "per_row": {"retained": per_row_retained, "peak": per_row_peak},
+        "columnar": {"retained": columnar_retained, "peak": columnar_peak, "nbytes": batch.nbytes},
+    }
+    logger.info(
+        f"{count} movies: per-row objects retain {per_row_retained / 2**20:.1f} MiB "
+        f"(peak {per_row_peak / 2**20:.1f} MiB), MovieBatch retains {columnar_retained / 2**20:.1f} MiB "
+        f"(peak {columnar_peak / 2**20:.1f} MiB), "
+        f"{per_row_retained / max(columnar_retained, 1):.1f}x smaller"
+    )
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="Compare per-row and columnar movie memory usage")
+    parser.add_argument("--count", type=int, default=100_000, help="number of synthetic movies")
+    compare_memory(parser.parse_args().count)
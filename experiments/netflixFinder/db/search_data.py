@@ -1,14 +1,32 @@
 import csv
+import hashlib
+import json
 import logging
 import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass, fields, asdict
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 
+from movie_batch import MovieBatch, MovieBatchBuilder
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional, CSV always works
+    pa = None
+    pq = None
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
@@ -20,10 +38,31 @@ BASE_URL = "https://api.themoviedb.org/3"
 IMAGE_BASE_URL = "https://image.tmdb.org/t/p/w500"
 MAX_RESULTS = 1000
 OUTPUT_CSV_FILE = Path(__file__).parent / "netflix_movies.csv"
+OUTPUT_PARQUET_FILE = Path(__file__).parent / "netflix_movies.parquet"
+HTTP_CACHE_DIR = Path(__file__).parent / ".tmdb_cache"
 NETFLIX_PROVIDER_ID = "8"
 WATCH_REGION = "EC"
 LANGUAGES = "en|es"
 LOOKBACK_DAYS = 730
+MAX_CONCURRENT_REQUESTS = 4
+# TMDB never serves discover pages beyond this one
+TMDB_MAX_PAGE = 500
+# TMDB allows roughly 50 requests per second per IP; stay slightly below it
+RATE_LIMIT_PER_SECOND = 40.0
+RATE_LIMIT_BURST = 20
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+# Seconds a cached response is served without contacting TMDB, per endpoint
+CACHE_TTL_SECONDS = {
+    "genre/movie/list": 7 * 24 * 3600,
+    "discover/movie": 6 * 3600,
+    "movie/{id}": 24 * 3600,
+    "movie/{id}/watch/providers": 24 * 3600,
+    "movie/changes": 3600,
+}
+DEFAULT_CACHE_TTL_SECONDS = 3600
 
 @dataclass(frozen=True)
 class Movie:
@@ -58,7 +97,190 @@ class Movie:
 
 class TMDBAPIError(Exception):
     """Custom exception for TMDB API errors."""
-    pass
+    
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        """
+        Args:
+            message: Error description
+            status_code: HTTP status code, when the server answered
+        """
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+    
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    request takes one token and blocks until one is available. A server
+    Retry-After can pause the whole bucket so every worker backs off together.
+    """
+    
+    def __init__(self, rate: float, capacity: int):
+        """
+        Initialize the bucket full.
+        
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """Block until a token is available and take it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.paused_until:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                    self.updated_at = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait_seconds = (1 - self.tokens) / self.rate
+                else:
+                    wait_seconds = self.paused_until - now
+            time.sleep(wait_seconds)
+    
+    def pause(self, seconds: float) -> None:
+        """
+        Stop handing out tokens for the given number of seconds.
+        
+        Args:
+            seconds: Pause length, typically the server's Retry-After value
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.updated_at = self.paused_until
+
+
+@dataclass
+class EndpointStats:
+    """
+    Request counters for one API endpoint.
+    
+    Attributes:
+        requests: Number of HTTP attempts made
+        errors: Number of attempts that failed
+        retries: Number of attempts that were retried
+        total_latency: Sum of attempt latencies in seconds
+        cache_hits: Number of calls answered from the cache without a request
+        revalidated: Number of conditional requests answered with 304
+    """
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    total_latency: float = 0.0
+    cache_hits: int = 0
+    revalidated: int = 0
+    
+    @property
+    def average_latency_ms(self) -> float:
+        """Average attempt latency in milliseconds."""
+        return self.total_latency / self.requests * 1000 if self.requests else 0.0
+
+
+def endpoint_key(endpoint: str) -> str:
+    """
+    Group endpoints that differ only by numeric IDs.
+    
+    Args:
+        endpoint: API endpoint, e.g. "movie/123/watch/providers"
+        
+    Returns:
+        Normalized endpoint, e.g. "movie/{id}/watch/providers"
+    """
+    return re.sub(r"(^|/)\d+(?=/|$)", r"\1{id}", endpoint.strip("/"))
+
+
+class TMDBResponseCache:
+    """
+    On-disk cache of TMDB JSON responses with per-endpoint TTLs.
+    
+    Entries are keyed by endpoint and query parameters (the API key is
+    excluded) and keep the ETag / Last-Modified validators so stale entries
+    can be revalidated with a conditional request instead of refetched.
+    """
+    
+    def __init__(self,
+                 cache_dir: str | Path = HTTP_CACHE_DIR,
+                 ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = DEFAULT_CACHE_TTL_SECONDS):
+        """
+        Initialize the cache directory.
+        
+        Args:
+            cache_dir: Directory where entries are stored
+            ttls: Fresh lifetime in seconds per normalized endpoint
+            default_ttl: Fresh lifetime for endpoints missing from ttls
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttls = CACHE_TTL_SECONDS if ttls is None else ttls
+        self.default_ttl = default_ttl
+    
+    def _path(self, endpoint: str, params: Dict) -> Path:
+        cacheable_params = {k: v for k, v in params.items() if k != "api_key"}
+        key = json.dumps({"endpoint": endpoint.strip("/"), "params": cacheable_params},
+                         sort_keys=True, default=str)
+        return self.cache_dir / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+    
+    def get(self, endpoint: str, params: Dict) -> Optional[Dict]:
+        """
+        Load a cached entry.
+        
+        Args:
+            endpoint: API endpoint
+            params: Query string parameters
+            
+        Returns:
+            Entry with "body", "stored_at", "etag" and "last_modified", or None
+        """
+        try:
+            with open(self._path(endpoint, params), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+    
+    def is_fresh(self, endpoint: str, entry: Dict) -> bool:
+        """Check whether an entry is still within its endpoint TTL."""
+        ttl = self.ttls.get(endpoint_key(endpoint), self.default_ttl)
+        return time.time() - entry["stored_at"] < ttl
+    
+    def put(self, endpoint: str, params: Dict, body: Dict,
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """
+        Store a response body and its validators.
+        
+        Args:
+            endpoint: API endpoint
+            params: Query string parameters
+            body: Parsed JSON response
+            etag: ETag response header
+            last_modified: Last-Modified response header
+        """
+        path = self._path(endpoint, params)
+        entry = {"stored_at": time.time(), "etag": etag, "last_modified": last_modified, "body": body}
+        # Unique temporary file per thread so concurrent writers never collide
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, path)
+    
+    def touch(self, endpoint: str, params: Dict, entry: Dict) -> None:
+        """Mark a revalidated (304) entry as fresh again."""
+        self.put(endpoint, params, entry["body"], entry.get("etag"), entry.get("last_modified"))
+
+
+# Shared by every TMDBClient so concurrent crawls respect one global budget
+SHARED_RATE_LIMITER = TokenBucket(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
 
 
 class TMDBClient:
@@ -68,13 +290,21 @@ class TMDBClient:
     Encapsulates all API communication logic and error handling.
     """
     
-    def __init__(self, api_key: str, base_url: str = BASE_URL):
+    def __init__(self,
+                 api_key: str,
+                 base_url: str = BASE_URL,
+                 rate_limiter: Optional[TokenBucket] = None,
+                 max_retries: int = MAX_RETRIES,
+                 cache: Optional[TMDBResponseCache] = None):
         """
         Initialize TMDB client.
         
         Args:
             api_key: TMDB API key
             base_url: API base URL (defaults to global constant)
+            rate_limiter: Token bucket to draw from (defaults to the shared one)
+            max_retries: Retries for 429, 5xx and connection errors
+            cache: Optional on-disk response cache
         
         Raises:
             ValueError: If API key is empty
@@ -85,26 +315,48 @@ class TMDBClient:
         
         self.api_key = api_key
         self.base_url = base_url
+        self.rate_limiter = rate_limiter or SHARED_RATE_LIMITER
+        self.max_retries = max_retries
+        self.cache = cache
+        # Per-endpoint latency and error counters, updated from worker threads
+        self.endpoint_stats: Dict[str, EndpointStats] = {}
+        self._stats_lock = threading.Lock()
+        # Whether the last fetch_movies call got every page of its date window,
+        # with no page skipped after errors and no cut-off at max_results
+        self.last_crawl_complete = False
         # Create reusable HTTP session for better performance
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'NetflixFinder/1.0',
             'Accept': 'application/json'
         })
+        # Keep one pooled connection per concurrent worker
+        adapter = HTTPAdapter(pool_maxsize=MAX_CONCURRENT_REQUESTS)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
     
-    def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
+    def _make_request(self, endpoint: str, params: Optional[Dict] = None, fresh: bool = False) -> Dict:
         """
         Make HTTP request to TMDB API.
         
+        Every attempt waits for a rate-limiter token. 429, 5xx and connection
+        errors are retried with exponential backoff and full jitter; a
+        Retry-After header overrides the computed delay and pauses the shared
+        limiter so concurrent workers back off too. With a cache, fresh entries
+        are returned without a request and stale ones are revalidated with
+        If-None-Match / If-Modified-Since.
+        
         Args:
             endpoint: API endpoint (without base URL)
             params: Query string parameters
+            fresh: Revalidate a cached entry even if its TTL has not expired,
+                for callers that know the resource may just have changed
         
         Returns:
             API JSON response
             
         Raises:
-            TMDBAPIError: If there's an HTTP request error
+            TMDBAPIError: If the request still fails after all retries
         """
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
         # Basic parameters included in all requests
@@ -114,14 +366,117 @@ class TMDBClient:
         if params:
             request_params.update(params)
         
+        cached = self.cache.get(endpoint, request_params) if self.cache else None
+        conditional_headers = {}
+        if cached:
+            if not fresh and self.cache.is_fresh(endpoint, cached):
+                self._record_cache(endpoint, "cache_hits")
+                return cached["body"]
+            if cached.get("etag"):
+                conditional_headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                conditional_headers["If-Modified-Since"] = cached["last_modified"]
+        
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            started = time.perf_counter()
+            retry_after = None
+            try:
+                response = self.session.get(url, params=request_params,
+                                            headers=conditional_headers, timeout=30)
+                self._record(endpoint, time.perf_counter() - started, failed=not response.ok)
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+                    error = RequestException(f"HTTP {response.status_code}", response=response)
+                elif response.status_code == 304 and cached:
+                    # Unchanged on the server: reuse the stored body and restart its TTL
+                    self.cache.touch(endpoint, request_params, cached)
+                    self._record_cache(endpoint, "revalidated")
+                    return cached["body"]
+                else:
+                    response.raise_for_status()
+                    body = response.json()
+                    if self.cache:
+                        self.cache.put(endpoint, request_params, body,
+                                       response.headers.get("ETag"),
+                                       response.headers.get("Last-Modified"))
+                    return body
+            except requests.HTTPError as e:
+                # Other 4xx errors will not succeed on retry
+                logger.error(f"Error in request to {url}: {e}")
+                raise TMDBAPIError(f"API Error: {e}", response.status_code) from e
+            except RequestException as e:
+                self._record(endpoint, time.perf_counter() - started, failed=True)
+                error = e
+            
+            if attempt == self.max_retries:
+                break
+            
+            if retry_after is not None:
+                delay = retry_after
+                self.rate_limiter.pause(delay)
+            else:
+                delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+            self._record_retry(endpoint)
+            logger.warning(f"Request to {endpoint} failed ({error}), retrying in {delay:.2f}s "
+                           f"(attempt {attempt + 1}/{self.max_retries})")
+            time.sleep(delay)
+        
+        # If there's an error, log it and raise our custom exception
+        logger.error(f"Error in request to {url}: {error}")
+        raise TMDBAPIError(f"API Error: {error}") from error
+    
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """
+        Parse a Retry-After header given either in seconds or as an HTTP date.
+        
+        Args:
+            value: Raw header value
+            
+        Returns:
+            Delay in seconds, or None if the header is missing or invalid
+        """
+        if not value:
+            return None
         try:
-            response = self.session.get(url, params=request_params, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except RequestException as e:
-            # If there's an error, log it and raise our custom exception
-            logger.error(f"Error in request to {url}: {e}")
-            raise TMDBAPIError(f"API Error: {e}") from e
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    
+    def _record(self, endpoint: str, latency: float, failed: bool) -> None:
+        """Add one attempt to the endpoint counters."""
+        with self._stats_lock:
+            stats = self.endpoint_stats.setdefault(endpoint_key(endpoint), EndpointStats())
+            stats.requests += 1
+            stats.total_latency += latency
+            if failed:
+                stats.errors += 1
+    
+    def _record_cache(self, endpoint: str, counter: str) -> None:
+        """Count a cache hit or a 304 revalidation for the endpoint."""
+        with self._stats_lock:
+            stats = self.endpoint_stats.setdefault(endpoint_key(endpoint), EndpointStats())
+            setattr(stats, counter, getattr(stats, counter) + 1)
+    
+    def _record_retry(self, endpoint: str) -> None:
+        """Count a retry for the endpoint."""
+        with self._stats_lock:
+            self.endpoint_stats.setdefault(endpoint_key(endpoint), EndpointStats()).retries += 1
+    
+    def log_request_stats(self) -> None:
+        """Log request, error, retry and latency counters per endpoint."""
+        with self._stats_lock:
+            for endpoint, stats in sorted(self.endpoint_stats.items()):
+                logger.info(f"{endpoint}: {stats.requests} requests, {stats.errors} errors, "
+                            f"{stats.retries} retries, {stats.cache_hits} cache hits, "
+                            f"{stats.revalidated} revalidated, "
+                            f"avg latency {stats.average_latency_ms:.0f} ms")
     
     def fetch_genre_map(self) -> Dict[int, str]:
         """
@@ -146,16 +501,29 @@ class TMDBClient:
             logger.error(f"Error getting genres: {e}")
             return {}
     
-    def fetch_movies(self, genre_map: Dict[int, str], max_results: int = MAX_RESULTS) -> List[Movie]:
+    def fetch_movies(self,
+                     genre_map: Dict[int, str],
+                     max_results: int = MAX_RESULTS,
+                     concurrency: int = 1,
+                     release_date_gte: Optional[datetime] = None,
+                     on_page: Optional[Callable[[List[Movie]], None]] = None,
+                     fresh: bool = False) -> List[Movie]:
         """
         Get movies from TMDB discovery API.
         
         Args:
             genre_map: Map of genre IDs to names
             max_results: Maximum number of results to obtain
+            concurrency: Number of pages requested in parallel (1 = sequential)
+            release_date_gte: Earliest release date (defaults to LOOKBACK_DAYS ago)
+            on_page: Called with each page of movies, in popularity order, as soon
+                as it can be emitted (e.g. a streaming exporter's write_movies).
+                Emitted pages are not kept, so memory stays bounded to a few pages
+            fresh: Revalidate cached discover pages instead of trusting their TTL
             
         Returns:
-            List of Movie objects
+            List of Movie objects, in popularity order (empty when on_page is given).
+            last_crawl_complete tells whether they cover the whole date window.
             
         Raises:
             ValueError: If no API key is configured
@@ -164,7 +532,7 @@ class TMDBClient:
             raise ValueError("TMDB_KEY environment variable not configured")
         
         today = datetime.now()
-        lookback_period = today - timedelta(days=LOOKBACK_DAYS)
+        lookback_period = release_date_gte or today - timedelta(days=LOOKBACK_DAYS)
         
         search_params = {
             "with_watch_providers": NETFLIX_PROVIDER_ID,
@@ -176,39 +544,305 @@ class TMDBClient:
             "page": 1
         }
         
-        movies_data: List[Movie] = []
         logger.info(f"Starting movie search, target: {max_results} results")
+        self.last_crawl_complete = False
+        
+        if concurrency > 1:
+            return self._fetch_movies_concurrently(genre_map, search_params, max_results, concurrency, on_page, fresh)
         
-        while len(movies_data) < max_results:
+        movies_data: List[Movie] = []
+        collected = 0
+        total_pages: Optional[int] = None
+        failed_pages: List[int] = []
+        while collected < max_results:
             try:
-                data = self._make_request("discover/movie", search_params)
+                data = self._make_request("discover/movie", search_params, fresh=fresh)
+                total_pages = data["total_pages"]
                 results = data.get("results", [])
                 
                 if not results:
                     logger.info("No more results found")
+                    self.last_crawl_complete = not failed_pages
                     break
                 
+                page_movies: List[Movie] = []
+                page_cut = False
                 for movie_json in results:
-                    if len(movies_data) >= max_results:
+                    if collected + len(page_movies) >= max_results:
+                        page_cut = True
                         break
                     
                     movie = self._create_movie_from_json(movie_json, genre_map)
                     if movie:
-                        movies_data.append(movie)
+                        page_movies.append(movie)
+                
+                collected += len(page_movies)
+                if not on_page:
+                    movies_data.extend(page_movies)
+                elif page_movies:
+                    on_page(page_movies)
                 
                 if data["page"] < data["total_pages"]:
                     search_params["page"] += 1
                 else:
                     logger.info("Reached last page of results")
+                    self.last_crawl_complete = not failed_pages and not page_cut
                     break
                     
             except TMDBAPIError as e:
+                # Retries are exhausted: skip this page unless we never learned the page count
                 logger.error(f"Error on page {search_params['page']}: {e}")
-                break
+                failed_pages.append(search_params["page"])
+                if total_pages is None or search_params["page"] >= min(total_pages, TMDB_MAX_PAGE):
+                    break
+                search_params["page"] += 1
         
-        logger.info(f"Search completed: {len(movies_data)} movies found")
+        logger.info(f"Search completed: {collected} movies found")
         return movies_data[:max_results]
     
+    def fetch_movie_batch(self,
+                          genre_map: Dict[int, str],
+                          max_results: int = MAX_RESULTS,
+                          concurrency: int = 1,
+                          release_date_gte: Optional[datetime] = None,
+                          fresh: bool = False) -> MovieBatch:
+        """
+        Get movies from TMDB discovery API as a columnar batch.
+        
+        Each page is appended to typed columns as it arrives, so only one
+        page of Movie objects exists at a time.
+        
+        Args:
+            genre_map: Map of genre IDs to names
+            max_results: Maximum number of results to obtain
+            concurrency: Number of pages requested in parallel (1 = sequential)
+            release_date_gte: Earliest release date (defaults to LOOKBACK_DAYS ago)
+            fresh: Revalidate cached discover pages instead of trusting their TTL
+            
+        Returns:
+            MovieBatch in popularity order
+        """
+        builder = MovieBatchBuilder()
+        self.fetch_movies(genre_map, max_results, concurrency, release_date_gte,
+                          on_page=builder.append_movies, fresh=fresh)
+        return builder.build()
+    
+    def _fetch_page(self,
+                    search_params: Dict,
+                    page: int,
+                    genre_map: Dict[int, str],
+                    fresh: bool = False) -> Tuple[List[Movie], int]:
+        """
+        Fetch a single discover page.
+        
+        Args:
+            search_params: Discover query parameters (the page is overridden)
+            page: Page number to fetch
+            genre_map: Map of genre IDs to names
+            fresh: Revalidate a cached page instead of trusting its TTL
+            
+        Returns:
+            Tuple of (movies on the page, total number of pages reported by TMDB)
+            
+        Raises:
+            TMDBAPIError: If the request fails
+        """
+        data = self._make_request("discover/movie", {**search_params, "page": page}, fresh=fresh)
+        movies = [
+            movie for movie in (
+                self._create_movie_from_json(movie_json, genre_map)
+                for movie_json in data.get("results", [])
+            )
+            if movie
+        ]
+        return movies, data.get("total_pages", page)
+    
+    def _fetch_movies_concurrently(self,
+                                   genre_map: Dict[int, str],
+                                   search_params: Dict,
+                                   max_results: int,
+                                   concurrency: int,
+                                   on_page: Optional[Callable[[List[Movie]], None]] = None,
+                                   fresh: bool = False) -> List[Movie]:
+        """
+        Fetch discover pages in parallel with a bounded number of in-flight requests.
+        
+        The first page is fetched alone to learn total_pages; the remaining pages
+        are requested in order through a sliding window, and no new page is
+        submitted once the pages already in hand or in flight cover max_results.
+        Pages are reassembled by number, so popularity ordering is preserved;
+        pages that still fail after retries are skipped.
+        
+        Args:
+            genre_map: Map of genre IDs to names
+            search_params: Discover query parameters
+            max_results: Maximum number of results to obtain
+            concurrency: Maximum number of requests in flight
+            on_page: Called with each page as soon as all earlier pages are in;
+                emitted pages are released instead of being returned
+            fresh: Revalidate cached pages instead of trusting their TTL
+            
+        Returns:
+            List of Movie objects, in popularity order
+        """
+        try:
+            first_page, total_pages = self._fetch_page(search_params, 1, genre_map, fresh)
+        except TMDBAPIError as e:
+            logger.error(f"Error on page 1: {e}")
+            return []
+        
+        pages: Dict[int, List[Movie]] = {1: first_page}
+        page_counts: Dict[int, int] = {1: len(first_page)}
+        per_page = max(len(first_page), 1)
+        last_page = min(total_pages, TMDB_MAX_PAGE)
+        logger.info(f"{total_pages} pages available, fetching with concurrency {concurrency}")
+        
+        def contiguous_count() -> int:
+            # Only pages without gaps before them can be returned in order
+            count, page = 0, 1
+            while page in pages or page in failed_pages:
+                count += page_counts.get(page, 0)
+                page += 1
+            return count
+        
+        failed_pages: List[int] = []
+        emitted = {"page": 0, "count": 0}
+        
+        def emit_ready(final: bool = False) -> None:
+            # Hand pages to on_page in order; gaps are only skipped once the crawl is over
+            if not on_page:
+                return
+            for page in sorted(p for p in set(pages) | set(failed_pages) if p > emitted["page"]):
+                if not final and page != emitted["page"] + 1:
+                    break
+                emitted["page"] = page
+                movies = pages.get(page, [])[:max_results - emitted["count"]]
+                if movies:
+                    on_page(movies)
+                    emitted["count"] += len(movies)
+                pages[page] = []
+        
+        next_page = 2
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            in_flight = {}
+            while True:
+                emit_ready()
+                expected = sum(page_counts.values()) + len(in_flight) * per_page
+                while (len(in_flight) < concurrency
+                       and next_page <= last_page
+                       and expected < max_results):
+                    future = executor.submit(self._fetch_page, search_params, next_page, genre_map, fresh)
+                    in_flight[future] = next_page
+                    next_page += 1
+                    expected += per_page
+                
+                if not in_flight or contiguous_count() >= max_results:
+                    break
+                
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page = in_flight.pop(future)
+                    try:
+                        pages[page] = future.result()[0]
+                        page_counts[page] = len(pages[page])
+                    except TMDBAPIError as e:
+                        # Retries are exhausted: skip the page and keep crawling
+                        logger.error(f"Error on page {page}: {e}")
+                        failed_pages.append(page)
+            
+            # Pages left unrequested or in flight were not needed because max_results was reached
+            truncated = bool(in_flight) or next_page <= last_page or sum(page_counts.values()) > max_results
+            for future in in_flight:
+                future.cancel()
+        emit_ready(final=True)
+        self.last_crawl_complete = not failed_pages and not truncated and total_pages <= TMDB_MAX_PAGE
+        
+        movies_data: List[Movie] = []
+        for page in sorted(pages):
+            movies_data.extend(pages[page])
+        
+        found = emitted["count"] if on_page else len(movies_data)
+        logger.info(f"Search completed: {min(found, max_results)} movies found")
+        return movies_data[:max_results]
+    
+    def fetch_changed_movie_ids(self, start: datetime, end: datetime, fresh: bool = False) -> List[int]:
+        """
+        Get IDs of movies changed on TMDB between two dates from the change feed.
+        
+        TMDB serves at most 14 days per request, so longer ranges are split.
+        
+        Args:
+            start: Start of the range
+            end: End of the range
+            fresh: Revalidate cached feed pages; the dates are day-granular, so a
+                cached page can miss changes made later the same day
+            
+        Returns:
+            Unique IDs of changed movies
+            
+        Raises:
+            TMDBAPIError: If the change feed cannot be fetched
+        """
+        changed_ids: Dict[int, None] = {}
+        window_start = start
+        while window_start < end:
+            window_end = min(window_start + timedelta(days=14), end)
+            page, total_pages = 1, 1
+            while page <= total_pages:
+                data = self._make_request("movie/changes", {
+                    "start_date": window_start.strftime('%Y-%m-%d'),
+                    "end_date": window_end.strftime('%Y-%m-%d'),
+                    "page": page,
+                }, fresh=fresh)
+                for change in data.get("results", []):
+                    if change.get("id") is not None:
+                        changed_ids[change["id"]] = None
+                total_pages = data.get("total_pages", page)
+                page += 1
+            window_start = window_end
+        logger.info(f"Change feed reports {len(changed_ids)} changed movies")
+        return list(changed_ids)
+    
+    def fetch_movie_details(self, movie_id: int, genre_map: Dict[int, str], fresh: bool = False) -> Optional[Movie]:
+        """
+        Get a single movie, or None if it no longer exists on TMDB.
+        
+        Args:
+            movie_id: TMDB movie ID
+            genre_map: Map of genre IDs to names
+            fresh: Revalidate a cached response, e.g. after the change feed reported the movie
+            
+        Returns:
+            Movie object or None if not found
+            
+        Raises:
+            TMDBAPIError: If the request fails for a reason other than 404
+        """
+        try:
+            movie_json = self._make_request(f"movie/{movie_id}", fresh=fresh)
+        except TMDBAPIError as e:
+            if e.status_code == 404:
+                return None
+            raise
+        # Details return genres as objects; discover returns genre_ids
+        movie_json["genre_ids"] = [genre["id"] for genre in movie_json.get("genres", [])]
+        return self._create_movie_from_json(movie_json, genre_map)
+    
+    def is_on_netflix(self, movie_id: int, fresh: bool = False) -> bool:
+        """
+        Check whether a movie is currently streamed on Netflix in WATCH_REGION.
+        
+        Args:
+            movie_id: TMDB movie ID
+            fresh: Revalidate a cached response instead of trusting its TTL
+            
+        Returns:
+            True if Netflix is one of its flatrate providers
+        """
+        data = self._make_request(f"movie/{movie_id}/watch/providers", fresh=fresh)
+        providers = data.get("results", {}).get(WATCH_REGION, {}).get("flatrate", [])
+        return any(str(provider.get("provider_id")) == NETFLIX_PROVIDER_ID for provider in providers)
+    
     def _create_movie_from_json(self, movie_json: Dict, genre_map: Dict[int, str]) -> Optional[Movie]:
         """
         Create Movie object from API JSON data.
@@ -251,6 +885,160 @@ class TMDBClient:
             return None
 
 
+def release_date_to_timestamp(release_date: str) -> Optional[int]:
+    """
+    Convert a YYYY-MM-DD release date to a Unix timestamp (UTC midnight).
+    
+    Args:
+        release_date: Release date string, or "N/A"/empty when unknown
+        
+    Returns:
+        Seconds since the epoch, or None if the date is missing or malformed
+    """
+    try:
+        return int(datetime.strptime(release_date, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+class MovieCSVWriter:
+    """
+    Streaming CSV writer that appends movies as pages arrive.
+    
+    Rows are flushed after every batch, so a crawl that dies halfway still
+    leaves a valid CSV with every page fetched so far.
+    """
+    
+    def __init__(self, filename: str | Path):
+        """
+        Open the output file and write the header.
+        
+        Args:
+            filename: Output filename (can be string or Path)
+            
+        Raises:
+            IOError: If the file cannot be created
+        """
+        self.output_path = Path(filename)
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.rows_written = 0
+        self._file = open(self.output_path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=[field.name for field in fields(Movie)])
+        self._writer.writeheader()
+    
+    def write_movies(self, movies: List[Movie]) -> None:
+        """
+        Append a batch of movies and flush it to disk.
+        
+        Args:
+            movies: Movies to append
+        """
+        self._writer.writerows(asdict(movie) for movie in movies)
+        self._file.flush()
+        self.rows_written += len(movies)
+    
+    def close(self) -> None:
+        """Close the output file."""
+        self._file.close()
+        logger.info(f"Successfully saved {self.rows_written} movies to {self.output_path}")
+    
+    def __enter__(self) -> "MovieCSVWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.close()
+
+
+class MovieParquetWriter:
+    """
+    Streaming Parquet writer with typed columns, one row group per batch.
+    
+    release_date is stored as an int64 Unix timestamp (null when unknown) and
+    genres as a list of strings, so readers get native columns instead of
+    re-parsing text.
+    """
+    
+    SCHEMA = pa.schema([
+        ("id", pa.int64()),
+        ("title", pa.string()),
+        ("original_title", pa.string()),
+        ("overview", pa.string()),
+        ("release_date", pa.int64()),
+        ("vote_average", pa.float64()),
+        ("vote_count", pa.int64()),
+        ("popularity", pa.float64()),
+        ("original_language", pa.string()),
+        ("genres", pa.list_(pa.string())),
+        ("poster_url", pa.string()),
+    ]) if pa else None
+    
+    def __init__(self, filename: str | Path):
+        """
+        Open the output file.
+        
+        Args:
+            filename: Output filename (can be string or Path)
+            
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        if pa is None:
+            raise ImportError("pyarrow is required for Parquet export (pip install pyarrow)")
+        self.output_path = Path(filename)
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.rows_written = 0
+        self._writer = pq.ParquetWriter(self.output_path, self.SCHEMA, compression="zstd")
+    
+    @classmethod
+    def to_record_batch(cls, movies: List[Movie]) -> "pa.RecordBatch":
+        """
+        Convert movies to a typed Arrow record batch.
+        
+        Args:
+            movies: Movies to convert
+            
+        Returns:
+            Record batch following SCHEMA
+        """
+        columns = {
+            "id": [movie.id for movie in movies],
+            "title": [movie.title for movie in movies],
+            "original_title": [movie.original_title for movie in movies],
+            "overview": [movie.overview for movie in movies],
+            "release_date": [release_date_to_timestamp(movie.release_date) for movie in movies],
+            "vote_average": [movie.vote_average for movie in movies],
+            "vote_count": [movie.vote_count for movie in movies],
+            "popularity": [movie.popularity for movie in movies],
+            "original_language": [movie.original_language for movie in movies],
+            "genres": [[genre for genre in movie.genres.split(", ") if genre] for movie in movies],
+            "poster_url": [movie.poster_url for movie in movies],
+        }
+        return pa.RecordBatch.from_pydict(columns, schema=cls.SCHEMA)
+    
+    def write_movies(self, movies: List[Movie]) -> None:
+        """
+        Append a batch of movies as a new row group.
+        
+        Args:
+            movies: Movies to append
+        """
+        if not movies:
+            return
+        self._writer.write_batch(self.to_record_batch(movies))
+        self.rows_written += len(movies)
+    
+    def close(self) -> None:
+        """Write the Parquet footer and close the file."""
+        self._writer.close()
+        logger.info(f"Successfully saved {self.rows_written} movies to {self.output_path}")
+    
+    def __enter__(self) -> "MovieParquetWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.close()
+
+
 class MovieDataExporter:
     """
     Class to export movie data to different formats.
@@ -273,29 +1061,33 @@ class MovieDataExporter:
             logger.warning("No movies to save")
             return
         
-        fieldnames = [field.name for field in fields(Movie)]
-        
         try:
-            # Convert filename to Path if it's a string
-            output_path = Path(filename) if isinstance(filename, str) else filename
-            # Create directory if it doesn't exist (mkdir -p equivalent)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(output_path, "w", newline="", encoding="utf-8") as file:
-                # Create CSV writer with field names
-                writer = csv.DictWriter(file, fieldnames=fieldnames)
-                # Write header (first row with column names)
-                writer.writeheader()
-                
-                for movie in movies:
-                    # Convert Movie object to dictionary and write it
-                    writer.writerow(asdict(movie))
-            
-            logger.info(f"Successfully saved {len(movies)} movies to {output_path}")
+            with MovieCSVWriter(filename) as writer:
+                writer.write_movies(movies)
             
         except IOError as e:
             logger.error(f"Error saving CSV file {filename}: {e}")
             raise
+    
+    @staticmethod
+    def save_to_parquet(movies: List[Movie], filename: str | Path) -> None:
+        """
+        Save a list of movies to a Parquet file with typed columns.
+        
+        Args:
+            movies: List of Movie objects
+            filename: Output filename (can be string or Path)
+            
+        Raises:
+            ImportError: If pyarrow is not installed
+            IOError: If there's an error writing the file
+        """
+        if not movies:
+            logger.warning("No movies to save")
+            return
+        
+        with MovieParquetWriter(filename) as writer:
+            writer.write_movies(movies)
 
 
 def main() -> None:
@@ -310,15 +1102,29 @@ def main() -> None:
             logger.error("TMDB_KEY environment variable not configured")
             raise SystemExit(1)
         
-        client = TMDBClient(API_KEY)
+        client = TMDBClient(API_KEY, cache=TMDBResponseCache())
         
         genre_map = client.fetch_genre_map()
         if not genre_map:
             genre_map = {}
         
-        movies = client.fetch_movies(genre_map)
+        # Each page is written as soon as it arrives instead of after the whole crawl
+        writers = [MovieCSVWriter(OUTPUT_CSV_FILE)]
+        if pa is not None:
+            writers.append(MovieParquetWriter(OUTPUT_PARQUET_FILE))
+        else:
+            logger.info("pyarrow not installed, skipping Parquet export")
+        
+        def write_page(movies: List[Movie]) -> None:
+            for writer in writers:
+                writer.write_movies(movies)
         
-        MovieDataExporter.save_to_csv(movies, OUTPUT_CSV_FILE)
+        try:
+            client.fetch_movies(genre_map, concurrency=MAX_CONCURRENT_REQUESTS, on_page=write_page)
+        finally:
+            for writer in writers:
+                writer.close()
+        client.log_request_stats()
         
         logger.info("Process completed successfully")
         
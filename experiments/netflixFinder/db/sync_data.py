@@ -0,0 +1,319 @@
+"""
+Incremental TMDB → ChromaDB sync for the "content" collection.
+
+Instead of recrawling the whole lookback window and re-upserting every row
+(search_data.py → netflix_movies.csv → load_data_to_chroma.py), this script
+remembers the last sync time and two hashes of every stored row, then:
+
+1. Reads the TMDB change feed since the last sync and re-fetches only the
+   tracked movies that changed, deleting the ones that disappeared, left
+   Netflix or fell out of the lookback window.
+2. Crawls discover only for releases since the last sync to pick up new titles.
+3. Re-embeds a movie only when its document text changed (content hash).
+   When only metadata changed, such as popularity or vote counts that move on
+   almost every pull, the metadata is updated in place without an embedding call.
+
+Run with --full to diff a complete crawl against the stored hashes instead.
+Stale movies are only deleted after a crawl that fetched every page.
+"""
+import argparse
+import hashlib
+import json
+import logging
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Any, Tuple
+
+from facet_stats import delete_with_facets, update_metadata_with_facets, upsert_with_facets
+from load_data_to_chroma import build_content_item, collection, facet_stats
+from movie_batch import MovieRow
+from search_data import (
+    API_KEY,
+    LOOKBACK_DAYS,
+    MAX_CONCURRENT_REQUESTS,
+    TMDB_MAX_PAGE,
+    Movie,
+    TMDBAPIError,
+    TMDBClient,
+    TMDBResponseCache,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SYNC_STATE_FILE = Path(__file__).parent / "sync_state.json"
+# Re-scan a little before the last sync so late-indexed releases are not missed
+SYNC_OVERLAP_DAYS = 2
+# Everything discover can serve (20 results per page); a lower cap would make
+# every full crawl look incomplete and disable deletions
+FULL_SYNC_MAX_RESULTS = TMDB_MAX_PAGE * 20
+
+
+def build_movie_item(movie: Movie | MovieRow) -> Dict[str, Any]:
+    """
+    Build the ChromaDB record of a movie, as the loader stores it.
+
+    Args:
+        movie: Movie, or a row of a crawled MovieBatch
+
+    Returns:
+        Dictionary with "id", "document" and "metadata" keys
+    """
+    values = movie.as_dict() if isinstance(movie, MovieRow) else asdict(movie)
+    return build_content_item({k: str(v) for k, v in values.items()})
+
+
+def item_hashes(item: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Hash the embedded document and the metadata of a record separately.
+
+    Args:
+        item: Record from build_movie_item
+
+    Returns:
+        Dictionary with "content_hash" (document text) and "metadata_hash"
+    """
+    metadata = json.dumps(item["metadata"], sort_keys=True, ensure_ascii=False)
+    return {
+        "content_hash": hashlib.sha256(item["document"].encode("utf-8")).hexdigest(),
+        "metadata_hash": hashlib.sha256(metadata.encode("utf-8")).hexdigest(),
+    }
+
+
+def load_sync_state(path: Path = SYNC_STATE_FILE) -> Dict[str, Any]:
+    """
+    Load the last sync time and the tracked row hashes.
+
+    Args:
+        path: State file location
+
+    Returns:
+        State with "last_sync" (ISO string or None) and
+        "movies" ({id: {content_hash, metadata_hash, release_date}})
+    """
+    if not path.exists():
+        return {"last_sync": None, "movies": {}}
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_sync_state(state: Dict[str, Any], path: Path = SYNC_STATE_FILE) -> None:
+    """
+    Persist the sync state atomically.
+
+    Args:
+        state: State to save
+        path: State file location
+    """
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(state, file)
+    tmp_path.replace(path)
+
+
+def apply_deltas(state: Dict[str, Any],
+                 content_changed: List[Tuple[Movie | MovieRow, Dict[str, Any]]],
+                 metadata_changed: List[Tuple[Movie | MovieRow, Dict[str, Any]]],
+                 removed_ids: List[str]) -> None:
+    """
+    Apply the differences to ChromaDB, then update the state.
+
+    Args:
+        state: Sync state, updated in place
+        content_changed: (movie, record) pairs that are new or whose document changed;
+            these are upserted and re-embedded
+        metadata_changed: (movie, record) pairs whose document is unchanged; only
+            their metadata is updated, without an embedding call
+        removed_ids: IDs of movies to delete
+    """
+    if content_changed:
+        items = [item for _, item in content_changed]
+        upsert_with_facets(
+            collection,
+            facet_stats,
+            [item["id"] for item in items],
+            [item["document"] for item in items],
+            [item["metadata"] for item in items]
+        )
+
+    if metadata_changed:
+        items = [item for _, item in metadata_changed]
+        update_metadata_with_facets(
+            collection,
+            facet_stats,
+            [item["id"] for item in items],
+            [item["metadata"] for item in items]
+        )
+
+    for movie, item in content_changed + metadata_changed:
+        state["movies"][str(movie.id)] = {**item_hashes(item), "release_date": movie.release_date}
+
+    if removed_ids:
+        delete_with_facets(collection, facet_stats, removed_ids)
+        for movie_id in removed_ids:
+            state["movies"].pop(movie_id, None)
+
+    logger.info(f"Re-embedded {len(content_changed)} movies, updated metadata of "
+                f"{len(metadata_changed)} movies, deleted {len(removed_ids)} movies")
+
+
+def select_changed(state: Dict[str, Any],
+                   movies: Iterable[Movie | MovieRow]) -> Tuple[List[Tuple[Movie | MovieRow, Dict[str, Any]]],
+                                                               List[Tuple[Movie | MovieRow, Dict[str, Any]]]]:
+    """
+    Split movies into those needing an upsert and those needing only a metadata update.
+
+    Args:
+        state: Sync state with the stored hashes
+        movies: Candidate movies (Movie objects or MovieBatch rows)
+
+    Returns:
+        Tuple of (content_changed, metadata_changed) lists of (movie, record) pairs;
+        unchanged movies are in neither
+    """
+    content_changed = []
+    metadata_changed = []
+    for movie in movies:
+        item = build_movie_item(movie)
+        hashes = item_hashes(item)
+        stored = state["movies"].get(str(movie.id), {})
+        if stored.get("content_hash") != hashes["content_hash"]:
+            content_changed.append((movie, item))
+        elif stored.get("metadata_hash") != hashes["metadata_hash"]:
+            metadata_changed.append((movie, item))
+    return content_changed, metadata_changed
+
+
+def full_sync(client: TMDBClient,
+              state: Dict[str, Any],
+              genre_map: Dict[int, str],
+              max_results: int = FULL_SYNC_MAX_RESULTS) -> None:
+    """
+    Crawl the whole lookback window and apply only the differences.
+
+    Args:
+        client: TMDB client
+        state: Sync state, updated in place
+        genre_map: Map of genre IDs to names
+        max_results: Crawl cap; stale movies are only deleted if the catalog fits in it
+    """
+    # Columnar, so a full catalog does not cost one Movie object per title
+    movies = client.fetch_movie_batch(genre_map, max_results=max_results,
+                                      concurrency=MAX_CONCURRENT_REQUESTS, fresh=True)
+    content_changed, metadata_changed = select_changed(state, movies)
+
+    # A movie missing from the crawl is only known to be gone if every page was fetched
+    removed_ids: List[str] = []
+    if client.last_crawl_complete:
+        crawled_ids = {str(movie_id) for movie_id in movies.columns["id"]}
+        stored_ids = set(collection.get(include=[])["ids"]) | set(state["movies"])
+        removed_ids = sorted(stored_ids - crawled_ids)
+    else:
+        logger.error("Crawl was incomplete (pages failed or max_results was reached), skipping deletions")
+
+    apply_deltas(state, content_changed, metadata_changed, removed_ids)
+
+
+def incremental_sync(client: TMDBClient,
+                     state: Dict[str, Any],
+                     genre_map: Dict[int, str],
+                     now: datetime) -> None:
+    """
+    Apply TMDB changes since the last sync plus newly released titles.
+
+    Args:
+        client: TMDB client
+        state: Sync state with "last_sync" set, updated in place
+        genre_map: Map of genre IDs to names
+        now: Time of this sync
+    """
+    last_sync = datetime.fromisoformat(state["last_sync"])
+    window_start = (now - timedelta(days=LOOKBACK_DAYS)).strftime('%Y-%m-%d')
+
+    changed: Dict[int, Movie] = {}
+    removed_ids = set()
+
+    # 1. Tracked movies reported by the change feed
+    tracked_ids = set(state["movies"])
+    # Cached responses may predate the change, so every sync request is revalidated;
+    # otherwise the old body hashes the same and the change is lost once last_sync moves
+    for movie_id in client.fetch_changed_movie_ids(last_sync, now, fresh=True):
+        if str(movie_id) not in tracked_ids:
+            continue
+        movie = client.fetch_movie_details(movie_id, genre_map, fresh=True)
+        if movie is None or not client.is_on_netflix(movie_id, fresh=True):
+            removed_ids.add(str(movie_id))
+        else:
+            changed[movie.id] = movie
+
+    # 2. Titles released since the last sync
+    new_releases = client.fetch_movies(
+        genre_map,
+        concurrency=MAX_CONCURRENT_REQUESTS,
+        release_date_gte=last_sync - timedelta(days=SYNC_OVERLAP_DAYS),
+        fresh=True,
+    )
+    for movie in new_releases:
+        changed.setdefault(movie.id, movie)
+
+    # 3. Movies that fell out of the lookback window
+    for movie_id, tracked in state["movies"].items():
+        if tracked.get("release_date", "") < window_start:
+            removed_ids.add(movie_id)
+    for movie in list(changed.values()):
+        if movie.release_date < window_start:
+            changed.pop(movie.id)
+            removed_ids.add(str(movie.id))
+
+    apply_deltas(state, *select_changed(state, list(changed.values())), sorted(removed_ids))
+
+
+def main() -> None:
+    """
+    Run an incremental sync, or a full diff sync on the first run or with --full.
+
+    Raises:
+        SystemExit: If there are critical execution errors
+    """
+    parser = argparse.ArgumentParser(description="Sync TMDB Netflix movies into ChromaDB")
+    parser.add_argument("--full", action="store_true", help="diff a full crawl instead of using the change feed")
+    parser.add_argument("--max-results", type=int, default=FULL_SYNC_MAX_RESULTS,
+                        help="cap of the full crawl (deletions are skipped if the catalog is larger)")
+    args = parser.parse_args()
+
+    if not API_KEY:
+        logger.error("TMDB_KEY environment variable not configured")
+        raise SystemExit(1)
+
+    try:
+        client = TMDBClient(API_KEY, cache=TMDBResponseCache())
+        genre_map = client.fetch_genre_map()
+        state = load_sync_state()
+        now = datetime.now()
+        if not facet_stats.exists() and collection.count():
+            facet_stats.rebuild(collection)
+
+        if args.full or not state["last_sync"]:
+            logger.info("Running full sync")
+            full_sync(client, state, genre_map, max_results=args.max_results)
+        else:
+            logger.info(f"Running incremental sync since {state['last_sync']}")
+            incremental_sync(client, state, genre_map, now)
+
+        state["last_sync"] = now.isoformat()
+        save_sync_state(state)
+        client.log_request_stats()
+        logger.info(f"Sync completed, collection now contains {collection.count()} documents")
+
+    except TMDBAPIError as e:
+        # State is only saved after a successful sync, so the next run retries the same range
+        logger.error(f"Sync failed: {e}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
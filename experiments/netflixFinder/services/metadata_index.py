@@ -0,0 +1,373 @@
+"""
+In-memory columnar index of the content metadata.
+
+Numeric fields are held as NumPy arrays and every genre as a packed bitset
+over the records, so filters and facet counts over the whole collection are
+a few vectorized passes (about 5 ms for 1M records) instead of reading every
+matching metadata from ChromaDB. Filter-only browsing ranks from presorted
+row orders without any query to ChromaDB. The index is built with paged
+metadata reads and rebuilt when the collection changes.
+"""
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# vote_average buckets: [0, 1), [1, 2), ... [9, 10], as in db/facet_stats.py
+RATING_BUCKETS = 10
+UNKNOWN_DATE = np.iinfo(np.int64).min
+# Columns browse results can be sorted by
+SORT_FIELDS = ("popularity", "vote_average", "vote_count", "release_date")
+
+
+def _to_timestamp(value: Any) -> Optional[int]:
+    # Full metadata stores "YYYY-MM-DD", compact metadata a timestamp
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        return int(datetime.strptime(value, "%Y-%m-%d").timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def _pack(mask: np.ndarray) -> np.ndarray:
+    """Pack a boolean mask into uint64 words (zero padded)."""
+    packed = np.packbits(mask)
+    padded = np.zeros(-(-packed.size // 8) * 8, dtype=np.uint8)
+    padded[:packed.size] = packed
+    return padded.view(np.uint64)
+
+
+class MetadataIndex:
+    """
+    Column arrays for every record of the collection.
+
+    Attributes:
+        ids: Record IDs (int64 when all IDs are numeric, object otherwise)
+        vote_average, vote_count, popularity: Numeric columns
+        release_date: Release timestamps (UNKNOWN_DATE when unknown)
+        genre_bitsets: Row i is the packed bitset of records having genre_names[i]
+        content_type, language: Codes into content_types / languages
+        year_rating: Combined facet code, (year slot) * RATING_BUCKETS + rating bucket,
+            where year slot 0 is an unknown year and slot k is first_year + k - 1
+        version: Collection version the index was built from
+    """
+
+    def __init__(self, metadatas: List[Dict[str, Any]], ids: List[str], version: Any = None):
+        """
+        Build the columns from raw metadata.
+
+        Args:
+            metadatas: Metadata of every record
+            ids: Matching record IDs
+            version: Opaque marker of the collection state (see collection_version)
+        """
+        self.version = version
+        size = len(ids)
+        try:
+            self.ids = np.fromiter((int(content_id) for content_id in ids), dtype=np.int64, count=size)
+        except ValueError:
+            self.ids = np.array(ids, dtype=object)
+
+        self.vote_average = np.zeros(size, dtype=np.float32)
+        self.vote_count = np.zeros(size, dtype=np.int32)
+        self.popularity = np.zeros(size, dtype=np.float32)
+        self.release_date = np.full(size, UNKNOWN_DATE, dtype=np.int64)
+        self.content_type = np.zeros(size, dtype=np.uint8)
+        self.language = np.zeros(size, dtype=np.uint16)
+        years = np.zeros(size, dtype=np.int32)
+
+        self.genre_names: List[str] = []
+        self.content_types: List[str] = []
+        self.languages: List[str] = []
+        genre_rows: Dict[str, List[int]] = {}
+        content_type_codes: Dict[str, int] = {}
+        language_codes: Dict[str, int] = {}
+
+        for row, metadata in enumerate(metadatas):
+            metadata = metadata or {}
+            self.vote_average[row] = float(metadata.get("vote_average", 0.0) or 0.0)
+            self.vote_count[row] = int(metadata.get("vote_count", 0) or 0)
+            self.popularity[row] = float(metadata.get("popularity", 0.0) or 0.0)
+
+            timestamp = _to_timestamp(metadata.get("release_date"))
+            if timestamp is not None:
+                self.release_date[row] = timestamp
+                years[row] = datetime.fromtimestamp(timestamp).year
+
+            genres = metadata.get("genres", "")
+            if isinstance(genres, str):
+                genres = [genre for genre in genres.split(", ") if genre]
+            for genre in genres:
+                genre_rows.setdefault(genre, []).append(row)
+
+            content_type = metadata.get("content_type", "unknown")
+            if content_type not in content_type_codes:
+                content_type_codes[content_type] = len(self.content_types)
+                self.content_types.append(content_type)
+            self.content_type[row] = content_type_codes[content_type]
+
+            language = metadata.get("original_language", "unknown")
+            if language not in language_codes:
+                language_codes[language] = len(self.languages)
+                self.languages.append(language)
+            self.language[row] = language_codes[language]
+
+        self.genre_names = list(genre_rows)
+        self._genre_codes = {genre: code for code, genre in enumerate(self.genre_names)}
+        self._content_type_codes = content_type_codes
+        self.genre_bitsets = np.zeros((len(self.genre_names), -(-size // 64)), dtype=np.uint64)
+        for code, rows in enumerate(genre_rows.values()):
+            has_genre = np.zeros(size, dtype=bool)
+            has_genre[rows] = True
+            self.genre_bitsets[code] = _pack(has_genre)
+
+        known = years > 0
+        self.first_year = int(years[known].min()) if known.any() else 0
+        self.year_slots = int(years.max()) - self.first_year + 2 if known.any() else 1
+        year_slot = np.where(known, years - self.first_year + 1, 0)
+        rating_bucket = np.clip(self.vote_average.astype(np.intp), 0, RATING_BUCKETS - 1)
+        self.year_rating = (year_slot * RATING_BUCKETS + rating_bucket).astype(np.intp)
+
+        # Row order per (sort field, descending), computed on first use
+        self._sort_orders: Dict[Any, np.ndarray] = {}
+
+    @classmethod
+    def from_collection(cls, collection: Any, version: Any = None, page_size: int = 5000) -> "MetadataIndex":
+        """
+        Build the index from every record of a ChromaDB collection.
+
+        Args:
+            collection: ChromaDB collection
+            version: Opaque marker of the collection state
+            page_size: Records read per get call
+
+        Returns:
+            New MetadataIndex
+        """
+        started = time.perf_counter()
+        ids: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            page_ids = page.get("ids") or []
+            if not page_ids:
+                break
+            ids.extend(page_ids)
+            metadatas.extend(page.get("metadatas") or [{} for _ in page_ids])
+            offset += len(page_ids)
+        index = cls(metadatas, ids, version)
+        logger.info(f"Built metadata index for {len(index)} records in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return index
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the column arrays."""
+        columns = [self.vote_average, self.vote_count, self.popularity, self.release_date,
+                   self.genre_bitsets, self.content_type, self.language, self.year_rating]
+        return sum(column.nbytes for column in columns) + (self.ids.nbytes if self.ids.dtype != object else 0)
+
+    def genre_mask(self, genres: List[str]) -> np.ndarray:
+        """
+        Records having any of the given genres (unknown names are ignored).
+
+        Args:
+            genres: Genre names
+
+        Returns:
+            Boolean mask over the records
+        """
+        bitset = np.zeros(self.genre_bitsets.shape[1], dtype=np.uint64)
+        for genre in genres:
+            code = self._genre_codes.get(genre)
+            if code is not None:
+                bitset |= self.genre_bitsets[code]
+        return np.unpackbits(bitset.view(np.uint8), count=len(self)).view(bool)
+
+    def filter(self,
+               release_date_start: Optional[int] = None,
+               release_date_end: Optional[int] = None,
+               vote_average_min: Optional[float] = None,
+               vote_average_max: Optional[float] = None,
+               vote_count_min: Optional[int] = None,
+               vote_count_max: Optional[int] = None,
+               popularity_min: Optional[float] = None,
+               popularity_max: Optional[float] = None,
+               genres: Optional[List[str]] = None,
+               content_type: Optional[str] = None) -> np.ndarray:
+        """
+        Evaluate the search filters over every record.
+
+        Args:
+            release_date_start: Earliest release timestamp
+            release_date_end: Latest release timestamp
+            vote_average_min: Minimum vote average
+            vote_average_max: Maximum vote average
+            vote_count_min: Minimum vote count
+            vote_count_max: Maximum vote count
+            popularity_min: Minimum popularity
+            popularity_max: Maximum popularity
+            genres: Records having any of these genres match
+            content_type: Content type to match
+
+        Returns:
+            Boolean mask of matching records
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if release_date_start is not None:
+            mask &= self.release_date >= release_date_start
+        if release_date_end is not None:
+            mask &= (self.release_date <= release_date_end) & (self.release_date != UNKNOWN_DATE)
+        if vote_average_min is not None:
+            mask &= self.vote_average >= vote_average_min
+        if vote_average_max is not None:
+            mask &= self.vote_average <= vote_average_max
+        if vote_count_min is not None:
+            mask &= self.vote_count >= vote_count_min
+        if vote_count_max is not None:
+            mask &= self.vote_count <= vote_count_max
+        if popularity_min is not None:
+            mask &= self.popularity >= popularity_min
+        if popularity_max is not None:
+            mask &= self.popularity <= popularity_max
+        if genres:
+            mask &= self.genre_mask(genres)
+        if content_type:
+            code = self._content_type_codes.get(content_type)
+            if code is None:
+                mask[:] = False
+            else:
+                mask &= self.content_type == code
+        return mask
+
+    def sorted_rows(self, sort_by: str, descending: bool = True) -> np.ndarray:
+        """
+        All rows ordered by a column; records without a release date sort last.
+
+        Args:
+            sort_by: One of SORT_FIELDS
+            descending: Largest values first
+
+        Returns:
+            Row positions (int32), cached for later calls
+
+        Raises:
+            ValueError: If sort_by is not one of SORT_FIELDS
+        """
+        if sort_by not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort by {sort_by!r}, expected one of {', '.join(SORT_FIELDS)}")
+        key = (sort_by, descending)
+        order = self._sort_orders.get(key)
+        if order is None:
+            values = getattr(self, sort_by).astype(np.float64)
+            if sort_by == "release_date":
+                values[self.release_date == UNKNOWN_DATE] = -np.inf if descending else np.inf
+            order = np.argsort(-values if descending else values, kind="stable").astype(np.int32)
+            self._sort_orders[key] = order
+        return order
+
+    def top(self, mask: np.ndarray, sort_by: str = "popularity", n: int = 10, descending: bool = True) -> np.ndarray:
+        """
+        First n selected rows in sort order.
+
+        Walks the presorted rows in growing chunks and stops once n matches are
+        found, so unselective filters only touch the head of the order.
+
+        Args:
+            mask: Boolean mask of the records to consider (e.g. from filter())
+            sort_by: One of SORT_FIELDS
+            n: Number of rows to return
+            descending: Largest values first
+
+        Returns:
+            Row positions of at most n records
+        """
+        order = self.sorted_rows(sort_by, descending)
+        chunk = max(4 * n, 1024)
+        start = 0
+        found = 0
+        hits = []
+        while start < len(order) and found < n:
+            rows = order[start:start + chunk]
+            rows = rows[mask[rows]]
+            hits.append(rows)
+            found += rows.size
+            start += chunk
+            chunk *= 2
+        return np.concatenate(hits)[:n] if hits else np.empty(0, dtype=np.int32)
+
+    def ids_at(self, rows: np.ndarray) -> List[str]:
+        """
+        Record IDs of rows, as stored in ChromaDB.
+
+        Args:
+            rows: Row positions
+
+        Returns:
+            ID strings
+        """
+        return [str(content_id) for content_id in self.ids[rows]]
+
+    def facet_counts(self, mask: np.ndarray) -> Dict[str, Any]:
+        """
+        Count genres, release years and vote_average buckets over the selected records.
+
+        Args:
+            mask: Boolean mask of the records to count (e.g. from filter())
+
+        Returns:
+            Dictionary with "total", "genres", "years" and "rating_histogram"
+        """
+        # Genres: popcount of each genre bitset intersected with the packed mask
+        genre_totals = np.bitwise_count(self.genre_bitsets & _pack(mask)).sum(axis=1, dtype=np.int64)
+        genre_counts = {
+            self.genre_names[code]: int(genre_totals[code])
+            for code in np.argsort(-genre_totals, kind="stable") if genre_totals[code]
+        }
+
+        # Years and ratings: one bincount over the combined code (gathering by
+        # position is faster than boolean indexing for masks of mixed density)
+        rows = np.flatnonzero(mask)
+        year_rating = np.bincount(self.year_rating[rows], minlength=self.year_slots * RATING_BUCKETS)
+        year_rating = year_rating.reshape(self.year_slots, RATING_BUCKETS)
+        year_totals = year_rating[1:].sum(axis=1)
+        year_counts = {
+            str(self.first_year + offset): int(count) for offset, count in enumerate(year_totals) if count
+        }
+        rating_counts = year_rating.sum(axis=0)
+        return {
+            "total": int(rows.size),
+            "genres": genre_counts,
+            "years": year_counts,
+            "rating_histogram": {
+                f"{bucket}-{bucket + 1}": int(count) for bucket, count in enumerate(rating_counts)
+            },
+        }
+
+
+def collection_version(collection: Any, facets_path: Path) -> Any:
+    """
+    Cheap marker that changes whenever the collection is written.
+
+    Writes through the loaders and the service update the facet counter file
+    (see db/facet_stats.py), so its modification time plus the record count
+    identify the collection state without reading it.
+
+    Args:
+        collection: ChromaDB collection
+        facets_path: Facet counter file
+
+    Returns:
+        Hashable version marker
+    """
+    mtime = facets_path.stat().st_mtime_ns if facets_path.exists() else None
+    return collection.count(), mtime
@@ -1,13 +1,24 @@
 import logging
 import os
+import sys
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Tuple, Union
 
 import chromadb
 from chromadb.utils import embedding_functions
 from dotenv import load_dotenv
 
+# Add the db directory to the path to share the facet counters with the loaders
+sys.path.append(str(Path(__file__).parent.parent / "db"))
+
+from facet_stats import FacetStats, facets_path_for, upsert_with_facets
+from metadata_index import SORT_FIELDS, MetadataIndex, collection_version
+from mmr import mmr_select
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -18,6 +29,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Maximum number of records (document + metadata) kept in the in-process cache
+RECORD_CACHE_SIZE = 2048
+# MMR reranks this many candidates per requested result by default
+MMR_POOL_FACTOR = 4
+# Seconds the collection version is trusted before asking ChromaDB again, so
+# cache hits do not each cost a count() call; writes from other processes
+# become visible after at most this long
+VERSION_CHECK_INTERVAL = 1.0
+
 class NetflixFinderService:
     """
     Generic service for searching Netflix content using ChromaDB.
@@ -55,6 +75,7 @@ class NetflixFinderService:
         
         self.chroma_client = chromadb.PersistentClient(path=str(chroma_db_path))
         logger.info(f"Using ChromaDB path: {chroma_db_path}")
+        self.facets_path = facets_path_for(chroma_db_path)
         
         # Get or create collection
         self.collection = self.chroma_client.get_or_create_collection(
@@ -62,6 +83,20 @@ class NetflixFinderService:
             embedding_function=self.openai_ef  # Specify to use OpenAI embedding function
         )
         
+        # LRU cache of full records by ID, shared by hydrate() and eager searches
+        self._record_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._record_cache_lock = threading.Lock()
+        # Collection version the cached records were read under
+        self._record_cache_version: Any = None
+        # (monotonic time, version) of the last collection version check
+        self._version_check: Optional[Tuple[float, Any]] = None
+        self.record_cache_hits = 0
+        self.record_cache_misses = 0
+        
+        # Columnar copy of all metadata for facet counts, built on first use
+        self._metadata_index: Optional[MetadataIndex] = None
+        self._metadata_index_lock = threading.Lock()
+        
         logger.info(f"NetflixFinder service initialized with collection: {self.collection.name}")
     
     def _convert_date_to_timestamp(self, date_str: str) -> int:
@@ -92,11 +127,14 @@ class NetflixFinderService:
                            vote_count_max: Optional[int] = None,
                            popularity_min: Optional[float] = None,
                            popularity_max: Optional[float] = None,
-                           genres: Optional[List[str]] = None,
                            content_type: Optional[str] = None) -> Dict[str, Any]:
         """
         Build ChromaDB where filter based on provided parameters.
         
+        Genres are not part of the where filter: they are stored as one
+        comma-separated string, which ChromaDB can only compare as a whole, so
+        search_content resolves them on the metadata index instead.
+        
         Args:
             release_date_start: Start date for filtering (YYYY-MM-DD format)
             release_date_end: End date for filtering (YYYY-MM-DD format)
@@ -106,7 +144,6 @@ class NetflixFinderService:
             vote_count_max: Maximum vote count
             popularity_min: Minimum popularity
             popularity_max: Maximum popularity
-            genres: List of genres to filter by
             content_type: Content type to filter by (movie, series, etc.)
             
         Returns:
@@ -144,11 +181,6 @@ class NetflixFinderService:
         if popularity_max is not None:
             where_conditions.append({"popularity": {"$lte": popularity_max}})
         
-        # Genre filtering (exact match)
-        if genres:
-            # For multiple genres, we need to use $in operator
-            where_conditions.append({"genres": {"$in": genres}})
-        
         # Content type filtering
         if content_type:
             where_conditions.append({"content_type": content_type})
@@ -161,6 +193,84 @@ class NetflixFinderService:
         else:
             return {}
     
+    @staticmethod
+    def _include_for_fields(fields: Optional[List[str]]) -> List[str]:
+        """
+        Decide which ChromaDB payloads a field projection needs.
+        
+        Args:
+            fields: Requested fields, or None for everything
+            
+        Returns:
+            Value for the include argument of query/get
+        """
+        if fields is None:
+            return ["documents", "metadatas", "distances"]
+        
+        include = ["distances"]
+        if any(field != "document" for field in fields):
+            include.append("metadatas")
+        # Compact metadata has no overview, it is read back from the document
+        if "document" in fields or "overview" in fields:
+            include.append("documents")
+        return include
+    
+    @staticmethod
+    def _document_field(document: Optional[str], label: str) -> Optional[str]:
+        """
+        Read one "Label: value" line back from a content document.
+        
+        Args:
+            document: Document text built by load_data_to_chroma
+            label: Line label, e.g. "Overview"
+            
+        Returns:
+            The value, or None if the line is missing
+        """
+        prefix = f"{label}: "
+        for line in (document or "").split("\n"):
+            if line.startswith(prefix):
+                return line[len(prefix):]
+        return None
+    
+    def _project_fields(self,
+                        ids: List[str],
+                        documents: List[Optional[str]],
+                        metadatas: List[Optional[Dict[str, Any]]],
+                        fields: List[str]) -> Tuple[List[Optional[str]], List[Dict[str, Any]]]:
+        """
+        Reduce results to the requested fields, filling in what compact metadata leaves out.
+        
+        Args:
+            ids: Result IDs
+            documents: Result documents (may be empty if not requested)
+            metadatas: Result metadatas (may be empty if not requested)
+            fields: Requested fields
+            
+        Returns:
+            Tuple of (documents, metadatas) aligned with ids
+        """
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [{} for _ in ids]
+        metadata_fields = [field for field in fields if field != "document"]
+        
+        projected = []
+        for document, metadata in zip(documents, metadatas):
+            metadata = metadata or {}
+            record = {field: metadata[field] for field in metadata_fields if field in metadata}
+            if "overview" in metadata_fields and "overview" not in record:
+                overview = self._document_field(document, "Overview")
+                if overview is not None:
+                    record["overview"] = overview
+            # Compact metadata stores release_date as a timestamp for range filters
+            if isinstance(record.get("release_date"), (int, float)):
+                record["release_date"] = datetime.fromtimestamp(record["release_date"]).strftime("%Y-%m-%d")
+            projected.append(record)
+        
+        if "document" not in fields:
+            documents = [None] * len(ids)
+        return documents, projected
+    
     def search_content(self,
                       query: str,
                       n_results: int = 5,
@@ -173,12 +283,18 @@ class NetflixFinderService:
                       popularity_min: Optional[float] = None,
                       popularity_max: Optional[float] = None,
                       genres: Optional[List[str]] = None,
-                      content_type: Optional[str] = None) -> Dict[str, Any]:
+                      content_type: Optional[str] = None,
+                      fields: Optional[List[str]] = None,
+                      lazy: bool = False,
+                      facets: bool = False,
+                      mmr_lambda: Optional[float] = None,
+                      mmr_pool_size: Optional[int] = None) -> Dict[str, Any]:
         """
         Search for content using semantic similarity with optional filters.
         
         Args:
-            query: Search query text
+            query: Search query text. An empty query browses by popularity
+                instead (see browse_content), without an embedding call.
             n_results: Number of results to return
             release_date_start: Start date for filtering (YYYY-MM-DD format)
             release_date_end: End date for filtering (YYYY-MM-DD format)
@@ -188,47 +304,81 @@ class NetflixFinderService:
             vote_count_max: Maximum vote count
             popularity_min: Minimum popularity
             popularity_max: Maximum popularity
-            genres: List of genres to filter by
+            genres: Genres to filter by; a content matches if it has any of them
             content_type: Content type to filter by (movie, series, etc.)
+            fields: Metadata fields to return, plus "document" for the document text.
+                None returns everything. Only what is needed is read from ChromaDB;
+                "overview" is taken from the document when the metadata is compact.
+            lazy: Only rank: return ids and distances, with documents and metadatas
+                set to None, and let the caller fetch what it shows via hydrate()
+            facets: Also return genre, year and rating counts over every content
+                matching the filters (not only the returned results), computed
+                from the in-memory metadata index
+            mmr_lambda: Enable maximal marginal relevance reranking, trading relevance
+                (1.0) against diversity (0.0), so near duplicates such as sequels and
+                remakes do not fill the results. None ranks by similarity only.
+            mmr_pool_size: Candidates fetched for MMR (default n_results * MMR_POOL_FACTOR)
             
         Returns:
-            Dictionary containing search results with documents, metadatas, distances, and ids
+            Dictionary containing search results with documents, metadatas, distances, and ids,
+            plus "facets" (see MetadataIndex.facet_counts) when requested
         """
         try:
             logger.info(f"Searching for content with query: '{query}'")
             
+            filters = {
+                'release_date_start': release_date_start,
+                'release_date_end': release_date_end,
+                'vote_average_min': vote_average_min,
+                'vote_average_max': vote_average_max,
+                'vote_count_min': vote_count_min,
+                'vote_count_max': vote_count_max,
+                'popularity_min': popularity_min,
+                'popularity_max': popularity_max,
+                'genres': genres,
+                'content_type': content_type
+            }
+            
+            if not query or not query.strip():
+                # Nothing to embed: rank by popularity from the local index instead
+                return self.browse_content(n_results=n_results, fields=fields, lazy=lazy, facets=facets, **filters)
+            
             # Build where filter based on provided parameters
-            where_filter = self._build_where_filter(
-                release_date_start=release_date_start,
-                release_date_end=release_date_end,
-                vote_average_min=vote_average_min,
-                vote_average_max=vote_average_max,
-                vote_count_min=vote_count_min,
-                vote_count_max=vote_count_max,
-                popularity_min=popularity_min,
-                popularity_max=popularity_max,
-                genres=genres,
-                content_type=content_type
-            )
+            where_filter = self._build_where_filter(**{key: value for key, value in filters.items() if key != 'genres'})
             
             # Log filter conditions for debugging
             if where_filter:
                 logger.info(f"Applied filters: {where_filter}")
             
-            # Perform semantic search with filters
+            include = ["distances"] if lazy else self._include_for_fields(fields)
+            query_args = {'n_results': n_results, 'include': include}
             if where_filter:  # Only pass where parameter if there are actual filters
-                results = self.collection.query(
-                    query_texts=[query],
-                    n_results=n_results,
-                    where=where_filter,
-                    include=["documents", "metadatas", "distances"]
-                )
-            else:  # No filters - search all content
-                results = self.collection.query(
-                    query_texts=[query],
-                    n_results=n_results,
-                    include=["documents", "metadatas", "distances"]
-                )
+                query_args['where'] = where_filter
+            
+            allowed_ids = None
+            if genres:
+                # Search only within the IDs the metadata index matches, so hits
+                # and facet counts follow the same (any-of) genre semantics
+                index = self._get_metadata_index()
+                allowed_ids = index.ids_at(self._filter_mask(index, **filters).nonzero()[0])
+                query_args['ids'] = allowed_ids
+            
+            if mmr_lambda is not None:
+                if not 0.0 <= mmr_lambda <= 1.0:
+                    raise ValueError(f"mmr_lambda must be between 0 and 1, got {mmr_lambda}")
+                # Embed the query here to score candidates against it; still one embedding call
+                query_embedding = self.openai_ef([query])[0]
+                query_args['query_embeddings'] = [query_embedding]
+                query_args['n_results'] = max(mmr_pool_size or n_results * MMR_POOL_FACTOR, n_results)
+                query_args['include'] = include + ["embeddings"]
+            else:
+                query_args['query_texts'] = [query]
+            
+            # Perform semantic search with filters
+            started = time.perf_counter()
+            # An empty ID list would not restrict the search, so skip it
+            results = self.collection.query(**query_args) if allowed_ids != [] else {}
+            query_ms = (time.perf_counter() - started) * 1000
             
             # Extract results safely
             try:
@@ -242,12 +392,32 @@ class NetflixFinderService:
                 metadatas = []
                 distances = []
             
+            if mmr_lambda is not None and ids:
+                started = time.perf_counter()
+                selected = mmr_select(query_embedding, results['embeddings'][0], n_results, mmr_lambda)
+                ids = [ids[i] for i in selected]
+                distances = [distances[i] for i in selected]
+                documents = [documents[i] for i in selected] if documents else documents
+                metadatas = [metadatas[i] for i in selected] if metadatas else metadatas
+                logger.info(f"MMR (lambda={mmr_lambda}) picked {len(ids)} of {query_args['n_results']} candidates "
+                            f"in {(time.perf_counter() - started) * 1000:.2f} ms (query {query_ms:.1f} ms)")
+            
+            if lazy:
+                documents, metadatas = None, None
+            else:
+                if documents and metadatas:
+                    self._cache_records(ids, documents, metadatas)
+                if fields is not None:
+                    documents, metadatas = self._project_fields(ids, documents, metadatas, fields)
+            
             result_dict = {
                 'ids': ids,
                 'documents': documents,
                 'metadatas': metadatas,
                 'distances': distances
             }
+            if facets:
+                result_dict['facets'] = self.facet_counts(**filters)
             
             logger.info(f"Found {len(ids)} results for query: '{query}'")
             return result_dict
@@ -256,6 +426,220 @@ class NetflixFinderService:
             logger.error(f"Error during search: {e}")
             raise
     
+    def _collection_version(self) -> Any:
+        """
+        Return the collection version, asking ChromaDB at most once per VERSION_CHECK_INTERVAL.
+        
+        The version is the record count plus the modification time of the
+        facet counter file, which every maintained write path updates.
+        
+        Returns:
+            Version marker from metadata_index.collection_version
+        """
+        now = time.monotonic()
+        checked = self._version_check
+        if checked is None or now - checked[0] >= VERSION_CHECK_INTERVAL:
+            checked = (now, collection_version(self.collection, self.facets_path))
+            self._version_check = checked
+        return checked[1]
+    
+    def _get_metadata_index(self) -> MetadataIndex:
+        """
+        Return the metadata index, rebuilding it if the collection changed.
+        
+        Returns:
+            Up-to-date MetadataIndex (see _collection_version)
+        """
+        version = self._collection_version()
+        with self._metadata_index_lock:
+            if self._metadata_index is None or self._metadata_index.version != version:
+                self._metadata_index = MetadataIndex.from_collection(self.collection, version=version)
+            return self._metadata_index
+    
+    def _filter_mask(self, index: MetadataIndex, **filters: Any) -> Any:
+        """
+        Evaluate search filters against the metadata index.
+        
+        Args:
+            index: Metadata index
+            **filters: Filter arguments of search_content
+            
+        Returns:
+            Boolean NumPy mask over the index rows
+        """
+        for key in ('release_date_start', 'release_date_end'):
+            if filters.get(key):
+                filters[key] = self._convert_date_to_timestamp(filters[key])
+            else:
+                filters[key] = None
+        return index.filter(**filters)
+    
+    def facet_counts(self, **filters: Any) -> Dict[str, Any]:
+        """
+        Count genres, release years and ratings over every content matching the filters.
+        
+        Args:
+            **filters: Filter arguments of search_content (release_date_start,
+                vote_average_min, genres, ...). Genres match if any of them is present.
+            
+        Returns:
+            Dictionary with "total", "genres", "years" and "rating_histogram"
+        """
+        index = self._get_metadata_index()
+        started = time.perf_counter()
+        counts = index.facet_counts(self._filter_mask(index, **filters))
+        logger.info(f"Computed facets over {counts['total']}/{len(index)} contents in "
+                    f"{(time.perf_counter() - started) * 1000:.2f} ms")
+        return counts
+    
+    def browse_content(self,
+                       n_results: int = 5,
+                       sort_by: str = "popularity",
+                       descending: bool = True,
+                       fields: Optional[List[str]] = None,
+                       lazy: bool = False,
+                       facets: bool = False,
+                       **filters: Any) -> Dict[str, Any]:
+        """
+        List content matching filters, sorted by a metadata field, without a text query.
+        
+        Filtering and sorting run on the in-memory metadata index, so there is
+        no embedding call and no vector search; only the returned records are
+        read from ChromaDB (unless lazy).
+        
+        Args:
+            n_results: Number of results to return
+            sort_by: One of SORT_FIELDS ("popularity", "vote_average", "vote_count"
+                or "release_date")
+            descending: Largest values (newest dates) first
+            fields: Optional projection, as in search_content
+            lazy: Only return ids and let the caller fetch what it shows via hydrate()
+            facets: Also return facet counts over every matching content
+            **filters: Filter arguments of search_content (release_date_start,
+                vote_average_min, genres, ...). Genres match if any of them is present.
+            
+        Returns:
+            Dictionary in the search_content format; distances is None
+            
+        Raises:
+            ValueError: If sort_by is not one of SORT_FIELDS
+        """
+        try:
+            # Reject unknown fields before the index is (re)built
+            if sort_by not in SORT_FIELDS:
+                raise ValueError(f"Cannot sort by {sort_by!r}, expected one of {', '.join(SORT_FIELDS)}")
+            index = self._get_metadata_index()
+            started = time.perf_counter()
+            mask = self._filter_mask(index, **filters)
+            ids = index.ids_at(index.top(mask, sort_by, n_results, descending))
+            logger.info(f"Browsed {len(ids)} contents by {sort_by} in {(time.perf_counter() - started) * 1000:.3f} ms")
+            
+            result_dict = {'ids': ids, 'documents': None, 'metadatas': None, 'distances': None}
+            if not lazy:
+                result_dict.update(self.hydrate(ids, fields=fields))
+            if facets:
+                result_dict['facets'] = index.facet_counts(mask)
+            return result_dict
+            
+        except Exception as e:
+            logger.error(f"Error browsing content: {e}")
+            raise
+    
+    def _check_record_cache_version(self, version: Any) -> None:
+        """
+        Clear the record cache if the collection changed since it was filled.
+        
+        Catches writes made by other processes (the loader, sync_data.py),
+        which invalidate() cannot see. Must be called with the cache lock held.
+        
+        Args:
+            version: Current collection version
+        """
+        if version != self._record_cache_version:
+            self._record_cache.clear()
+            self._record_cache_version = version
+    
+    def _cache_records(self, ids: List[str], documents: List[Optional[str]], metadatas: List[Optional[Dict[str, Any]]]) -> None:
+        """
+        Store full records in the LRU record cache.
+        
+        Args:
+            ids: Record IDs
+            documents: Document of each record
+            metadatas: Full metadata of each record
+        """
+        version = self._collection_version()
+        with self._record_cache_lock:
+            self._check_record_cache_version(version)
+            for content_id, document, metadata in zip(ids, documents, metadatas):
+                self._record_cache[content_id] = {'document': document, 'metadata': metadata}
+                self._record_cache.move_to_end(content_id)
+            while len(self._record_cache) > RECORD_CACHE_SIZE:
+                self._record_cache.popitem(last=False)
+    
+    def _fetch_records(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get full records by ID, from the cache or with one batched ChromaDB get.
+        
+        Args:
+            ids: Record IDs
+            
+        Returns:
+            ID to {"document", "metadata"} for the IDs that exist
+        """
+        records: Dict[str, Dict[str, Any]] = {}
+        version = self._collection_version()
+        with self._record_cache_lock:
+            self._check_record_cache_version(version)
+            for content_id in ids:
+                record = self._record_cache.get(content_id)
+                if record is not None:
+                    self._record_cache.move_to_end(content_id)
+                    records[content_id] = record
+            missing = list(dict.fromkeys(content_id for content_id in ids if content_id not in records))
+            self.record_cache_hits += len(ids) - len(missing)
+            self.record_cache_misses += len(missing)
+        
+        if missing:
+            results = self.collection.get(ids=missing, include=["documents", "metadatas"])
+            fetched_ids = results.get('ids') or []
+            documents = results.get('documents') or [None] * len(fetched_ids)
+            metadatas = results.get('metadatas') or [None] * len(fetched_ids)
+            self._cache_records(fetched_ids, documents, metadatas)
+            for content_id, document, metadata in zip(fetched_ids, documents, metadatas):
+                records[content_id] = {'document': document, 'metadata': metadata}
+        return records
+    
+    def hydrate(self, ids: List[str], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Fetch documents and metadata for IDs returned by a lazy search.
+        
+        Records already seen are served from an in-process LRU cache; the rest
+        are read with a single batched get.
+        
+        Args:
+            ids: Content IDs, e.g. the first page of search_content(..., lazy=True)['ids']
+            fields: Optional projection, as in search_content
+            
+        Returns:
+            Dictionary with ids, documents and metadatas aligned with the input order
+            (document and metadata are None for IDs that no longer exist)
+        """
+        try:
+            records = self._fetch_records(ids)
+            documents = [records[content_id]['document'] if content_id in records else None for content_id in ids]
+            metadatas = [records[content_id]['metadata'] if content_id in records else None for content_id in ids]
+            
+            if fields is not None:
+                documents, projected = self._project_fields(ids, documents, metadatas, fields)
+                metadatas = [record if content_id in records else None for content_id, record in zip(ids, projected)]
+            
+            return {'ids': ids, 'documents': documents, 'metadatas': metadatas}
+            
+        except Exception as e:
+            logger.error(f"Error hydrating {len(ids)} results: {e}")
+            raise
+    
     def get_content_by_id(self, content_id: str) -> Optional[Dict[str, Any]]:
         """
         Get specific content by ID.
@@ -266,73 +650,104 @@ class NetflixFinderService:
         Returns:
             Content metadata and document or None if not found
         """
+        record = self.get_content_by_id_many([content_id])[0]
+        if not record['found']:
+            return None
+        return {'id': record['id'], 'document': record['document'], 'metadata': record['metadata']}
+    
+    def get_content_by_id_many(self, content_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get several contents by ID with a single ChromaDB call.
+        
+        Records are served from the in-process LRU cache when possible; only
+        the IDs not cached are fetched, all in one batched get.
+        
+        Args:
+            content_ids: IDs of the contents to retrieve (duplicates allowed)
+            
+        Returns:
+            One dictionary per requested ID, in request order, with "id",
+            "document", "metadata" and "found" (False, with document and
+            metadata set to None, when the ID does not exist)
+        """
         try:
-            results = self.collection.get(
-                ids=[content_id],
-                include=["documents", "metadatas"]
-            )
-            
-            if results and results.get('ids'):
-                try:
-                    document = results['documents'][0] if 'documents' in results and results['documents'] else None
-                    metadata = results['metadatas'][0] if 'metadatas' in results and results['metadatas'] else None
-                    
-                    return {
-                        'id': results['ids'][0],
-                        'document': document,
-                        'metadata': metadata
-                    }
-                except (IndexError, TypeError):
-                    return None
-            else:
-                return None
-                
+            records = self._fetch_records(content_ids)
+            return [
+                {
+                    'id': content_id,
+                    'document': records[content_id]['document'] if content_id in records else None,
+                    'metadata': records[content_id]['metadata'] if content_id in records else None,
+                    'found': content_id in records
+                }
+                for content_id in content_ids
+            ]
+            
         except Exception as e:
-            logger.error(f"Error retrieving content by ID {content_id}: {e}")
+            logger.error(f"Error retrieving {len(content_ids)} contents by ID: {e}")
             raise
     
+    def upsert_content(self,
+                       ids: List[str],
+                       documents: List[str],
+                       metadatas: List[Dict[str, Any]]) -> None:
+        """
+        Insert or update contents and drop their cached records.
+        
+        Args:
+            ids: Content IDs
+            documents: Document text of each content
+            metadatas: Metadata of each content
+        """
+        try:
+            upsert_with_facets(self.collection, FacetStats.load(self.facets_path), ids, documents, metadatas)
+        finally:
+            # Invalidate even on failure: a partial write may have changed some records
+            self.invalidate(ids)
+    
+    def invalidate(self, ids: Optional[List[str]] = None) -> None:
+        """
+        Drop records from the in-process cache and the metadata index.
+        
+        Writes made through upsert_content invalidate automatically, and writes
+        from other processes are detected through the collection version within
+        VERSION_CHECK_INTERVAL; call this to see them at once, or after a write
+        that bypassed the facet counters.
+        
+        Args:
+            ids: IDs to drop, or None to clear the whole cache
+        """
+        self._version_check = None
+        with self._metadata_index_lock:
+            self._metadata_index = None
+        with self._record_cache_lock:
+            if ids is None:
+                self._record_cache.clear()
+            else:
+                for content_id in ids:
+                    self._record_cache.pop(content_id, None)
+    
     def get_collection_stats(self) -> Dict[str, Any]:
         """
         Get statistics about the content collection.
         
+        Facet counts come from the counters maintained at ingest and delete
+        (see db/facet_stats.py), so the cost does not grow with the collection.
+        They are rebuilt once from the collection if they were never written.
+        
         Returns:
-            Dictionary with collection statistics
+            Dictionary with collection statistics: total_documents, content_types,
+            top_genres, genres, languages, release_years and rating_histogram
         """
         try:
             count = self.collection.count()
             
-            # Get sample of documents to analyze metadata
-            sample_results = self.collection.get(
-                limit=min(100, count),
-                include=["metadatas"]
-            )
-            
-            # Analyze content types
-            content_types = {}
-            genres = {}
-            
-            if sample_results and sample_results.get('metadatas'):
-                metadatas_list = sample_results.get('metadatas', [])
-                if metadatas_list:
-                    for metadata in metadatas_list:
-                        # Count content types
-                        content_type = metadata.get('content_type', 'unknown')
-                        content_types[content_type] = content_types.get(content_type, 0) + 1
-                        
-                        # Count genres - handle different data types
-                        genre_data = metadata.get('genres', '')
-                        if isinstance(genre_data, str) and genre_data:
-                            for genre in genre_data.split(', '):
-                                genres[genre] = genres.get(genre, 0) + 1
-                        elif isinstance(genre_data, list):
-                            for genre in genre_data:
-                                genres[genre] = genres.get(genre, 0) + 1
-            
-            return {
-                'total_documents': count,
-                'content_types': content_types,
-                'top_genres': dict(sorted(genres.items(), key=lambda x: x[1], reverse=True)[:10])
-            }
+            # The file is small and may be updated by the loaders, so it is read on every call
+            facet_stats = FacetStats.load(self.facets_path)
+            if not facet_stats.exists() and count:
+                logger.info("Facet counters not found, counting the collection once")
+                facet_stats.rebuild(self.collection)
+            
+            return {'total_documents': count, **facet_stats.to_stats()}
             
         except Exception as e:
             logger.error(f"Error getting collection stats: {e}")
@@ -0,0 +1,101 @@
+"""
+Local OpenAI-compatible stand-in server for testing streamed answers.
+
+Serves POST /v1/chat/completions with canned text, both as a single JSON
+response and as a server-sent event stream (stream=true), with a delay
+between tokens so time-to-first-token and total latency can be observed.
+
+Usage:
+    python fake_openai_server.py --port 8765
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python vector_db_llm_query.py
+"""
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_ANSWER = (
+    "This is a canned answer from the local stand-in server. "
+    "It is streamed word by word to exercise the streaming client."
+)
+
+
+class ChatCompletionsHandler(BaseHTTPRequestHandler):
+    token_delay = 0.05
+    first_token_delay = 0.3
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self.send_error(404, "Only /v1/chat/completions is supported")
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        model = request.get("model", "stand-in")
+        created = int(time.time())
+
+        if not request.get("stream"):
+            body = json.dumps(
+                {
+                    "id": "chatcmpl-stand-in",
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": CANNED_ANSWER},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                }
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        time.sleep(self.first_token_delay)
+        words = CANNED_ANSWER.split(" ")
+        for i, word in enumerate(words):
+            token = word if i == 0 else f" {word}"
+            self._send_event(model, created, {"content": token}, None)
+            time.sleep(self.token_delay)
+        self._send_event(model, created, {}, "stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _send_event(self, model, created, delta, finish_reason):
+        chunk = {
+            "id": "chatcmpl-stand-in",
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--token-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    ChatCompletionsHandler.token_delay = args.token_delay
+    server = ThreadingHTTPServer((args.host, args.port), ChatCompletionsHandler)
+    print(f"==== Stand-in OpenAI server on http://{args.host}:{args.port}/v1 ====")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
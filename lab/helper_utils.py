@@ -0,0 +1,440 @@
+# helper_utils.py
+import hashlib
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+
+class LLMResponseCache:
+    """
+    Disk-backed cache of chat completion responses with a time-to-live.
+
+    Each entry is a small JSON file named after the hash of
+    (model, full message list, sampling parameters).
+    """
+
+    def __init__(self, cache_dir, ttl_seconds=7 * 24 * 3600):
+        """
+        Args:
+        cache_dir (str): Directory where cache entries are stored.
+        ttl_seconds (float): Seconds an entry stays valid. None keeps entries forever.
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(model, messages, params):
+        """
+        Builds the cache key for a chat completion request.
+
+        Args:
+        model (str): The chat model name.
+        messages (list): The full list of chat messages.
+        params (dict): Sampling parameters such as temperature or top_p.
+
+        Returns:
+        str: The hex SHA-256 digest identifying the request.
+        """
+        payload = json.dumps(
+            {"model": model, "messages": messages, "params": params},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """
+        Returns the cached response content, or None if missing or expired.
+
+        Args:
+        key (str): The cache key from make_key.
+
+        Returns:
+        str: The cached message content, or None.
+        """
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if self.ttl_seconds is not None and time.time() - entry["created_at"] > self.ttl_seconds:
+            os.remove(self._path(key))
+            return None
+        return entry["content"]
+
+    def put(self, key, content):
+        """
+        Stores a response content in the cache.
+
+        Args:
+        key (str): The cache key from make_key.
+        content (str): The message content returned by the model.
+        """
+        # Write to a temporary file first so readers never see a partial entry
+        tmp_path = f"{self._path(key)}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"created_at": time.time(), "content": content}, f)
+        os.replace(tmp_path, self._path(key))
+
+
+def cached_chat_completion(client, cache, model, messages, **params):
+    """
+    Calls the chat completions API unless an identical request is already cached.
+
+    Args:
+    client (openai.OpenAI): The OpenAI client.
+    cache (LLMResponseCache): The response cache. None disables caching.
+    model (str): The chat model name.
+    messages (list): The full list of chat messages.
+    **params: Sampling parameters forwarded to the API and included in the key.
+
+    Returns:
+    str: The content of the first choice's message.
+    """
+    key = LLMResponseCache.make_key(model, messages, params) if cache else None
+    if cache:
+        content = cache.get(key)
+        if content is not None:
+            return content
+
+    response = client.chat.completions.create(model=model, messages=messages, **params)
+    content = response.choices[0].message.content
+    if cache:
+        cache.put(key, content)
+    return content
+
+
+class StreamStats:
+    """
+    Timing of a streamed chat completion.
+
+    Attributes:
+    started_at (float): perf_counter value when the request was sent.
+    first_token_at (float): perf_counter value when the first token arrived, or None.
+    finished_at (float): perf_counter value when the stream ended, or None.
+    cached (bool): Whether the answer came from the response cache.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+        self.cached = False
+
+    def mark_token(self):
+        """Records the arrival of a token; only the first call is kept."""
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    def mark_finished(self):
+        """Records the end of the stream."""
+        self.finished_at = time.perf_counter()
+
+    @property
+    def time_to_first_token(self):
+        """float: Seconds until the first token, or None if none arrived."""
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    @property
+    def total_latency(self):
+        """float: Seconds until the stream ended, or None if it has not ended."""
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def summary(self):
+        """str: One-line report of time to first token and total latency."""
+        ttft = self.time_to_first_token
+        total = self.total_latency
+        ttft_text = f"{ttft:.2f}s" if ttft is not None else "n/a"
+        total_text = f"{total:.2f}s" if total is not None else "n/a"
+        source = " (cached)" if self.cached else ""
+        return f"time to first token: {ttft_text}, total: {total_text}{source}"
+
+
+def stream_chat_completion(client, cache, model, messages, stats=None, **params):
+    """
+    Streams a chat completion, yielding content tokens as they arrive.
+
+    A cached answer is yielded in one piece; a streamed answer is stored in
+    the cache once it has been fully received.
+
+    Args:
+    client (openai.OpenAI): The OpenAI (or OpenAI-compatible) client.
+    cache (LLMResponseCache): The response cache. None disables caching.
+    model (str): The chat model name.
+    messages (list): The full list of chat messages.
+    stats (StreamStats): Optional object that receives the timings.
+    **params: Sampling parameters forwarded to the API and included in the key.
+
+    Yields:
+    str: Pieces of the answer content.
+    """
+    stats = stats or StreamStats()
+    key = LLMResponseCache.make_key(model, messages, params) if cache else None
+    content = cache.get(key) if cache else None
+    if content is not None:
+        stats.cached = True
+        stats.mark_token()
+        yield content
+        stats.mark_finished()
+        return
+
+    pieces = []
+    stream = client.chat.completions.create(
+        model=model, messages=messages, stream=True, **params
+    )
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        token = chunk.choices[0].delta.content
+        if token:
+            stats.mark_token()
+            pieces.append(token)
+            yield token
+    stats.mark_finished()
+    if cache:
+        cache.put(key, "".join(pieces))
+
+
+async def astream_chat_completion(client, cache, model, messages, stats=None, **params):
+    """
+    Async version of stream_chat_completion for openai.AsyncOpenAI clients.
+
+    Args:
+    client (openai.AsyncOpenAI): The async OpenAI (or OpenAI-compatible) client.
+    cache (LLMResponseCache): The response cache. None disables caching.
+    model (str): The chat model name.
+    messages (list): The full list of chat messages.
+    stats (StreamStats): Optional object that receives the timings.
+    **params: Sampling parameters forwarded to the API and included in the key.
+
+    Yields:
+    str: Pieces of the answer content.
+    """
+    stats = stats or StreamStats()
+    key = LLMResponseCache.make_key(model, messages, params) if cache else None
+    content = cache.get(key) if cache else None
+    if content is not None:
+        stats.cached = True
+        stats.mark_token()
+        yield content
+        stats.mark_finished()
+        return
+
+    pieces = []
+    stream = await client.chat.completions.create(
+        model=model, messages=messages, stream=True, **params
+    )
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        token = chunk.choices[0].delta.content
+        if token:
+            stats.mark_token()
+            pieces.append(token)
+            yield token
+    stats.mark_finished()
+    if cache:
+        cache.put(key, "".join(pieces))
+
+
+class SemanticAnswerCache:
+    """
+    Answer cache that matches paraphrased questions by query embedding similarity.
+
+    An entry stores (query embedding, retrieved ids, answer). A new query hits
+    the cache when its embedding is within the cosine threshold of a stored one
+    AND retrieval returned the same ids, so the cached answer was built from
+    the same context. A sample of hits can be audited by regenerating the
+    answer and comparing it with the cached one.
+    """
+
+    def __init__(self, path=None, threshold=0.95, audit_rate=0.0, audit_log_path=None,
+                 answer_embedding_function=None, audit_threshold=0.9, max_entries=1000):
+        """
+        Args:
+        path (str): JSON file where entries are persisted. None keeps them in memory.
+        threshold (float): Minimum cosine similarity between query embeddings for a hit.
+        audit_rate (float): Fraction of hits that are regenerated and compared (0 to 1).
+        audit_log_path (str): JSONL file receiving one record per audited hit.
+        answer_embedding_function (callable): Embeds answers for the audit comparison.
+            Without it, answers are compared by word overlap.
+        audit_threshold (float): Minimum answer similarity for an audited hit to count as correct.
+        max_entries (int): Oldest entries are evicted beyond this size.
+        """
+        self.path = path
+        self.threshold = threshold
+        self.audit_rate = audit_rate
+        self.audit_log_path = audit_log_path
+        self.answer_embedding_function = answer_embedding_function
+        self.audit_threshold = audit_threshold
+        self.max_entries = max_entries
+        self.entries = []
+        self.embeddings = np.empty((0, 0), dtype=np.float32)
+        self.lookups = 0
+        self.hits = 0
+        self.audited = 0
+        self.false_hits = 0
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+            self._rebuild_matrix()
+
+    @staticmethod
+    def _normalize(vectors):
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _rebuild_matrix(self):
+        if self.entries:
+            self.embeddings = self._normalize([entry["embedding"] for entry in self.entries])
+        else:
+            self.embeddings = np.empty((0, 0), dtype=np.float32)
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+    def lookup(self, query_embedding, retrieved_ids):
+        """
+        Finds the most similar cached query that retrieved the same ids.
+
+        Args:
+        query_embedding (list): Embedding of the new query.
+        retrieved_ids (list): Ids returned by retrieval for the new query.
+
+        Returns:
+        dict: The matching entry with an added "similarity" key, or None.
+        """
+        self.lookups += 1
+        if not self.entries:
+            return None
+        similarities = self.embeddings @ self._normalize(query_embedding)[0]
+        wanted_ids = sorted(retrieved_ids)
+        for index in np.argsort(-similarities):
+            if similarities[index] < self.threshold:
+                break
+            entry = self.entries[index]
+            if entry["retrieved_ids"] == wanted_ids:
+                self.hits += 1
+                return {**entry, "index": int(index), "similarity": float(similarities[index])}
+        return None
+
+    def store(self, query, query_embedding, retrieved_ids, answer):
+        """
+        Adds an answer to the cache and persists it.
+
+        Args:
+        query (str): The query text, kept for auditing.
+        query_embedding (list): Embedding of the query.
+        retrieved_ids (list): Ids returned by retrieval for the query.
+        answer: The generated answer (any JSON-serializable value).
+        """
+        self.entries.append(
+            {
+                "query": query,
+                "embedding": [float(x) for x in np.asarray(query_embedding).ravel()],
+                "retrieved_ids": sorted(retrieved_ids),
+                "answer": answer,
+            }
+        )
+        self.entries = self.entries[-self.max_entries :]
+        self._rebuild_matrix()
+        self._save()
+
+    def answers_agree(self, cached_answer, fresh_answer):
+        """
+        Decides whether a cached answer still matches a freshly generated one.
+
+        Args:
+        cached_answer: The answer served from the cache.
+        fresh_answer: The answer generated for the new query.
+
+        Returns:
+        tuple: (agree, similarity).
+        """
+        cached_text = cached_answer if isinstance(cached_answer, str) else "\n".join(cached_answer)
+        fresh_text = fresh_answer if isinstance(fresh_answer, str) else "\n".join(fresh_answer)
+        if self.answer_embedding_function is not None:
+            vectors = self._normalize(self.answer_embedding_function([cached_text, fresh_text]))
+            similarity = float(vectors[0] @ vectors[1])
+        else:
+            cached_words = set(cached_text.lower().split())
+            fresh_words = set(fresh_text.lower().split())
+            union = cached_words | fresh_words
+            similarity = len(cached_words & fresh_words) / len(union) if union else 1.0
+        return similarity >= self.audit_threshold, similarity
+
+    def get_or_generate(self, query, query_embedding, retrieved_ids, generate):
+        """
+        Returns a cached answer for a paraphrased query, or generates and stores a new one.
+
+        Args:
+        query (str): The query text.
+        query_embedding (list): Embedding of the query.
+        retrieved_ids (list): Ids returned by retrieval for the query.
+        generate (callable): Builds the answer (reranking + LLM call) when there is no hit.
+
+        Returns:
+        tuple: (answer, from_cache).
+        """
+        match = self.lookup(query_embedding, retrieved_ids)
+        if match is None:
+            answer = generate()
+            self.store(query, query_embedding, retrieved_ids, answer)
+            return answer, False
+
+        if random.random() < self.audit_rate:
+            fresh_answer = generate()
+            agree, answer_similarity = self.answers_agree(match["answer"], fresh_answer)
+            self.audited += 1
+            if not agree:
+                self.false_hits += 1
+                # Replace the wrong entry so the next paraphrase gets the fresh answer
+                self.entries[match["index"]]["answer"] = fresh_answer
+                self._save()
+            if self.audit_log_path:
+                os.makedirs(os.path.dirname(os.path.abspath(self.audit_log_path)), exist_ok=True)
+                with open(self.audit_log_path, "a", encoding="utf-8") as f:
+                    record = {
+                        "timestamp": time.time(),
+                        "query": query,
+                        "cached_query": match["query"],
+                        "query_similarity": match["similarity"],
+                        "answer_similarity": answer_similarity,
+                        "false_hit": not agree,
+                    }
+                    f.write(json.dumps(record) + "\n")
+            if not agree:
+                return fresh_answer, False
+        return match["answer"], True
+
+    def report(self):
+        """
+        Summarizes cache effectiveness.
+
+        Returns:
+        str: Hit rate and audited false-hit rate.
+        """
+        hit_rate = self.hits / self.lookups if self.lookups else 0.0
+        false_hit_rate = self.false_hits / self.audited if self.audited else 0.0
+        return (
+            f"semantic cache: {self.hits}/{self.lookups} hits ({hit_rate:.0%}), "
+            f"{self.false_hits}/{self.audited} audited hits were false ({false_hit_rate:.0%})"
+        )
@@ -2,8 +2,16 @@ import os
 from dotenv import load_dotenv
 from pathlib import Path
 import chromadb
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from chromadb.utils import embedding_functions
+from helper_utils import (
+    LLMResponseCache,
+    SemanticAnswerCache,
+    StreamStats,
+    astream_chat_completion,
+    cached_chat_completion,
+    stream_chat_completion,
+)
 
 load_dotenv()
 openai_key = os.getenv("OPENAI_API_KEY")
@@ -26,18 +34,37 @@ collection = chroma_client.get_or_create_collection(
     name=collection_name, embedding_function=openai_ef
 )
 
-client = OpenAI(api_key=openai_key)
+# OPENAI_BASE_URL points the chat calls at an OpenAI-compatible server,
+# e.g. the local stand-in from fake_openai_server.py
+openai_base_url = os.getenv("OPENAI_BASE_URL")
+client = OpenAI(api_key=openai_key, base_url=openai_base_url)
+async_client = AsyncOpenAI(api_key=openai_key, base_url=openai_base_url)
+
+# Identical prompts for repeated questions are answered from disk
+llm_cache = LLMResponseCache(str(current_file.parent / "cache" / "llm"))
+
+# Paraphrased questions that retrieve the same chunks reuse the stored answer
+semantic_cache = SemanticAnswerCache(
+    path=str(current_file.parent / "cache" / "semantic_answers.json"),
+    threshold=0.92,
+    audit_rate=0.1,
+    audit_log_path=str(current_file.parent / "cache" / "semantic_audit.jsonl"),
+    answer_embedding_function=openai_ef,
+)
 
 
 def query_documents(question, n_results=2):
-    results = collection.query(query_texts=question, n_results=n_results)
+    # Embed the question once: the vector serves both the search and the semantic cache
+    question_embedding = openai_ef([question])[0]
+    results = collection.query(query_embeddings=[question_embedding], n_results=n_results)
 
     relevant_chunks = [doc for sublist in results["documents"] for doc in sublist]
+    chunk_ids = [doc_id for sublist in results["ids"] for doc_id in sublist]
     print("==== Returning relevant chunks ====")
-    return relevant_chunks
+    return relevant_chunks, chunk_ids, question_embedding
 
 
-def generate_response(question, relevant_chunks):
+def build_messages(question, relevant_chunks):
     context = "\n\n".join(relevant_chunks)
     prompt = (
         "You are an assistant for question-answering tasks. Use the following pieces of "
@@ -46,27 +73,79 @@ def generate_response(question, relevant_chunks):
         "\n\nContext:\n" + context + "\n\nQuestion:\n" + question
     )
 
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {
-                "role": "system",
-                "content": prompt,
-            },
-            {
-                "role": "user",
-                "content": question,
-            },
-        ],
-    )  
+    return [
+        {
+            "role": "system",
+            "content": prompt,
+        },
+        {
+            "role": "user",
+            "content": question,
+        },
+    ]
+
+
+def generate_response(question, relevant_chunks):
+    answer = cached_chat_completion(
+        client, llm_cache, "gpt-3.5-turbo", build_messages(question, relevant_chunks)
+    )
+    return answer
+
 
-    answer = response.choices[0].message  
-    return answer  
+def stream_response(question, relevant_chunks, stats=None):
+    # Yields answer tokens as they arrive instead of waiting for the full completion
+    return stream_chat_completion(
+        client, llm_cache, "gpt-3.5-turbo", build_messages(question, relevant_chunks), stats
+    )
+
+
+def astream_response(question, relevant_chunks, stats=None):
+    # Async iterator version of stream_response, for use inside an event loop
+    return astream_chat_completion(
+        async_client,
+        llm_cache,
+        "gpt-3.5-turbo",
+        build_messages(question, relevant_chunks),
+        stats,
+    )
+
+
+def print_streamed_answer(question, relevant_chunks):
+    stats = StreamStats()
+    pieces = []
+    for token in stream_response(question, relevant_chunks, stats):
+        pieces.append(token)
+        print(token, end="", flush=True)
+    print()
+    print(f"==== {stats.summary()} ====")
+    return "".join(pieces)
 
 
 question = "give me a brief overview of the articles. Be concise, please."
-relevant_chunks = query_documents(question)
-answer = generate_response(question, relevant_chunks)
+relevant_chunks, chunk_ids, question_embedding = query_documents(question)
 
 print("==== Answer ====")
-print(answer.content)
+if os.getenv("STREAM_ANSWER", "1") == "1":
+    streamed = []
+
+    def generate_streamed():
+        streamed.append(True)
+        return print_streamed_answer(question, relevant_chunks)
+
+    answer, from_cache = semantic_cache.get_or_generate(
+        question, question_embedding, chunk_ids, generate_streamed
+    )
+    # Audited cache hits also stream a fresh answer; whatever was streamed is
+    # already on screen, so only a hit answered purely from the cache is printed
+    if not streamed:
+        print(answer)
+else:
+    answer, from_cache = semantic_cache.get_or_generate(
+        question,
+        question_embedding,
+        chunk_ids,
+        lambda: generate_response(question, relevant_chunks),
+    )
+    print(answer)
+
+print(f"==== {semantic_cache.report()} ====")